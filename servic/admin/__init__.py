@@ -1,11 +1,30 @@
 from django.contrib import admin
-from ..models import User, ServiceProviderProfile, ProviderRequest, UserRoleChangeLog
+from ..models import (
+    User,
+    ServiceProviderProfile,
+    ProviderRequest,
+    UserRoleChangeLog,
+    ServiceCategory,
+    Service,
+    ServiceImage,
+    Country,
+    State,
+    City,
+)
 from .user_admin import CustomUserAdmin
 from .provider_admin import ServiceProviderProfileAdmin, ProviderRequestAdmin
 from .log_admin import UserRoleChangeLogAdmin
+from .service_admin import ServiceCategoryAdmin, ServiceAdmin, ServiceImageAdmin
+from .location_admin import CountryAdmin, StateAdmin, CityAdmin
 
 # Registro de modelos en el panel de administración
 admin.site.register(User, CustomUserAdmin)
 admin.site.register(ServiceProviderProfile, ServiceProviderProfileAdmin)
 admin.site.register(ProviderRequest, ProviderRequestAdmin)
 admin.site.register(UserRoleChangeLog, UserRoleChangeLogAdmin)
+admin.site.register(ServiceCategory, ServiceCategoryAdmin)
+admin.site.register(Service, ServiceAdmin)
+admin.site.register(ServiceImage, ServiceImageAdmin)
+admin.site.register(Country, CountryAdmin)
+admin.site.register(State, StateAdmin)
+admin.site.register(City, CityAdmin)
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador para tablas grandes: sin filtros, en Postgres usa la estimación del
+    planner (pg_class.reltuples) en lugar de un COUNT(*) que recorre toda la tabla.
+    Por debajo de ADMIN_ESTIMATED_COUNT_THRESHOLD filas, o con filtros, cuenta exacto.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [connection.ops.quote_name(queryset.model._meta.db_table)],
+                )
+                row = cursor.fetchone()
+            # reltuples es -1 si la tabla nunca fue analizada
+            if row and row[0] >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class FastChangeListMixin:
+    """
+    Ajustes comunes de los changelists del admin para tablas de millones de filas:
+      - conteo estimado (EstimatedCountPaginator) y sin el segundo COUNT del total,
+      - search_fields se buscan por prefijo con `startswith`, que en Postgres usa el
+        índice `_like` de los campos únicos (email, username, name) en lugar de un
+        `icontains` que obliga a recorrer la tabla. Un término numérico busca también
+        por id.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        condition = Q()
+        # Los emails se guardan casi siempre en minúsculas: se prueba también esa variante
+        for variant in {term, term.lower()}:
+            for field in self.search_fields:
+                condition |= Q(**{f"{field}__startswith": variant})
+        if term.isdigit():
+            condition |= Q(pk=int(term))
+        return queryset.filter(condition), False
@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+
+# Configuración para las tablas de ubicación (se cargan desde el gazetteer)
+class CountryAdmin(admin.ModelAdmin):
+    list_display = ("name", "code")
+    search_fields = ("name", "code")
+
+
+class StateAdmin(admin.ModelAdmin):
+    list_display = ("name", "country")
+    list_filter = ("country",)
+    list_select_related = ("country",)
+    search_fields = ("name",)
+
+
+class CityAdmin(admin.ModelAdmin):
+    list_display = ("name", "state", "latitude", "longitude")
+    list_filter = ("state__country",)
+    list_select_related = ("state",)
+    search_fields = ("name",)
+    autocomplete_fields = ("state",)
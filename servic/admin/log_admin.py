@@ -1,10 +1,13 @@
 from django.contrib import admin
 from ..models import UserRoleChangeLog
+from .base import FastChangeListMixin
 
 
 # Configuración para el registro de cambios de rol
-class UserRoleChangeLogAdmin(admin.ModelAdmin):
+class UserRoleChangeLogAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("user", "previous_role", "new_role", "changed_by", "changed_at")
     list_filter = ("previous_role", "new_role", "changed_at")
-    search_fields = ("user__email", "reason")
+    search_fields = ("user__email",)
+    list_select_related = ("user", "changed_by")
+    autocomplete_fields = ("user", "changed_by")
     readonly_fields = ("changed_at",)
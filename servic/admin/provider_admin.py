@@ -1,9 +1,11 @@
 from django.contrib import admin
+from ..authentication import update_user_claims
 from ..models import ServiceProviderProfile, ProviderRequest
+from .base import FastChangeListMixin
 
 
 # Configuración para el perfil de prestador
-class ServiceProviderProfileAdmin(admin.ModelAdmin):
+class ServiceProviderProfileAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = (
         "user",
         "identification_type",
@@ -13,13 +15,22 @@ class ServiceProviderProfileAdmin(admin.ModelAdmin):
         "created_at",
     )
     list_filter = ("is_verified", "identification_type", "created_at")
-    search_fields = ("user__email", "identification_number", "phone_number")
+    search_fields = ("user__email",)
+    list_select_related = ("user",)
+    autocomplete_fields = ("user",)
     readonly_fields = ("created_at", "updated_at")
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # is_verified viaja en el token del prestador: invalidar sus tokens
+        update_user_claims(obj.user_id)
+
 
 # Configuración para las solicitudes de prestador
-class ProviderRequestAdmin(admin.ModelAdmin):
+class ProviderRequestAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("user", "status", "created_at", "updated_at", "reviewed_by")
     list_filter = ("status", "created_at")
-    search_fields = ("user__email", "request_reason", "admin_response")
+    search_fields = ("user__email",)
+    list_select_related = ("user", "reviewed_by")
+    autocomplete_fields = ("user", "reviewed_by", "leased_by")
     readonly_fields = ("created_at", "updated_at")
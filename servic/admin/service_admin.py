@@ -0,0 +1,81 @@
+from django.contrib import admin
+from ..models import ServiceCategory, Service, ServiceImage
+from ..cache import CATEGORY_LIST_CACHE, invalidate_namespace
+from ..read_models import delete_services, images_changed, refresh_listings, rename_category
+from .base import FastChangeListMixin
+
+
+# Configuración para las categorías de servicio
+class ServiceCategoryAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ("name", "active_service_count", "created_at", "updated_at")
+    search_fields = ("name",)
+    readonly_fields = ("active_service_count", "created_at", "updated_at")
+
+    def save_model(self, request, obj, form, change):
+        # El admin ya guarda dentro de una transacción
+        super().save_model(request, obj, form, change)
+        rename_category(obj)
+        invalidate_namespace(CATEGORY_LIST_CACHE)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_namespace(CATEGORY_LIST_CACHE)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidate_namespace(CATEGORY_LIST_CACHE)
+
+
+# Imágenes editables dentro del servicio
+class ServiceImageInline(admin.TabularInline):
+    model = ServiceImage
+    extra = 0
+    readonly_fields = ("created_at",)
+
+
+# Configuración para los servicios
+class ServiceAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ("title", "provider", "category", "price", "city", "status", "created_at")
+    list_filter = ("status", "price_type", "category")
+    search_fields = ("provider__email",)
+    list_select_related = ("provider", "category")
+    autocomplete_fields = ("provider", "category")
+    readonly_fields = ("created_at", "updated_at")
+    inlines = [ServiceImageInline]
+
+    def save_related(self, request, form, formsets, change):
+        # Después de guardar las imágenes: el listado público muestra la principal
+        super().save_related(request, form, formsets, change)
+        refresh_listings([form.instance.id])
+
+    # Los borrados descuentan los servicios activos de active_service_count
+    def delete_model(self, request, obj):
+        delete_services(Service.objects.filter(id=obj.id))
+
+    def delete_queryset(self, request, queryset):
+        delete_services(queryset)
+
+
+# Configuración para las imágenes de servicio
+class ServiceImageAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ("service", "image", "is_primary", "created_at")
+    list_filter = ("is_primary",)
+    search_fields = ("service__provider__email",)
+    # __str__ del servicio muestra el email del prestador
+    list_select_related = ("service__provider",)
+    raw_id_fields = ("service",)
+    readonly_fields = ("created_at",)
+
+    # La imagen puede cambiar la principal de su servicio (o pasar a otro servicio)
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        images_changed({obj.service_id, form.initial.get("service", obj.service_id)})
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        images_changed([obj.service_id])
+
+    def delete_queryset(self, request, queryset):
+        service_ids = set(queryset.values_list("service_id", flat=True))
+        super().delete_queryset(request, queryset)
+        images_changed(service_ids)
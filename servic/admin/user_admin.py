@@ -1,10 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from ..authentication import update_user_claims
 from ..models import User
+from ..read_models import rename_provider
+from .base import FastChangeListMixin
 
 
 # Configuración personalizada para el modelo User
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(FastChangeListMixin, UserAdmin):
     list_display = (
         "email",
         "username",
@@ -15,7 +18,7 @@ class CustomUserAdmin(UserAdmin):
         "is_active",
     )
     list_filter = ("user_type", "is_staff", "is_active")
-    search_fields = ("email", "username", "first_name", "last_name")
+    search_fields = ("email", "username")
     ordering = ("email",)
     fieldsets = (
         (None, {"fields": ("email", "password")}),
@@ -44,3 +47,12 @@ class CustomUserAdmin(UserAdmin):
             },
         ),
     )
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Los cambios hechos desde el admin también invalidan los tokens del usuario
+        if change:
+            update_user_claims(obj.pk)
+        # El admin guarda dentro de una transacción: el listado público cambia con ella
+        if change and {"first_name", "last_name"} & set(form.changed_data):
+            rename_provider(obj)
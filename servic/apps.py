@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ServicConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'servic'
+
+    def ready(self):
+        # Métricas de conexiones a la base de datos (ver AdminMetricsView)
+        from . import db_pool, read_models
+
+        db_pool.install()
+        # Todo borrado de servicios, también en cascada, ajusta los contadores de categorías
+        read_models.install()
@@ -0,0 +1,122 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import F
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+# Claims de permisos que CustomTokenObtainPairSerializer agrega al token
+TOKEN_VERSION_CLAIM = "token_version"
+
+# Versión guardada para usuarios inactivos o eliminados: ningún token coincide con ella
+REVOKED_TOKEN_VERSION = -1
+
+
+def _token_version_cache_key(user_id):
+    return f"user-token-version:{user_id}"
+
+
+def get_token_version(user_id):
+    """
+    Devuelve la versión vigente de los claims del usuario. Se lee de la cache y solo
+    ante un miss se consulta la base de datos (una columna, sin cargar el usuario).
+    """
+    key = _token_version_cache_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Siempre de la base principal: una réplica atrasada dejaría en cache una versión vieja
+        row = (
+            User.objects.using(router.db_for_write(User))
+            .filter(pk=user_id)
+            .values_list("token_version", "is_active")
+            .first()
+        )
+        if row is None or not row[1]:
+            version = REVOKED_TOKEN_VERSION
+        else:
+            version = row[0]
+        cache.set(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def update_user_claims(user_id, **fields):
+    """
+    Actualiza campos del usuario que viajan como claims en el JWT (user_type,
+    is_profile_complete, ...) e incrementa token_version en el mismo UPDATE.
+    Los tokens emitidos antes del cambio dejan de ser válidos y el cliente debe
+    pedir nuevos tokens.
+    """
+    User.objects.filter(pk=user_id).update(
+        token_version=F("token_version") + 1, **fields
+    )
+    # La cache se limpia recién cuando la transacción confirma, para que ningún
+    # proceso vuelva a cachear la versión vieja mientras el cambio no es visible
+    transaction.on_commit(lambda: cache.delete(_token_version_cache_key(user_id)))
+
+
+class ClaimsUser(TokenUser):
+    """
+    Usuario liviano construido solo con los claims del token, sin consultar la base
+    de datos. Expone los mismos atributos que usan los permisos y serializers.
+    """
+
+    @cached_property
+    def id(self):
+        # SimpleJWT guarda el id como string; lo convertimos para poder compararlo con los *_id
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def user_type(self):
+        return self.token.get("user_type")
+
+    @cached_property
+    def is_profile_complete(self):
+        return self.token.get("is_profile_complete", False)
+
+    @cached_property
+    def is_verified(self):
+        # None significa que el usuario todavía no tiene perfil de prestador
+        return self.token.get("is_verified")
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Autenticación JWT que no carga el User en cada petición: arma un ClaimsUser con
+    los claims del token y solo verifica que token_version siga vigente.
+    """
+
+    def authenticate(self, request):
+        # Si ServiceProviderMiddleware ya autenticó esta petición, se reutiliza su resultado
+        django_request = getattr(request, "_request", request)
+        result = getattr(django_request, "_claims_authentication", None)
+        if result is None:
+            result = super().authenticate(request)
+            django_request._claims_authentication = result
+        return result
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            raise InvalidToken(
+                _("El token no contiene los permisos del usuario. Inicie sesión nuevamente.")
+            )
+
+        if validated_token[TOKEN_VERSION_CLAIM] != get_token_version(user.id):
+            raise AuthenticationFailed(
+                _("Los permisos del usuario cambiaron. Solicite un nuevo token."),
+                code="token_outdated",
+            )
+
+        return user
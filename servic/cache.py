@@ -0,0 +1,329 @@
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .metrics import register_collector
+
+# XFetch: con beta = 1 el recálculo anticipado empieza, en promedio, un tiempo de
+# cálculo antes del vencimiento. Valores mayores adelantan más el recálculo.
+XFETCH_BETA = 1.0
+# Cada cuánto se vuelve a mirar la cache mientras otro proceso calcula un valor que no existe
+LOCK_POLL_INTERVAL = 0.05
+
+# Espacios de claves que se invalidan con invalidate_namespace()
+CATEGORY_LIST_CACHE = "category-list"
+SERVICE_FRAGMENT_CACHE = "service-fragment"
+
+_lock = threading.Lock()
+_counters = Counter()
+
+
+def count_event(event, amount=1):
+    with _lock:
+        _counters[event] += amount
+
+
+def cache_stats():
+    """
+    Resultados de la cache en este proceso (cached_value y fragmentos de listas):
+      - fresh: se sirvió un valor vigente
+      - stale: se sirvió un valor vencido (dentro de la gracia) mientras otro lo recalcula
+      - early: un valor vigente se recalculó antes de tiempo (XFetch)
+      - computed: se calculó el valor (miss, vencido o anticipado)
+      - waited / wait_timeout: un miss esperó a que otro proceso terminara el cálculo
+      - fragment_hits / fragment_misses: filas de FragmentCacheListSerializer
+    """
+    with _lock:
+        return dict(_counters)
+
+
+register_collector("cache", cache_stats)
+
+
+def namespace_key(namespace, *parts):
+    """
+    Clave dentro de un espacio de nombres versionado: invalidate_namespace() cambia la
+    versión y todas las claves anteriores dejan de usarse (vencen solas por su timeout).
+    """
+    # Versión inicial según la hora: si la cache perdió la clave, no se reusan versiones viejas
+    version = cache.get_or_set(f"ns:{namespace}", lambda: int(time.time()), None)
+    return ":".join(str(part) for part in (namespace, version, *parts))
+
+
+def invalidate_namespace(namespace):
+    """Invalida todas las claves del espacio cuando la transacción actual confirma."""
+
+    def bump():
+        try:
+            cache.incr(f"ns:{namespace}")
+        except ValueError:
+            # La versión no estaba en cache: la próxima lectura crea una nueva
+            pass
+
+    transaction.on_commit(bump)
+
+
+def _should_recompute(expires_at, delta):
+    # XFetch (Vattani et al.): cada lector decide al azar si recalcula antes del
+    # vencimiento, con más probabilidad cuanto más cerca está y cuanto más caro es el
+    # cálculo. Los procesos no vencen todos en el mismo instante.
+    return time.time() - delta * XFETCH_BETA * math.log(1.0 - random.random()) >= expires_at
+
+
+def cached_value(key, compute, timeout, grace=None):
+    """
+    Devuelve el valor de `key` o lo calcula con `compute()` y lo guarda por `timeout`
+    segundos, con protección contra estampidas:
+      - single-flight: solo el proceso que obtiene el lock de la clave (cache.add, en la
+        cache compartida) recalcula;
+      - stale-while-revalidate: los demás sirven el valor vencido durante `grace`
+        segundos (CACHE_STALE_GRACE) en lugar de ir todos a la base de datos;
+      - vencimiento anticipado probabilístico (XFetch).
+    Con timeout <= 0 no se usa la cache.
+
+    Con la cache local en memoria (sin REDIS_URL) el lock es por proceso.
+    """
+    if timeout <= 0:
+        return compute()
+    grace = settings.CACHE_STALE_GRACE if grace is None else grace
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires_at, delta = entry
+        if not _should_recompute(expires_at, delta):
+            count_event("fresh")
+            return value
+        token = _acquire(key)
+        if token is None:
+            # Otro proceso ya lo está recalculando
+            count_event("stale" if time.time() >= expires_at else "fresh")
+            return value
+        if time.time() < expires_at:
+            count_event("early")
+        return _compute_and_store(key, compute, timeout, grace, token)
+
+    token = _acquire(key)
+    if token is not None:
+        return _compute_and_store(key, compute, timeout, grace, token)
+
+    # Miss sin valor vencido que servir: se espera a que el otro proceso termine
+    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            count_event("waited")
+            return entry[0]
+    # El proceso con el lock no terminó a tiempo (o murió): se calcula sin esperar más
+    count_event("wait_timeout")
+    return _compute_and_store(key, compute, timeout, grace)
+
+
+def _lock_key(key):
+    return f"lock:{key}"
+
+
+def _acquire(key):
+    """Token del lock de la clave, o None si otro proceso lo tiene."""
+    token = uuid.uuid4().hex
+    if cache.add(_lock_key(key), token, settings.CACHE_LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def _compute_and_store(key, compute, timeout, grace, token=None):
+    start = time.perf_counter()
+    try:
+        value = compute()
+        delta = time.perf_counter() - start
+        count_event("computed")
+        # Se guarda hasta el fin de la gracia; el vencimiento "lógico" va en la entrada
+        cache.set(key, (value, time.time() + timeout, delta), timeout + grace)
+        return value
+    finally:
+        # Se libera solo si el lock sigue siendo nuestro (pudo vencer durante el cálculo)
+        if token and cache.get(_lock_key(key)) == token:
+            cache.delete(_lock_key(key))
+
+
+class TwoTierCache:
+    """
+    Cache en dos niveles para objetos muy leídos:
+      - L1: LRU en memoria del proceso, acotado por `maxsize` entradas y `l1_timeout`
+        segundos. Un hit no sale del proceso.
+      - L2: la cache de Django (compartida con Redis), por `l2_timeout` segundos.
+
+    invalidate(ids) borra de L2 y del L1 propio, y anota los ids en un log de
+    invalidaciones de la cache compartida (un contador más una entrada por invalidación).
+    Cada proceso revisa ese log cada `sync_interval` segundos y saca de su L1 los ids
+    anotados: un cambio deja de servirse en todos los nodos en, a lo sumo, ese intervalo.
+    Si el proceso se atrasó más de lo que guarda el log, vacía su L1.
+
+    Cada clave tiene además una generación en la cache compartida, que invalidate()
+    cambia. Un valor de L2 se guarda junto con la generación leída antes de calcularlo
+    y solo se usa mientras siga siendo la vigente. Si la generación cambió durante el
+    cálculo, el valor puede ser anterior al cambio y no se guarda en ningún nivel.
+    """
+
+    # Segundos que se conserva cada entrada del log de invalidaciones
+    LOG_TIMEOUT = 300
+
+    def __init__(self, name, maxsize, l1_timeout, l2_timeout, sync_interval):
+        self.name = name
+        self.maxsize = maxsize
+        self.l1_timeout = l1_timeout
+        self.l2_timeout = l2_timeout
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # id -> (valor, vence)
+        self._counters = Counter()
+        # Cambia con cada invalidación que llega a este proceso (ver get)
+        self._epoch = 0
+        self._seen_seq = None
+        self._next_sync = 0.0
+
+    def _key(self, key):
+        return f"{self.name}:{key}"
+
+    def _generation_key(self, key):
+        return f"{self.name}:generation:{key}"
+
+    def _seq_key(self):
+        return f"{self.name}:invalidations"
+
+    def get(self, key, compute):
+        """Valor de `key` desde L1, L2 o `compute()` (que puede lanzar, ej: Http404)."""
+        self._sync()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self._counters["l1_hits"] += 1
+                return entry[0]
+            epoch = self._epoch
+
+        # Valor y generación en un solo viaje a la cache compartida
+        value_key, generation_key = self._key(key), self._generation_key(key)
+        found = cache.get_many([value_key, generation_key])
+        generation = found.get(generation_key)
+        entry = found.get(value_key)
+        if entry is not None and entry[0] == generation:
+            self._count("l2_hits")
+            value = entry[1]
+        else:
+            self._count("misses")
+            value = compute()
+            if cache.get(generation_key) != generation:
+                # Se invalidó mientras se calculaba
+                self._count("refused")
+                return value
+            cache.set(value_key, (generation, value), self.l2_timeout)
+        self._store(key, value, epoch)
+        return value
+
+    def _store(self, key, value, epoch):
+        with self._lock:
+            if epoch != self._epoch:
+                # Llegó una invalidación después de leer L2: el valor puede ser viejo
+                return
+            self._entries[key] = (value, time.monotonic() + self.l1_timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _count(self, event, amount=1):
+        with self._lock:
+            self._counters[event] += amount
+
+    def _evict(self, keys):
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._counters["invalidations"] += 1
+
+    def _sync(self):
+        now = time.monotonic()
+        with self._lock:
+            # Un solo hilo del proceso revisa el log por intervalo
+            if now < self._next_sync:
+                return
+            self._next_sync = now + self.sync_interval
+        seq = cache.get(self._seq_key(), 0)
+        with self._lock:
+            seen, self._seen_seq = self._seen_seq, seq
+        if seen is None or seq <= seen:
+            # Primera revisión del proceso (L1 vacío) o nada nuevo
+            return
+        log_keys = [f"{self._seq_key()}:{number}" for number in range(seen + 1, seq + 1)]
+        entries = cache.get_many(log_keys) if len(log_keys) <= 100 else {}
+        if len(entries) < len(log_keys):
+            # Entradas vencidas o demasiadas: no se sabe qué cambió
+            with self._lock:
+                self._epoch += 1
+                self._counters["invalidations"] += len(self._entries)
+                self._entries.clear()
+            return
+        self._evict(key for keys in entries.values() for key in keys)
+
+    def invalidate(self, keys):
+        """Invalida las claves en todos los procesos cuando la transacción actual confirma."""
+        keys = list(keys)
+        if not keys:
+            return
+
+        def broadcast():
+            # La generación dura lo mismo que los valores de L2: ninguno escrito con la
+            # anterior puede sobrevivirla
+            generation = uuid.uuid4().hex
+            cache.set_many({self._generation_key(key): generation for key in keys}, self.l2_timeout)
+            cache.delete_many([self._key(key) for key in keys])
+            self._evict(keys)
+            cache.add(self._seq_key(), 0, None)
+            try:
+                seq = cache.incr(self._seq_key())
+            except ValueError:
+                # La cache perdió el contador entre add e incr: los demás L1 vencen solos
+                return
+            cache.set(f"{self._seq_key()}:{seq}", keys, self.LOG_TIMEOUT)
+
+        transaction.on_commit(broadcast)
+
+    def clear(self):
+        """Vacía el L1 de este proceso (L2 queda igual)."""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "l1_hits": self._counters["l1_hits"],
+                "l2_hits": self._counters["l2_hits"],
+                "misses": self._counters["misses"],
+                "refused": self._counters["refused"],
+                "evictions": self._counters["evictions"],
+                "invalidations": self._counters["invalidations"],
+            }
+
+
+# Detalle de servicios (ServiceDetailView): payload serializado con URLs relativas
+service_detail_cache = TwoTierCache(
+    "service-detail",
+    maxsize=settings.SERVICE_DETAIL_L1_SIZE,
+    l1_timeout=settings.SERVICE_DETAIL_L1_TIMEOUT,
+    l2_timeout=settings.SERVICE_DETAIL_CACHE_TIMEOUT,
+    sync_interval=settings.SERVICE_DETAIL_L1_SYNC_INTERVAL,
+)
+register_collector("service_detail_cache", service_detail_cache.stats)
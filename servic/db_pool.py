@@ -0,0 +1,64 @@
+import threading
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import register_collector
+
+# Contadores para el modo de conexiones persistentes (sin pool): cuántas conexiones
+# nuevas se abrieron frente a cuántas peticiones se atendieron
+_lock = threading.Lock()
+_connections_opened = {}
+_requests_started = 0
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    with _lock:
+        _connections_opened[connection.alias] = (
+            _connections_opened.get(connection.alias, 0) + 1
+        )
+
+
+def _on_request_started(sender, **kwargs):
+    global _requests_started
+    with _lock:
+        _requests_started += 1
+
+
+def _pool_for(alias):
+    # Solo se consulta un pool ya creado; leer connection.pool lo crearía
+    return getattr(connections[alias], "_connection_pools", {}).get(alias)
+
+
+def database_connection_stats():
+    """
+    Estado de las conexiones por alias. Con pool (psycopg3) se devuelven sus estadísticas:
+    tamaño, disponibles, checkouts (requests_num), en espera y tiempo de espera acumulado.
+    Con conexiones persistentes, cuántas se abrieron en total.
+    """
+    stats = {}
+    with _lock:
+        requests_started = _requests_started
+        opened = dict(_connections_opened)
+
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        pool_options = settings_dict.get("OPTIONS", {}).get("pool")
+        if pool_options:
+            pool = _pool_for(alias)
+            stats[alias] = {"mode": "pool", **(pool.get_stats() if pool else {})}
+        else:
+            stats[alias] = {
+                "mode": "persistent" if settings_dict.get("CONN_MAX_AGE") else "per_request",
+                "conn_max_age": settings_dict.get("CONN_MAX_AGE"),
+                "health_checks": settings_dict.get("CONN_HEALTH_CHECKS", False),
+                "connections_opened": opened.get(alias, 0),
+            }
+    return {"requests_started": requests_started, "databases": stats}
+
+
+def install():
+    connection_created.connect(_on_connection_created, dispatch_uid="servic-db-pool")
+    request_started.connect(_on_request_started, dispatch_uid="servic-db-pool")
+    register_collector("database_connections", database_connection_stats)
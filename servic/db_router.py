@@ -0,0 +1,35 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Lo activa ReadReplicaMiddleware solo para lecturas seguras de las rutas permitidas.
+# Fuera de una petición (comandos, shell, tareas) todo va a la base principal.
+read_from_replicas = ContextVar("read_from_replicas", default=False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Envía las escrituras a la base principal ("default") y, cuando la petición lo
+    permite, las lecturas a alguna de las réplicas de DATABASE_REPLICAS.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or not read_from_replicas.get():
+            return DEFAULT_DB_ALIAS
+        # Dentro de una transacción se lee de la principal para ver lo que se acaba de escribir
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las réplicas tienen los mismos datos que la principal
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas reciben el esquema por replicación
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,71 @@
+import django_filters
+from django.db.models import Q
+from django.db.models.functions import Lower
+from .gazetteer import place_index
+from .models import Service, ServiceListing
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
+class ChoiceInFilter(django_filters.BaseInFilter, django_filters.ChoiceFilter):
+    pass
+
+
+class ServiceFilter(django_filters.FilterSet):
+    """
+    Filtros del listado de servicios. Cada valor se valida antes de llegar a la consulta
+    (un precio inválido responde 400) y cada filtro se traduce en un predicado que
+    aprovecha los índices de Service:
+      - ?min_price=&max_price=      -> price BETWEEN, índice (status, price)
+      - ?category__in=1,2           -> category_id IN, índice (status, category, -created_at)
+      - ?price_type__in=fixed,hourly -> price_type IN
+      - ?city= / ?state= / ?country= -> city_ref_id IN (...) si el nombre está en el
+        gazetteer, con los índices (city_ref|state_ref|country_ref, status, ...), más las
+        filas sin referencia cuyo texto coincide; fuera del gazetteer, solo
+        LOWER(city) = 'lima' con los índices funcionales (status, lower(city|state), ...)
+      - ?city_id= / ?state_id= / ?country_id= -> los ids de /api/services/facets/
+    """
+
+    min_price = django_filters.NumberFilter(field_name="price", lookup_expr="gte")
+    max_price = django_filters.NumberFilter(field_name="price", lookup_expr="lte")
+    category__in = NumberInFilter(field_name="category_id", lookup_expr="in")
+    price_type__in = ChoiceInFilter(
+        field_name="price_type", lookup_expr="in", choices=Service.PRICE_TYPE_CHOICES
+    )
+    # Sin distinguir mayúsculas ni tildes: "Lima", "lima " y "LIMA" son la misma ciudad
+    city = django_filters.CharFilter(method="filter_place")
+    state = django_filters.CharFilter(method="filter_place")
+    country = django_filters.CharFilter(method="filter_place")
+    city_id = django_filters.NumberFilter(field_name="city_ref_id")
+    state_id = django_filters.NumberFilter(field_name="state_ref_id")
+    country_id = django_filters.NumberFilter(field_name="country_ref_id")
+    # Los días se guardan como texto ("Lunes,Martes"): no hay índice que sirva para esto
+    available_day = django_filters.CharFilter(field_name="available_days", lookup_expr="icontains")
+
+    class Meta:
+        model = Service
+        fields = ["category", "status", "price_type"]
+
+    def filter_place(self, queryset, name, value):
+        # La comparación por texto tiene que usar la misma expresión que el índice:
+        # LOWER("servic_service"."city") o LOWER("servic_servicelisting"."city")
+        queryset = queryset.alias(**{f"{name}_lower": Lower(name)})
+        by_text = Q(**{f"{name}_lower": value.strip().lower()})
+        ids = place_index().ids_for(name, value)
+        if not ids:
+            # Fuera del gazetteer solo queda el texto
+            return queryset.filter(by_text)
+        # Las filas sin referencia (ej: "Lima" en un país que el gazetteer no conoce)
+        # también se comparan por texto
+        return queryset.filter(
+            Q(**{f"{name}_ref_id__in": ids}) | (Q(**{f"{name}_ref__isnull": True}) & by_text)
+        )
+
+
+class ServiceListingFilter(ServiceFilter):
+    """Los mismos filtros sobre el modelo de lectura del listado (ServiceListing)."""
+
+    class Meta(ServiceFilter.Meta):
+        model = ServiceListing
@@ -0,0 +1,169 @@
+import json
+import os
+import unicodedata
+from functools import lru_cache
+
+# Gazetteer offline: países, estados y ciudades con sus coordenadas y nombres alternativos
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.json")
+
+
+def normalize_place(text):
+    """Clave de comparación: sin tildes, sin mayúsculas, sin puntos ni espacios de más."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.replace(".", " ").casefold().split())
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    with open(GAZETTEER_PATH, encoding="utf-8") as file:
+        return json.load(file)["countries"]
+
+
+def sync_places(Country, State, City):
+    """
+    Crea las filas del gazetteer que falten (idempotente). Recibe los modelos para poder
+    usarse desde una migración con los modelos históricos.
+    """
+    for country_data in load_gazetteer():
+        country, _ = Country.objects.get_or_create(
+            code=country_data["code"], defaults={"name": country_data["name"]}
+        )
+        for state_data in country_data["states"]:
+            state, _ = State.objects.get_or_create(country=country, name=state_data["name"])
+            for city_data in state_data["cities"]:
+                City.objects.get_or_create(
+                    state=state,
+                    name=city_data["name"],
+                    defaults={"latitude": city_data["lat"], "longitude": city_data["lng"]},
+                )
+
+
+class PlaceIndex:
+    """
+    Índice en memoria de las tablas de ubicación: nombre normalizado (o alias del
+    gazetteer) -> ids. Las tablas son chicas y casi no cambian, así que resolver un
+    texto no consulta la base de datos.
+    """
+
+    def __init__(self, Country, State, City):
+        aliases = self._gazetteer_aliases()
+        self.countries = {}  # clave -> id
+        self.states = {}  # clave -> [(id, country_id)]
+        self.cities = {}  # clave -> [(id, state_id, country_id)]
+        self.places = {"country": {}, "state": {}, "city": {}}
+
+        codes = {}
+        for pk, code, name in Country.objects.values_list("id", "code", "name"):
+            codes[pk] = code
+            self.places["country"][pk] = {"id": pk, "code": code, "name": name}
+            for key in self._keys(name, code, *aliases.get((code,), ())):
+                self.countries[key] = pk
+
+        state_paths = {}
+        for pk, country_id, name in State.objects.values_list("id", "country_id", "name"):
+            path = (codes[country_id], name)
+            state_paths[pk] = path
+            self.places["state"][pk] = {"id": pk, "name": name, "country_id": country_id}
+            for key in self._keys(name, *aliases.get(path, ())):
+                self.states.setdefault(key, []).append((pk, country_id))
+
+        rows = City.objects.values_list("id", "state_id", "state__country_id", "name", "latitude", "longitude")
+        for pk, state_id, country_id, name, latitude, longitude in rows:
+            self.places["city"][pk] = {
+                "id": pk,
+                "name": name,
+                "state_id": state_id,
+                "latitude": latitude,
+                "longitude": longitude,
+            }
+            for key in self._keys(name, *aliases.get((*state_paths[state_id], name), ())):
+                self.cities.setdefault(key, []).append((pk, state_id, country_id))
+
+    @staticmethod
+    def _keys(*names):
+        # "Bogotá" y su alias "Bogota" dan la misma clave: se cuenta una sola vez
+        return {normalize_place(name) for name in names}
+
+    @staticmethod
+    def _gazetteer_aliases():
+        aliases = {}
+        for country in load_gazetteer():
+            aliases[(country["code"],)] = country.get("aliases", [])
+            for state in country["states"]:
+                state_path = (country["code"], state["name"])
+                aliases[state_path] = state.get("aliases", [])
+                for city in state["cities"]:
+                    aliases[(*state_path, city["name"])] = city.get("aliases", [])
+        return aliases
+
+    def resolve(self, city, state, country):
+        """
+        (country_id, state_id, city_id) para los textos dados; None en el nivel que no
+        se pudo identificar sin ambigüedad. La ciudad, si se identifica, completa su
+        estado y país. Un país o estado escrito pero desconocido deja sin resolver los
+        niveles de abajo: "Cuenca, Castilla-La Mancha, España" no es la Cuenca de Ecuador.
+        """
+        country_key = normalize_place(country)
+        country_id = self.countries.get(country_key)
+        if country_key and country_id is None:
+            return None, None, None
+
+        state_key = normalize_place(state)
+        states = [
+            match
+            for match in self.states.get(state_key, [])
+            if country_id in (None, match[1])
+        ]
+        if state_key and not states:
+            return country_id, None, None
+        state_id = states[0][0] if len(states) == 1 else None
+        if state_id and country_id is None:
+            country_id = states[0][1]
+        # Con un estado ambiguo la ciudad igual tiene que pertenecer a alguno de ellos
+        state_ids = {match[0] for match in states}
+
+        cities = [
+            match
+            for match in self.cities.get(normalize_place(city), [])
+            if (not state_ids or match[1] in state_ids) and country_id in (None, match[2])
+        ]
+        if len(cities) == 1:
+            city_id, state_id, country_id = cities[0]
+        else:
+            city_id = None
+        return country_id, state_id, city_id
+
+    def ids_for(self, level, text):
+        """Ids que corresponden a un nombre en el nivel indicado ("city", "state" o "country")."""
+        key = normalize_place(text)
+        if level == "country":
+            return [self.countries[key]] if key in self.countries else []
+        matches = self.states if level == "state" else self.cities
+        return [match[0] for match in matches.get(key, [])]
+
+
+_place_index = None
+
+
+def place_index():
+    global _place_index
+    if _place_index is None:
+        from .models import City, Country, State
+
+        _place_index = PlaceIndex(Country, State, City)
+    return _place_index
+
+
+def reset_place_index():
+    """Descarta el índice en memoria (por ejemplo, después de cargar lugares nuevos)."""
+    global _place_index
+    _place_index = None
+
+
+def assign_places(instance, index=None):
+    """Completa country_ref, state_ref y city_ref a partir de los textos del objeto."""
+    index = index or place_index()
+    instance.country_ref_id, instance.state_ref_id, instance.city_ref_id = index.resolve(
+        instance.city, instance.state, instance.country
+    )
@@ -0,0 +1,126 @@
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from ...perf.dataset import seed_dataset
+from ...perf.routes import BenchFixtures, build_scenarios, missing_scenarios
+from ...perf.suite import RouteRunner, compare_to_baseline
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de todas las rutas de la API en proceso. Crea una base de pruebas, "
+        "la llena con un dataset reproducible y mide por ruta p50/p95/p99, throughput, "
+        "consultas SQL y memoria pico. Con --baseline falla si alguna ruta empeora."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1, help="Tamaño del dataset (1 = 1.000 usuarios)")
+        parser.add_argument("--seed", type=int, default=42, help="Semilla del dataset")
+        parser.add_argument("--iterations", type=int, default=30, help="Peticiones medidas por ruta")
+        parser.add_argument("--server", choices=["wsgi", "asgi"], default="wsgi")
+        parser.add_argument("--route", action="append", help="Medir solo esta ruta (url_name); repetible")
+        parser.add_argument("--baseline", help="JSON con los resultados de referencia")
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Guarda los resultados en --baseline en lugar de compararlos",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Empeoramiento tolerado de p95 y memoria (default: 0.25 = 25%%)",
+        )
+        parser.add_argument("--output", help="Guarda los resultados de esta corrida en un JSON")
+        parser.add_argument("--keepdb", action="store_true", help="Reutiliza la base de pruebas")
+
+    def handle(self, *args, **options):
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline requiere --baseline")
+
+        verbosity = options["verbosity"]
+        old_config = setup_databases(
+            verbosity=verbosity, interactive=False, keepdb=options["keepdb"]
+        )
+        try:
+            # Los archivos subidos por los escenarios van a un directorio temporal
+            with tempfile.TemporaryDirectory() as media_root, override_settings(
+                MEDIA_ROOT=media_root
+            ):
+                results = self.run_suite(options)
+        finally:
+            teardown_databases(old_config, verbosity=verbosity, keepdb=options["keepdb"])
+
+        if options["output"]:
+            self.write_json(options["output"], results, options)
+
+        failed = [name for name, stats in results.items() if stats["errors"]]
+        if failed:
+            raise CommandError(f"Rutas con respuestas inesperadas: {', '.join(failed)}")
+
+        if options["baseline"]:
+            if options["save_baseline"]:
+                self.write_json(options["baseline"], results, options)
+                self.stdout.write(self.style.SUCCESS(f"Línea base guardada en {options['baseline']}"))
+                return
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)["routes"]
+            regressions = compare_to_baseline(results, baseline, tolerance=options["tolerance"])
+            if regressions:
+                for line in regressions:
+                    self.stderr.write(f"  {line}")
+                raise CommandError(f"{len(regressions)} regresiones respecto de la línea base")
+            self.stdout.write(self.style.SUCCESS("Sin regresiones respecto de la línea base"))
+
+    def run_suite(self, options):
+        counts = seed_dataset(scale=options["scale"], seed=options["seed"])
+        self.stdout.write(
+            "Dataset: " + ", ".join(f"{name}={total}" for name, total in counts.items())
+        )
+
+        fixtures = BenchFixtures()
+        scenarios = build_scenarios(fixtures)
+        missing = missing_scenarios(scenarios)
+        if missing:
+            raise CommandError(f"Rutas sin escenario de benchmark: {', '.join(missing)}")
+        if options["route"]:
+            scenarios = [s for s in scenarios if s.url_name in options["route"]]
+
+        runner = RouteRunner(options["server"])
+        header = (
+            f"{'ruta':<28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'req/s':>8} {'SQL':>5} {'mem KB':>8} {'errores':>8}"
+        )
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        results = {}
+        for scenario in scenarios:
+            stats = runner.run(scenario, options["iterations"])
+            results[scenario.url_name] = stats
+            self.stdout.write(
+                f"{scenario.url_name:<28} {stats['p50_ms']:>8} {stats['p95_ms']:>8} "
+                f"{stats['p99_ms']:>8} {stats['throughput_rps']:>8} {stats['queries']:>5} "
+                f"{stats['peak_kb']:>8} {stats['errors']:>8}"
+            )
+            if stats["first_error"]:
+                self.stderr.write(f"    primera respuesta inesperada: {stats['first_error']}")
+        return results
+
+    def write_json(self, path, results, options):
+        data = {
+            "meta": {
+                "scale": options["scale"],
+                "seed": options["seed"],
+                "iterations": options["iterations"],
+                "server": options["server"],
+            },
+            "routes": {
+                name: {key: value for key, value in stats.items() if key != "first_error"}
+                for name, stats in results.items()
+            },
+        }
+        with open(path, "w") as file:
+            json.dump(data, file, indent=2, sort_keys=True)
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from ...perf.bench import run_asgi, run_wsgi
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara en proceso el throughput de las lecturas públicas servidas por WSGI "
+        "(vistas DRF sync) y por ASGI (vistas async), simulando clientes lentos. "
+        "Usa la base de datos configurada: ejecutarlo contra una base de pruebas."
+    )
+
+    # (ruta sync, ruta async) de cada lectura pública
+    ROUTES = [
+        ("/api/services/", "/api/async/services/"),
+        ("/api/categories/", "/api/async/categories/"),
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Peticiones por corrida")
+        parser.add_argument(
+            "--threads", type=int, default=4, help="Hilos del worker WSGI (default: 4)"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=100,
+            help="Peticiones en vuelo en el worker ASGI (default: 100)",
+        )
+        parser.add_argument(
+            "--client-delay-ms",
+            type=float,
+            default=50,
+            help="Tiempo que tarda el cliente en recibir cada respuesta (default: 50ms)",
+        )
+
+    def handle(self, *args, **options):
+        total = options["requests"]
+        delay = options["client_delay_ms"] / 1000
+
+        header = f"{'servidor':<8} {'ruta':<26} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'errores':>8}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for sync_path, async_path in self.ROUTES:
+            runs = [
+                ("wsgi", sync_path, run_wsgi(sync_path, total, options["threads"], delay)),
+                ("asgi", sync_path, run_asgi(sync_path, total, options["concurrency"], delay)),
+                ("asgi", async_path, run_asgi(async_path, total, options["concurrency"], delay)),
+            ]
+            for server, path, stats in runs:
+                self.stdout.write(
+                    f"{server:<8} {path:<26} {stats['throughput_rps']:>8} "
+                    f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['errors']:>8}"
+                )
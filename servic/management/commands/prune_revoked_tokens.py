@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = "Elimina en lotes los refresh tokens revocados que ya expiraron"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Cantidad de filas a borrar por lote (default: 5000)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        now = timezone.now()
+        total = 0
+
+        # Borrar por lotes de ids mantiene cada DELETE corto y no bloquea la tabla
+        while True:
+            ids = list(
+                RevokedToken.objects.filter(expires_at__lte=now).values_list(
+                    "id", flat=True
+                )[:batch_size]
+            )
+            if not ids:
+                break
+            deleted, _ = RevokedToken.objects.filter(id__in=ids).delete()
+            total += deleted
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Se eliminaron {total} tokens revocados expirados")
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from ...read_models import rebuild_listings
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el listado público (ServiceListing) a partir de los servicios activos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Cantidad de servicios a copiar por lote (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        # Todo en una transacción: las lecturas ven el listado anterior hasta el final
+        total = rebuild_listings(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Listado reconstruido con {total} servicios activos")
+        )
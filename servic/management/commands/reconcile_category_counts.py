@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ...read_models import reconcile_category_counts
+
+
+class Command(BaseCommand):
+    help = "Recalcula active_service_count de cada categoría a partir de los servicios activos"
+
+    def handle(self, *args, **options):
+        stale = reconcile_category_counts()
+        for name, stored, actual in stale:
+            self.stdout.write(f"  {name}: {stored} -> {actual}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Se corrigieron {len(stale)} categorías desfasadas")
+        )
@@ -0,0 +1,92 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ...perf.dataset import BulkCreateWriter, CopyWriter, DatasetGenerator, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos para pruebas de capacidad: usuarios, perfiles de prestador, "
+        "categorías, servicios, imágenes, solicitudes y cambios de rol. La salida es "
+        "determinista para una misma semilla. Escribe en la base configurada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=int,
+            default=10,
+            help=f"Unidades de {DatasetGenerator.USERS_PER_SCALE} usuarios (default: 10)",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Semilla (default: 42)")
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="Filas por lote (default: 5000)"
+        )
+        parser.add_argument(
+            "--method",
+            choices=["auto", "bulk", "copy"],
+            default="auto",
+            help="copy usa COPY de Postgres; auto lo elige si está disponible",
+        )
+        parser.add_argument(
+            "--noinput",
+            "--no-input",
+            action="store_false",
+            dest="interactive",
+            help="No pedir confirmación",
+        )
+
+    def handle(self, *args, **options):
+        writer = self.get_writer(options["method"])
+        users = options["scale"] * DatasetGenerator.USERS_PER_SCALE
+        database = connection.settings_dict["NAME"]
+
+        if options["interactive"]:
+            answer = input(
+                f"Se insertarán ~{users} usuarios y sus datos en la base '{database}'. "
+                "Escriba 'si' para continuar: "
+            )
+            if answer.strip().lower() not in ("si", "sí", "yes"):
+                raise CommandError("Cancelado.")
+
+        self.stdout.write(f"Generando con {writer.name} (seed={options['seed']}, scale={options['scale']})")
+        self.written = 0
+        self.last_report = self.start = time.perf_counter()
+
+        def progress(model, rows):
+            self.written += rows
+            now = time.perf_counter()
+            if now - self.last_report >= 5:
+                self.last_report = now
+                self.stdout.write(
+                    f"  {self.written} filas ({self.written / (now - self.start):,.0f} filas/s)"
+                )
+
+        counts = seed_dataset(
+            scale=options["scale"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            writer=writer,
+            progress=progress,
+        )
+        elapsed = time.perf_counter() - self.start
+
+        total = sum(counts.values())
+        for name, rows in counts.items():
+            self.stdout.write(f"  {name:<26} {rows:>10}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total} filas en {elapsed:.1f}s ({total / elapsed:,.0f} filas/s)"
+            )
+        )
+
+    def get_writer(self, method):
+        if method == "bulk":
+            return BulkCreateWriter()
+        if CopyWriter.available():
+            return CopyWriter()
+        if method == "copy":
+            raise CommandError("COPY requiere PostgreSQL con psycopg3")
+        return BulkCreateWriter()
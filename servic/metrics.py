@@ -0,0 +1,121 @@
+import threading
+from bisect import bisect_left
+
+# Registro de métricas del proceso. Cada componente registra una función que devuelve
+# un diccionario con sus valores actuales; AdminMetricsView los expone juntos.
+
+_collectors = {}
+
+
+def register_collector(name, collect):
+    _collectors[name] = collect
+
+
+def collect_all():
+    return {name: collect() for name, collect in _collectors.items()}
+
+
+# ---------------------------
+# MÉTRICAS POR ENDPOINT
+# ---------------------------
+# Las alimenta RequestMetricsMiddleware y se exponen en formato Prometheus.
+
+# Límites (segundos) del histograma de latencia
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class EndpointStats:
+    def __init__(self):
+        # Un contador por bucket más el de +Inf; se acumulan recién al exportar
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.requests = 0
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.response_bytes = 0
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, url_name, method, status_code, duration, queries, sql_seconds, response_bytes):
+        key = (url_name, method, status_code)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = EndpointStats()
+            stats.latency_buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+            stats.latency_sum += duration
+            stats.requests += 1
+            stats.queries += queries
+            stats.sql_seconds += sql_seconds
+            stats.response_bytes += response_bytes
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: (list(stats.latency_buckets), stats.latency_sum, stats.requests,
+                      stats.queries, stats.sql_seconds, stats.response_bytes)
+                for key, stats in self._stats.items()
+            }
+
+
+endpoint_metrics = EndpointMetrics()
+
+
+def _labels(**labels):
+    inner = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels.items()
+    )
+    return "{" + inner + "}"
+
+
+def _flatten(prefix, value):
+    # Convierte los diccionarios de los collectors en pares (nombre, número)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(f"{prefix}_{key}", item)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+
+def render_prometheus():
+    """Texto en el formato de exposición de Prometheus (versión 0.0.4)."""
+    lines = []
+    snapshot = endpoint_metrics.snapshot()
+
+    lines += [
+        "# HELP servic_request_duration_seconds Latencia de las peticiones por endpoint.",
+        "# TYPE servic_request_duration_seconds histogram",
+    ]
+    for (url_name, method, status_code), (buckets, latency_sum, requests, *_rest) in sorted(snapshot.items()):
+        base = dict(url_name=url_name, method=method, status=status_code)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+            cumulative += count
+            lines.append(
+                f"servic_request_duration_seconds_bucket{_labels(**base, le=bound)} {cumulative}"
+            )
+        lines.append(f"servic_request_duration_seconds_sum{_labels(**base)} {latency_sum}")
+        lines.append(f"servic_request_duration_seconds_count{_labels(**base)} {requests}")
+
+    counters = (
+        (3, "servic_request_sql_queries_total", "Consultas SQL ejecutadas por endpoint."),
+        (4, "servic_request_sql_seconds_total", "Tiempo en consultas SQL por endpoint."),
+        (5, "servic_response_bytes_total", "Bytes de respuesta por endpoint."),
+    )
+    for index, name, help_text in counters:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (url_name, method, status_code), values in sorted(snapshot.items()):
+            labels = _labels(url_name=url_name, method=method, status=status_code)
+            lines.append(f"{name}{labels} {values[index]}")
+
+    # Los collectors registrados (pool de hashing, conexiones, ...) se exportan como gauges
+    for name, value in collect_all().items():
+        for metric, number in _flatten(f"servic_{name}", value):
+            lines += [f"# TYPE {metric} gauge", f"{metric} {number}"]
+
+    return "\n".join(lines) + "\n"
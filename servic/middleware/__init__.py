@@ -1,3 +1,13 @@
+from .metrics_middleware import RequestMetricsMiddleware
+from .profiling_middleware import ProfilingMiddleware
 from .provider_middleware import ServiceProviderMiddleware
+from .query_guard_middleware import QueryGuardMiddleware
+from .replica_middleware import ReadReplicaMiddleware
 
-__all__ = ["ServiceProviderMiddleware"]
+__all__ = [
+    "RequestMetricsMiddleware",
+    "ProfilingMiddleware",
+    "ServiceProviderMiddleware",
+    "ReadReplicaMiddleware",
+    "QueryGuardMiddleware",
+]
@@ -0,0 +1,34 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+class SyncAsyncMiddleware:
+    """
+    Base de los middlewares del proyecto: funcionan igual con WSGI y con ASGI.
+
+    Django les pasa un get_response del mismo modo que el servidor. Con ASGI, __call__
+    delega en __acall__ y la petición sigue en el event loop. Sin esto, Django
+    envolvería cada middleware síncrono con sync_to_async y cada petición saltaría a
+    un hilo y volvería por cada middleware de la cadena.
+
+    Las subclases empiezan su __call__ con:
+        if self.async_mode:
+            return self.__acall__(request)
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            # Django decide si la instancia es asíncrona mirando la función
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
@@ -0,0 +1,82 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from ..metrics import endpoint_metrics
+from .base import SyncAsyncMiddleware
+
+
+class QueryRecorder:
+    """execute_wrapper que cuenta las consultas de la petición y el tiempo que tardan."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class RequestMetricsMiddleware(SyncAsyncMiddleware):
+    """
+    Registra por url_name la latencia, la cantidad de consultas SQL, el tiempo en SQL y el
+    tamaño de la respuesta. Solo se mide una fracción de las peticiones
+    (REQUEST_METRICS_SAMPLE_RATE) para mantener bajo el costo en producción.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        return self.record(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        # Las conexiones son por contexto, no por hilo: las consultas que la vista corre
+        # con sync_to_async pasan por el mismo execute_wrapper
+        with self.recording(recorder):
+            response = await self.get_response(request)
+        return self.record(request, response, recorder, time.perf_counter() - start)
+
+    @staticmethod
+    def sampled():
+        sample_rate = settings.REQUEST_METRICS_SAMPLE_RATE
+        return sample_rate >= 1 or (sample_rate > 0 and random.random() < sample_rate)
+
+    @staticmethod
+    def recording(recorder):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        return stack
+
+    def record(self, request, response, recorder, duration):
+        match = request.resolver_match
+        endpoint_metrics.record(
+            url_name=(match.url_name if match else None) or "unmatched",
+            method=request.method,
+            status_code=response.status_code,
+            duration=duration,
+            queries=recorder.count,
+            sql_seconds=recorder.seconds,
+            response_bytes=0 if response.streaming else len(response.content),
+        )
+        return response
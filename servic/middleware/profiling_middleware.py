@@ -0,0 +1,109 @@
+import itertools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+
+from ..authentication import ClaimsJWTAuthentication
+from ..profiling import StackSampler, profiling, save_report, write_flamegraph
+from .base import SyncAsyncMiddleware
+
+# Header que pide el profiling: "X-Profile: cprofile" o "X-Profile: sampler"
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_MODES = ("cprofile", "sampler")
+
+
+class ProfilingMiddleware(SyncAsyncMiddleware):
+    """
+    Profiling a pedido: si un usuario staff envía el header X-Profile, la petición se
+    ejecuta con cProfile (o el sampler estadístico) y tracemalloc. El reporte se guarda
+    y su id vuelve en el header X-Profile-Id (ver /api/admin/profiles/<id>/).
+    Sin el header no agrega ningún costo.
+
+    Con PROFILING_SAMPLE_EVERY = N (> 0), además, 1 de cada N peticiones se ejecuta con
+    el sampler y sus stacks se guardan en PROFILING_FLAMEGRAPH_DIR.
+
+    Con ASGI se perfila el hilo del event loop mientras la petición está en vuelo: no
+    incluye lo que corre en los hilos de sync_to_async (consultas, serializers síncronos)
+    y sí, mezclado, lo de otras peticiones atendidas en ese tiempo.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.authenticator = ClaimsJWTAuthentication()
+        self.sample_every = settings.PROFILING_SAMPLE_EVERY
+        self.counter = itertools.count(1)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        mode = request.META.get(PROFILE_HEADER)
+        if mode is not None and self.is_staff(request):
+            with profiling(self.profile_mode(mode)) as report:
+                response = self.get_response(request)
+            return self.attach_report(request, response, report)
+
+        if self.sampled():
+            with StackSampler(settings.PROFILING_SAMPLER_INTERVAL) as sampler:
+                response = self.get_response(request)
+            write_flamegraph(self.url_name(request), sampler.collapsed())
+            return response
+
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        mode = request.META.get(PROFILE_HEADER)
+        if mode is not None and await self.ais_staff(request):
+            with profiling(self.profile_mode(mode)) as report:
+                response = await self.get_response(request)
+            return self.attach_report(request, response, report)
+
+        if self.sampled():
+            with StackSampler(settings.PROFILING_SAMPLER_INTERVAL) as sampler:
+                response = await self.get_response(request)
+            await sync_to_async(write_flamegraph)(self.url_name(request), sampler.collapsed())
+            return response
+
+        return await self.get_response(request)
+
+    def sampled(self):
+        return bool(self.sample_every) and next(self.counter) % self.sample_every == 0
+
+    @staticmethod
+    def profile_mode(mode):
+        return mode if mode in PROFILE_MODES else "cprofile"
+
+    @staticmethod
+    def url_name(request):
+        match = request.resolver_match
+        return match.url_name if match else None
+
+    def is_staff(self, request):
+        # Sesión del admin de Django o JWT (el claim is_staff viaja en el token)
+        if request.user.is_authenticated:
+            return request.user.is_staff
+        return self.has_staff_token(request)
+
+    async def ais_staff(self, request):
+        user = await request.auser()
+        if user.is_authenticated:
+            return user.is_staff
+        # Ante un miss de la cache, la versión del token se lee de la base
+        return await sync_to_async(self.has_staff_token)(request)
+
+    def has_staff_token(self, request):
+        try:
+            result = self.authenticator.authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return result is not None and result[0].is_staff
+
+    def attach_report(self, request, response, report):
+        report.update(
+            method=request.method,
+            path=request.get_full_path(),
+            url_name=self.url_name(request),
+            status=response.status_code,
+        )
+        response["X-Profile-Id"] = save_report(report)
+        return response
@@ -1,65 +1,105 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ImproperlyConfigured
 from django.http import JsonResponse
+from django.urls import get_resolver
 from rest_framework import status
-from django.urls import resolve
+from rest_framework.exceptions import AuthenticationFailed
 
+from ..authentication import ClaimsJWTAuthentication
+from ..provider_context import get_provider_context
+from .base import SyncAsyncMiddleware
 
-class ServiceProviderMiddleware:
+# Requisitos por url_name:
+#   "provider": solo requiere ser prestador (sin perfil completo)
+#   "verified_provider": prestador con perfil creado, verificado y completo
+ROUTE_POLICIES = {
+    "provider-profile": "provider",
+    "service-create": "verified_provider",
+    "service-image-upload": "verified_provider",
+    # Agregar más URLs que requieran verificación de prestador
+}
+
+
+class ServiceProviderMiddleware(SyncAsyncMiddleware):
     def __init__(self, get_response):
-        self.get_response = get_response
+        super().__init__(get_response)
+        # La tabla de políticas se arma una sola vez al iniciar el servidor
+        self.route_policies = self.build_route_policies()
+        self.authenticator = ClaimsJWTAuthentication()
+        if self.async_mode:
+            self.process_view = self.aprocess_view
 
-    def __call__(self, request):
-        # Lista de URLs que requieren verificación de prestador
-        provider_required_urls = [
-            # "provider-profile",
-            "service-create",
-            "service-image-upload",
-            # Agregar más URLs que requieran verificación de prestador
-        ]
+    @staticmethod
+    def build_route_policies():
+        known_names = set(get_resolver().reverse_dict.keys())
+        unknown = [name for name in ROUTE_POLICIES if name not in known_names]
+        if unknown:
+            raise ImproperlyConfigured(
+                f"ROUTE_POLICIES referencia URLs que no existen: {', '.join(unknown)}"
+            )
+        return dict(ROUTE_POLICIES)
 
-        # URLs que requieren solo ser provider (sin perfil completo)
-        provider_basic_urls = [
-            "provider-profile",  # ← MOVER AQUÍ - solo requiere ser provider
-        ]
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        # Con ASGI, solo las rutas con política pasan a un hilo (pueden consultar la base)
+        match = request.resolver_match
+        if match is None or match.url_name not in self.route_policies:
+            request.route_policy = None
+            return None
+        return await sync_to_async(ServiceProviderMiddleware.process_view)(
+            self, request, view_func, view_args, view_kwargs
+        )
 
-        # Obtener la URL actual
-        current_url = resolve(request.path_info).url_name
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Django ya resolvió la URL antes de llamar a process_view: se reutiliza
+        # request.resolver_match en lugar de volver a llamar a resolve()
+        match = request.resolver_match
+        requirement = self.route_policies.get(match.url_name) if match else None
+        request.route_policy = requirement
+        if requirement is None:
+            return None
 
-        # Verificar si la URL actual requiere verificación de prestador
-        if current_url in provider_required_urls:
-            # Verificar si el usuario está autenticado
-            if not request.user.is_authenticated:
+        # El JWT lo procesa DRF dentro de la vista; aquí autenticamos con los claims del token
+        # (sin consultar la base de datos) y DRF reutiliza este resultado después
+        if not request.user.is_authenticated:
+            try:
+                result = self.authenticator.authenticate(request)
+            except AuthenticationFailed as exc:
+                detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+                return JsonResponse(detail, status=exc.status_code)
+            if result is None:
                 return JsonResponse(
                     {"detail": "Se requiere autenticación"},
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
+            request.user = result[0]
 
-            # Verificar si el usuario es un prestador
-            if request.user.user_type != "provider":
-                return JsonResponse(
-                    {
-                        "detail": "Solo los prestadores de servicios pueden acceder a esta funcionalidad"
-                    },
-                    status=status.HTTP_403_FORBIDDEN,
-                )
+        context = get_provider_context(request)
+
+        # Verificar si el usuario es un prestador
+        if not context.is_provider:
+            return JsonResponse(
+                {
+                    "detail": "Solo los prestadores de servicios pueden acceder a esta funcionalidad"
+                },
+                status=status.HTTP_403_FORBIDDEN,
+            )
 
-        # Verificación completa para funcionalidades avanzadas
-        elif current_url in provider_required_urls:
-            if not request.user.is_authenticated:
+        if requirement == "verified_provider":
+            if not context.has_profile:
                 return JsonResponse(
-                    {"detail": "Se requiere autenticación"},
-                    status=status.HTTP_401_UNAUTHORIZED,
+                    {"detail": "No se encontró un perfil de prestador"},
+                    status=status.HTTP_404_NOT_FOUND,
                 )
 
-            if request.user.user_type != "provider":
+            # Verificar si el prestador está verificado
+            if not context.is_verified:
                 return JsonResponse(
-                    {
-                        "detail": "Solo los prestadores de servicios pueden acceder a esta funcionalidad"
-                    },
+                    {"detail": "Su perfil de prestador está pendiente de verificación"},
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
             # Verificar si el prestador tiene un perfil completo
-            if not request.user.is_profile_complete:
+            if not context.is_profile_complete:
                 return JsonResponse(
                     {
                         "detail": "Debe completar su perfil de prestador antes de acceder a esta funcionalidad"
@@ -67,20 +107,4 @@ class ServiceProviderMiddleware:
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
-            # Verificar si el prestador está verificado
-            try:
-                if not request.user.provider_profile.is_verified:
-                    return JsonResponse(
-                        {
-                            "detail": "Su perfil de prestador está pendiente de verificación"
-                        },
-                        status=status.HTTP_403_FORBIDDEN,
-                    )
-            except:
-                return JsonResponse(
-                    {"detail": "No se encontró un perfil de prestador"},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-
-        response = self.get_response(request)
-        return response
+        return None
@@ -0,0 +1,202 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, connections, transaction
+from django.http import JsonResponse
+from django.urls import get_resolver
+from rest_framework import status
+
+from ..sql import normalize_sql
+from .base import SyncAsyncMiddleware
+
+slow_query_logger = logging.getLogger("servic.slow_queries")
+
+# SQLSTATE de Postgres para "canceling statement due to statement timeout"
+QUERY_CANCELED = "57014"
+
+
+def is_statement_timeout(exc):
+    cause = exc.__cause__
+    # psycopg3 expone sqlstate; psycopg2, pgcode
+    code = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+    return code == QUERY_CANCELED
+
+
+class QueryGuard:
+    """
+    execute_wrapper de una petición:
+      - aplica el statement_timeout del endpoint en cada conexión Postgres que usa (y lo
+        restablece al terminar la petición), y
+      - manda al log de consultas lentas las que superan SLOW_QUERY_THRESHOLD_MS, con
+        EXPLAIN en una fracción de los casos (SLOW_QUERY_EXPLAIN_SAMPLE_RATE).
+    """
+
+    def __init__(self, request):
+        self.request = request
+        # Timeout aplicado en cada conexión usada por la petición
+        self.applied = {}
+        # SET emitidos dentro de una transacción que todavía no confirmó: conexión -> marcador
+        self.pending = {}
+        # True mientras se ejecutan las consultas propias (SET, EXPLAIN)
+        self.internal = False
+
+    @property
+    def url_name(self):
+        match = self.request.resolver_match
+        return (match.url_name if match else None) or "unmatched"
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.internal:
+            return execute(sql, params, many, context)
+        connection = context["connection"]
+        if connection.vendor == "postgresql":
+            timeout_ms = settings.STATEMENT_TIMEOUTS.get(
+                self.url_name, settings.DEFAULT_STATEMENT_TIMEOUT_MS
+            )
+            if not self.is_applied(connection, timeout_ms):
+                self.apply(connection, timeout_ms)
+
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            self.log_slow_query(connection, sql, params, many, duration_ms)
+        return result
+
+    def apply(self, connection, timeout_ms):
+        self.run_internal(connection, "SET statement_timeout = %s", [timeout_ms])
+        self.applied[connection] = timeout_ms
+        self.pending.pop(connection, None)
+        if connection.in_atomic_block:
+            # Un ROLLBACK (o ROLLBACK TO SAVEPOINT) deshace el SET. Django descarta los
+            # on_commit de lo que se revierte: el marcador dice si el SET sigue vigente
+            def committed():
+                if self.pending.get(connection) is committed:
+                    del self.pending[connection]
+
+            self.pending[connection] = committed
+            transaction.on_commit(committed, using=connection.alias)
+
+    def is_applied(self, connection, timeout_ms):
+        if self.applied.get(connection, 0) != timeout_ms:
+            return False
+        marker = self.pending.get(connection)
+        if marker is None or any(entry[1] is marker for entry in connection.run_on_commit):
+            return True
+        # Se revirtió la transacción del SET: la conexión volvió a un valor que no se conoce
+        del self.pending[connection]
+        self.applied[connection] = None
+        return False
+
+    def log_slow_query(self, connection, sql, params, many, duration_ms):
+        plan = None
+        if (
+            not many
+            and sql.lstrip()[:6].upper() == "SELECT"
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+        ):
+            plan = self.explain(connection, sql, params)
+        slow_query_logger.warning(
+            "Consulta lenta en %s (%.1f ms): %s%s",
+            self.url_name,
+            duration_ms,
+            normalize_sql(sql),
+            f"\n{plan}" if plan else "",
+            extra={
+                "url_name": self.url_name,
+                "duration_ms": round(duration_ms, 1),
+                "database": connection.alias,
+            },
+        )
+
+    def run_internal(self, connection, sql, params=None):
+        self.internal = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall() if cursor.description else None
+        finally:
+            self.internal = False
+
+    def explain(self, connection, sql, params):
+        # Solo EXPLAIN (sin ANALYZE): no vuelve a ejecutar la consulta lenta
+        try:
+            rows = self.run_internal(connection, f"{connection.ops.explain_query_prefix()} {sql}", params)
+        except DatabaseError:
+            return None
+        return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+    def reset(self):
+        for connection, timeout_ms in self.applied.items():
+            # Sin timeout, conexión cerrada o transacción fallida: no hay nada que restablecer.
+            # None (un SET revertido) se restablece igual: no se sabe qué valor quedó
+            if timeout_ms == 0 or connection.connection is None or connection.needs_rollback:
+                continue
+            try:
+                self.run_internal(connection, "RESET statement_timeout")
+            except DatabaseError:
+                # Mejor descartarla que devolverla al pool con el timeout de este endpoint
+                connection.close()
+
+
+class QueryGuardMiddleware(SyncAsyncMiddleware):
+    """
+    Presupuesto de tiempo por consulta según el endpoint (STATEMENT_TIMEOUTS, por
+    url_name) y log de consultas lentas. Una consulta cancelada por el timeout responde
+    503 con Retry-After en lugar de retener la conexión y agotar el pool.
+
+    Se usa SET/RESET por conexión y no SET LOCAL: las lecturas corren en autocommit
+    (y pueden ir a una réplica), donde SET LOCAL no tiene efecto fuera de una transacción.
+    Un SET emitido dentro de una transacción que después se revierte se vuelve a emitir
+    en la siguiente consulta.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        known_names = set(get_resolver().reverse_dict.keys())
+        unknown = [name for name in settings.STATEMENT_TIMEOUTS if name not in known_names]
+        if unknown:
+            raise ImproperlyConfigured(
+                f"STATEMENT_TIMEOUTS referencia URLs que no existen: {', '.join(unknown)}"
+            )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        guard = QueryGuard(request)
+        with self.guarding(guard):
+            try:
+                return self.get_response(request)
+            finally:
+                guard.reset()
+
+    async def __acall__(self, request):
+        guard = QueryGuard(request)
+        with self.guarding(guard):
+            try:
+                return await self.get_response(request)
+            finally:
+                # RESET es una consulta: fuera del event loop, y solo si se aplicó un timeout
+                if guard.applied:
+                    await sync_to_async(guard.reset)()
+
+    @staticmethod
+    def guarding(guard):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(guard))
+        return stack
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, DatabaseError) and is_statement_timeout(exception):
+            return JsonResponse(
+                {"detail": "La consulta tardó demasiado. Intente nuevamente en unos segundos."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(settings.STATEMENT_TIMEOUT_RETRY_AFTER)},
+            )
+        return None
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import get_resolver
+
+from ..db_router import read_from_replicas
+from .base import SyncAsyncMiddleware
+
+# Rutas de solo lectura que toleran el retraso de replicación (url_name)
+REPLICA_READ_ROUTES = {
+    "service-list",
+    "service-facets",
+    "service-detail",
+    "service-category-list",
+    "service-category-detail",
+    "async-service-list",
+    "async-service-detail",
+    "async-service-category-list",
+    "admin-dashboard",
+}
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Cookie que fija las lecturas del cliente a la base principal tras una escritura
+PRIMARY_PIN_COOKIE = "primary_pin"
+
+
+class ReadReplicaMiddleware(SyncAsyncMiddleware):
+    """
+    Decide por petición si las lecturas pueden ir a una réplica (ver PrimaryReplicaRouter).
+    Después de una escritura el cliente recibe la cookie PRIMARY_PIN_COOKIE y, mientras
+    dure (READ_YOUR_WRITES_SECONDS), sus lecturas van a la principal: así ve sus propios
+    cambios aunque la réplica todavía no los tenga.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        known_names = set(get_resolver().reverse_dict.keys())
+        unknown = [name for name in REPLICA_READ_ROUTES if name not in known_names]
+        if unknown:
+            raise ImproperlyConfigured(
+                f"REPLICA_READ_ROUTES referencia URLs que no existen: {', '.join(unknown)}"
+            )
+        if self.async_mode:
+            # Django ejecuta en un hilo los process_view síncronos: este no consulta
+            # nada, así que con ASGI se queda en el event loop
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = read_from_replicas.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_from_replicas.reset(token)
+        return self.pin_after_write(request, response)
+
+    async def __acall__(self, request):
+        token = read_from_replicas.set(False)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_from_replicas.reset(token)
+        return self.pin_after_write(request, response)
+
+    def pin_after_write(self, request, response):
+        if request.method not in SAFE_METHODS and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                "1",
+                max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if (
+            request.method in SAFE_METHODS
+            and match is not None
+            and match.url_name in REPLICA_READ_ROUTES
+            and PRIMARY_PIN_COOKIE not in request.COOKIES
+        ):
+            read_from_replicas.set(True)
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return ReadReplicaMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servic', '0006_servicecategory_service_serviceimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='providerrequest',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='providerrequest',
+            name='leased_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leased_requests', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
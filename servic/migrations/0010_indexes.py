@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:10
+
+from django.db import migrations, models
+
+from servic.db_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede correr dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('servic', '0009_revokedtoken'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='providerrequest',
+            index=models.Index(fields=['status', '-created_at'], name='provreq_status_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='providerrequest',
+            index=models.Index(fields=['-created_at'], name='provreq_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='service',
+            index=models.Index(fields=['status', '-created_at'], name='service_status_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='service',
+            index=models.Index(fields=['status', 'category', '-created_at'], name='service_status_cat_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='service',
+            index=models.Index(fields=['status', 'city', '-created_at'], name='service_status_city_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='service',
+            index=models.Index(fields=['status', 'price'], name='service_status_price_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='service',
+            index=models.Index(fields=['-created_at'], name='service_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='serviceproviderprofile',
+            index=models.Index(fields=['identification_number'], name='profile_ident_number_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='serviceproviderprofile',
+            index=models.Index(fields=['is_verified', '-created_at'], name='profile_verified_created_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:11
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def reject_duplicate_pending(apps, schema_editor):
+    """
+    Antes de crear la restricción: si un usuario tiene varias solicitudes pendientes
+    (envíos simultáneos), se conserva la más antigua y las demás quedan rechazadas.
+    """
+    ProviderRequest = apps.get_model("servic", "ProviderRequest")
+    pending = ProviderRequest.objects.filter(status="pending")
+    duplicated_users = (
+        pending.values("user_id").annotate(total=Count("id")).filter(total__gt=1).values("user_id")
+    )
+    for user_id in duplicated_users.values_list("user_id", flat=True):
+        keep_id = pending.filter(user_id=user_id).order_by("created_at", "id").values_list("id", flat=True)[0]
+        pending.filter(user_id=user_id).exclude(id=keep_id).update(
+            status="rejected", admin_response="Solicitud duplicada"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servic', '0010_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(reject_duplicate_pending, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='providerrequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('user',), name='provreq_one_pending_per_user'),
+        ),
+    ]
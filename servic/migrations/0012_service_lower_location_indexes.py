@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:12
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+from servic.db_operations import AddIndexConcurrently, RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY no pueden correr dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('servic', '0011_providerrequest_one_pending'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='service',
+            index=models.Index(models.F('status'), django.db.models.functions.text.Lower('city'), models.OrderBy(models.F('created_at'), descending=True), name='service_status_city_lower_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='service',
+            index=models.Index(models.F('status'), django.db.models.functions.text.Lower('state'), models.OrderBy(models.F('created_at'), descending=True), name='service_status_state_lower_idx'),
+        ),
+        # Primero se crean los nuevos, así las consultas nunca quedan sin índice
+        RemoveIndexConcurrently(
+            model_name='service',
+            name='service_status_city_idx',
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servic', '0012_service_lower_location_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='City',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('latitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('longitude', models.DecimalField(decimal_places=6, max_digits=9)),
+            ],
+            options={
+                'verbose_name': 'Ciudad',
+                'verbose_name_plural': 'Ciudades',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Country',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('code', models.CharField(max_length=2, unique=True)),
+                ('name', models.CharField(max_length=100)),
+            ],
+            options={
+                'verbose_name': 'País',
+                'verbose_name_plural': 'Países',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='city_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='servic.city'),
+        ),
+        migrations.AddField(
+            model_name='serviceproviderprofile',
+            name='city_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='servic.city'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='country_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='servic.country'),
+        ),
+        migrations.AddField(
+            model_name='serviceproviderprofile',
+            name='country_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='servic.country'),
+        ),
+        migrations.CreateModel(
+            name='State',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('country', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='states', to='servic.country')),
+            ],
+            options={
+                'verbose_name': 'Estado/Provincia',
+                'verbose_name_plural': 'Estados/Provincias',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='state',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cities', to='servic.state'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='state_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='servic.state'),
+        ),
+        migrations.AddField(
+            model_name='serviceproviderprofile',
+            name='state_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='servic.state'),
+        ),
+        migrations.AddConstraint(
+            model_name='state',
+            constraint=models.UniqueConstraint(fields=('country', 'name'), name='state_unique_per_country'),
+        ),
+        migrations.AddConstraint(
+            model_name='city',
+            constraint=models.UniqueConstraint(fields=('state', 'name'), name='city_unique_per_state'),
+        ),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:16
+
+import json
+import os
+import unicodedata
+
+from django.db import migrations
+
+# Copia congelada de la lógica de servic.gazetteer al momento de esta migración: el
+# módulo puede cambiar después y la migración tiene que seguir dando el mismo resultado.
+GAZETTEER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "gazetteer.json"
+)
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.replace(".", " ").casefold().split())
+
+
+def keys(data):
+    return {normalize(name) for name in (data["name"], *data.get("aliases", ()))}
+
+
+def load_places(Country, State, City):
+    """
+    Crea las filas del gazetteer que falten y devuelve los índices por nombre normalizado:
+    countries {clave: id}, states {clave: [(id, country_id)]},
+    cities {clave: [(id, state_id, country_id)]}.
+    """
+    with open(GAZETTEER_PATH, encoding="utf-8") as file:
+        gazetteer = json.load(file)["countries"]
+
+    countries, states, cities = {}, {}, {}
+    for country_data in gazetteer:
+        country, _ = Country.objects.get_or_create(
+            code=country_data["code"], defaults={"name": country_data["name"]}
+        )
+        for key in keys(country_data) | {normalize(country_data["code"])}:
+            countries[key] = country.pk
+        for state_data in country_data["states"]:
+            state, _ = State.objects.get_or_create(country=country, name=state_data["name"])
+            for key in keys(state_data):
+                states.setdefault(key, []).append((state.pk, country.pk))
+            for city_data in state_data["cities"]:
+                city, _ = City.objects.get_or_create(
+                    state=state,
+                    name=city_data["name"],
+                    defaults={"latitude": city_data["lat"], "longitude": city_data["lng"]},
+                )
+                for key in keys(city_data):
+                    cities.setdefault(key, []).append((city.pk, state.pk, country.pk))
+    return countries, states, cities
+
+
+def resolve(index, city, state, country):
+    """(country_id, state_id, city_id); un país o estado desconocido no se resuelve."""
+    countries, states, cities = index
+    country_key = normalize(country)
+    country_id = countries.get(country_key)
+    if country_key and country_id is None:
+        return None, None, None
+
+    state_key = normalize(state)
+    state_matches = [match for match in states.get(state_key, []) if country_id in (None, match[1])]
+    if state_key and not state_matches:
+        return country_id, None, None
+    state_id = state_matches[0][0] if len(state_matches) == 1 else None
+    if state_id and country_id is None:
+        country_id = state_matches[0][1]
+    state_ids = {match[0] for match in state_matches}
+
+    city_matches = [
+        match
+        for match in cities.get(normalize(city), [])
+        if (not state_ids or match[1] in state_ids) and country_id in (None, match[2])
+    ]
+    if len(city_matches) == 1:
+        return city_matches[0][2], city_matches[0][1], city_matches[0][0]
+    return country_id, state_id, None
+
+
+def backfill_locations(apps, schema_editor):
+    """
+    Carga el gazetteer en las tablas de ubicación y completa las referencias de los
+    servicios y perfiles existentes. Se actualiza una vez por combinación distinta de
+    (city, state, country), no fila por fila.
+    """
+    index = load_places(
+        apps.get_model("servic", "Country"),
+        apps.get_model("servic", "State"),
+        apps.get_model("servic", "City"),
+    )
+
+    for model_name in ("Service", "ServiceProviderProfile"):
+        model = apps.get_model("servic", model_name)
+        combinations = model.objects.order_by().values_list("city", "state", "country").distinct()
+        for city, state, country in combinations.iterator():
+            country_id, state_id, city_id = resolve(index, city, state, country)
+            if country_id or state_id or city_id:
+                model.objects.filter(city=city, state=state, country=country).update(
+                    country_ref_id=country_id, state_ref_id=state_id, city_ref_id=city_id
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servic', '0013_locations'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_locations, migrations.RunPython.noop),
+    ]
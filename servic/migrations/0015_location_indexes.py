@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:15
+
+from django.db import migrations, models
+
+from servic.db_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY no puede correr dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('servic', '0014_backfill_locations'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='service',
+            index=models.Index(fields=['city_ref', 'status', '-created_at'], name='service_city_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='service',
+            index=models.Index(fields=['state_ref', 'status', '-created_at'], name='service_state_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='service',
+            index=models.Index(fields=['country_ref', 'status'], name='service_country_status_idx'),
+        ),
+    ]
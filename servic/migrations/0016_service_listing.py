@@ -0,0 +1,100 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:20
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+# Columnas que se copian tal cual de Service (copia congelada de servic.read_models)
+COPIED_FIELDS = (
+    "title",
+    "description",
+    "category_id",
+    "provider_id",
+    "price",
+    "price_type",
+    "location",
+    "city",
+    "state",
+    "country",
+    "available_days",
+    "status",
+    "created_at",
+    "country_ref_id",
+    "state_ref_id",
+    "city_ref_id",
+)
+
+
+def populate_listings(apps, schema_editor):
+    """Copia los servicios activos existentes al nuevo listado público."""
+    Service = apps.get_model("servic", "Service")
+    ServiceImage = apps.get_model("servic", "ServiceImage")
+    ServiceListing = apps.get_model("servic", "ServiceListing")
+
+    active = Service.objects.filter(status="active").select_related("category", "provider").order_by("id")
+    last_id = 0
+    while True:
+        services = list(active.filter(id__gt=last_id)[:1000])
+        if not services:
+            break
+        # La primera imagen principal según el orden del modelo (-is_primary, -created_at)
+        images = {}
+        rows = ServiceImage.objects.filter(
+            service_id__in=[service.id for service in services], is_primary=True
+        ).order_by("-is_primary", "-created_at")
+        for image in rows:
+            images.setdefault(image.service_id, image.image.url if image.image else None)
+        ServiceListing.objects.bulk_create(
+            ServiceListing(
+                service_id=service.id,
+                category_name=service.category.name,
+                provider_name=f"{service.provider.first_name} {service.provider.last_name}",
+                primary_image=images.get(service.id),
+                **{name: getattr(service, name) for name in COPIED_FIELDS},
+            )
+            for service in services
+        )
+        last_id = services[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servic', '0015_location_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceListing',
+            fields=[
+                ('service', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing', serialize=False, to='servic.service')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('category_name', models.CharField(max_length=100)),
+                ('provider_name', models.CharField(max_length=301)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('price_type', models.CharField(choices=[('hourly', 'Por Hora'), ('fixed', 'Precio Fijo'), ('negotiable', 'Negociable')], max_length=10)),
+                ('location', models.CharField(max_length=200)),
+                ('city', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=100)),
+                ('country', models.CharField(max_length=100)),
+                ('available_days', models.CharField(max_length=100)),
+                ('primary_image', models.CharField(blank=True, max_length=300, null=True)),
+                ('status', models.CharField(choices=[('active', 'Activo'), ('inactive', 'Inactivo'), ('pending', 'Pendiente')], default='active', max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='servic.servicecategory')),
+                ('city_ref', models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='servic.city')),
+                ('country_ref', models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='servic.country')),
+                ('provider', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('state_ref', models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='servic.state')),
+            ],
+            options={
+                'verbose_name': 'Servicio publicado',
+                'verbose_name_plural': 'Servicios publicados',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='listing_created_idx'), models.Index(fields=['category', '-created_at'], name='listing_category_created_idx'), models.Index(fields=['price'], name='listing_price_idx'), models.Index(fields=['city_ref', '-created_at'], name='listing_city_created_idx'), models.Index(fields=['state_ref', '-created_at'], name='listing_state_created_idx'), models.Index(fields=['country_ref'], name='listing_country_idx'), models.Index(fields=['provider'], name='listing_provider_idx'), models.Index(django.db.models.functions.text.Lower('city'), models.OrderBy(models.F('created_at'), descending=True), name='listing_city_lower_idx'), models.Index(django.db.models.functions.text.Lower('state'), models.OrderBy(models.F('created_at'), descending=True), name='listing_state_lower_idx')],
+            },
+        ),
+        migrations.RunPython(populate_listings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:22
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_active_services(apps, schema_editor):
+    """Inicializa el contador con los servicios activos de cada categoría (un solo UPDATE)."""
+    Service = apps.get_model("servic", "Service")
+    ServiceCategory = apps.get_model("servic", "ServiceCategory")
+    ServiceCategory.objects.update(
+        active_service_count=Coalesce(
+            Subquery(
+                Service.objects.filter(category_id=OuterRef("id"), status="active")
+                .order_by()
+                .values("category_id")
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servic', '0016_service_listing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicecategory',
+            name='active_service_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_active_services, migrations.RunPython.noop),
+    ]
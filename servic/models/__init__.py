@@ -7,9 +7,12 @@ Así, cuando haces from .models import User, Python sabe buscar en los archivos
 '''
 
 
+from .location import Country, State, City
 from .user import User, UserRoleChangeLog
 from .provider import ServiceProviderProfile, ProviderRequest
 from .service import ServiceCategory, Service, ServiceImage
+from .token import RevokedToken
+from .listing import ServiceListing
 
 __all__ = [
     "User",
@@ -19,4 +22,9 @@ __all__ = [
     "ServiceCategory",
     "Service",
     "ServiceImage",
+    "ServiceListing",
+    "RevokedToken",
+    "Country",
+    "State",
+    "City",
 ]
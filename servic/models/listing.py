@@ -0,0 +1,58 @@
+from django.db import models
+from django.db.models.functions import Lower
+from .location import PlaceRefs
+from .service import Service, ServiceCategory
+from .user import User
+
+
+class ServiceListing(PlaceRefs):
+    '''
+     Modelo de lectura (CQRS) del listado público de servicios: una fila por servicio
+    activo con los datos que muestra ServiceListSerializer ya unidos y formateados
+    (nombre de categoría, nombre del prestador, URL de la imagen principal), más las
+    columnas por las que se filtra y busca. El listado se resuelve con una sola tabla.
+     Lo mantienen las escrituras de servicios, imágenes, categorías y prestadores dentro
+    de su misma transacción (servic/read_models.py); `rebuild_service_listings` lo rehace.
+    '''
+
+    service = models.OneToOneField(
+        Service, on_delete=models.CASCADE, primary_key=True, related_name="listing"
+    )
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    category = models.ForeignKey(ServiceCategory, on_delete=models.CASCADE, related_name="+")
+    category_name = models.CharField(max_length=100)
+    provider = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_index=False, related_name="+"
+    )
+    provider_name = models.CharField(max_length=301)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    price_type = models.CharField(max_length=10, choices=Service.PRICE_TYPE_CHOICES)
+    location = models.CharField(max_length=200)
+    city = models.CharField(max_length=100)
+    state = models.CharField(max_length=100)
+    country = models.CharField(max_length=100)
+    available_days = models.CharField(max_length=100)
+    primary_image = models.CharField(max_length=300, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=Service.STATUS_CHOICES, default="active")
+    created_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Servicio publicado"
+        verbose_name_plural = "Servicios publicados"
+        ordering = ["-created_at"]
+        # Solo hay servicios activos: los índices de Service sin la columna status
+        indexes = [
+            models.Index(fields=["-created_at"], name="listing_created_idx"),
+            models.Index(fields=["category", "-created_at"], name="listing_category_created_idx"),
+            models.Index(fields=["price"], name="listing_price_idx"),
+            models.Index(fields=["city_ref", "-created_at"], name="listing_city_created_idx"),
+            models.Index(fields=["state_ref", "-created_at"], name="listing_state_created_idx"),
+            models.Index(fields=["country_ref"], name="listing_country_idx"),
+            models.Index(fields=["provider"], name="listing_provider_idx"),
+            models.Index(Lower("city"), models.F("created_at").desc(), name="listing_city_lower_idx"),
+            models.Index(Lower("state"), models.F("created_at").desc(), name="listing_state_lower_idx"),
+        ]
+
+    def __str__(self):
+        return self.title
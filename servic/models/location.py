@@ -0,0 +1,92 @@
+from django.db import models
+from ..gazetteer import assign_places
+
+'''
+ Tablas de ubicación normalizadas (se cargan desde el gazetteer incluido en
+servic/data/gazetteer.json). Service y ServiceProviderProfile guardan, además del texto
+que escribió el usuario, la referencia a estas filas: los filtros y los conteos por
+ubicación trabajan sobre enteros chicos y "Lima", "lima " y "LIMA" son la misma ciudad.
+'''
+
+
+class Country(models.Model):
+    # Ids chicos: las columnas *_ref de Service y sus índices ocupan menos
+    id = models.SmallAutoField(primary_key=True)
+    code = models.CharField(max_length=2, unique=True)  # ISO 3166-1 alfa-2
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        verbose_name = "País"
+        verbose_name_plural = "Países"
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class State(models.Model):
+    id = models.SmallAutoField(primary_key=True)
+    country = models.ForeignKey(Country, on_delete=models.CASCADE, related_name="states")
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        verbose_name = "Estado/Provincia"
+        verbose_name_plural = "Estados/Provincias"
+        ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(fields=["country", "name"], name="state_unique_per_country"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class City(models.Model):
+    id = models.AutoField(primary_key=True)
+    state = models.ForeignKey(State, on_delete=models.CASCADE, related_name="cities")
+    name = models.CharField(max_length=100)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+
+    class Meta:
+        verbose_name = "Ciudad"
+        verbose_name_plural = "Ciudades"
+        ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(fields=["state", "name"], name="city_unique_per_state"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class PlaceRefs(models.Model):
+    '''
+     Base abstracta para los modelos con city, state y country en texto: agrega las
+    referencias normalizadas y las completa en cada save() (ver servic/gazetteer.py).
+    Si el texto no está en el gazetteer, la referencia queda en NULL.
+    '''
+
+    country_ref = models.ForeignKey(
+        Country, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        db_index=False, related_name="+",
+    )
+    state_ref = models.ForeignKey(
+        State, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        db_index=False, related_name="+",
+    )
+    city_ref = models.ForeignKey(
+        City, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        db_index=False, related_name="+",
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"city", "state", "country"} & set(update_fields):
+            assign_places(self)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "country_ref", "state_ref", "city_ref"}
+        super().save(*args, **kwargs)
@@ -1,13 +1,14 @@
 from django.db import models
+from .location import PlaceRefs
 from .user import User
 '''
-  ServiceProviderProfile hereda de models.Model toda la funcionalidad de crear, leer, actualizar
+  ServiceProviderProfile hereda de models.Model (a través de PlaceRefs) toda la funcionalidad de crear, leer, actualizar
  y borrar registros de la base de datos.
   Permite definir los campos(columnas) de la tabla usando atributos como Charfield, OnteToOneField, etc
  Usar el ORM de Django para consultas y operaciones '''
 
 
-class ServiceProviderProfile(models.Model):
+class ServiceProviderProfile(PlaceRefs):
     '''
      User es como una "foreign key" especial: garantiza que no haya dos perfiles para el mismo usuario.
      OneToOneField crea una relación uno a uno entre ServiceProviderProfile y User.
@@ -62,6 +63,12 @@ class ServiceProviderProfile(models.Model):
     class Meta:
         verbose_name = "Perfil de Prestador"
         verbose_name_plural = "Perfiles de Prestadores"
+        indexes = [
+            # Validación de documento duplicado al crear el perfil
+            models.Index(fields=["identification_number"], name="profile_ident_number_idx"),
+            # Listado del admin (filtro is_verified, orden por fecha)
+            models.Index(fields=["is_verified", "-created_at"], name="profile_verified_created_idx"),
+        ]
 
 
 class ProviderRequest(models.Model):
@@ -87,11 +94,37 @@ class ProviderRequest(models.Model):
     reviewed_by = models.ForeignKey(
         User, on_delete=models.SET_NULL, null=True, related_name="reviewed_requests"
     )
+    # Reserva temporal (lease) de la solicitud: mientras no expire, solo el admin
+    # que la reclamó puede revisarla. Así varios admins trabajan la cola sin pisarse.
+    leased_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="leased_requests",
+    )
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name = "Solicitud de Prestador"
         verbose_name_plural = "Solicitudes de Prestadores"
         ordering = ["-created_at"]
+        indexes = [
+            # Listado del admin, con y sin filtro de estado.
+            # La cola de revisión (pendientes por orden de llegada) recorre este mismo
+            # índice hacia atrás
+            models.Index(fields=["status", "-created_at"], name="provreq_status_created_idx"),
+            models.Index(fields=["-created_at"], name="provreq_created_idx"),
+        ]
+        constraints = [
+            # Una sola solicitud pendiente por usuario. Es un índice único parcial: solo
+            # contiene las pendientes y también resuelve "¿ya tiene una pendiente?"
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=models.Q(status="pending"),
+                name="provreq_one_pending_per_user",
+            ),
+        ]
 
     def __str__(self):
         return f"Solicitud de {self.user.email} - {self.get_status_display()}"
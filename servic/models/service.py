@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.functions import Lower
+from .location import PlaceRefs
 from .user import User
 
 
@@ -6,6 +8,9 @@ class ServiceCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField()
     icon = models.ImageField(upload_to="category_icons/", null=True, blank=True)
+    # Servicios activos de la categoría. Contador desnormalizado: lo mantienen las
+    # escrituras de servicios con UPDATE ... + 1 / - 1 (servic/read_models.py)
+    active_service_count = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -18,7 +23,7 @@ class ServiceCategory(models.Model):
         return self.name
 
 
-class Service(models.Model):
+class Service(PlaceRefs):
     STATUS_CHOICES = (
         ("active", "Activo"),
         ("inactive", "Inactivo"),
@@ -66,6 +71,35 @@ class Service(models.Model):
         verbose_name = "Servicio"
         verbose_name_plural = "Servicios"
         ordering = ["-created_at"]
+        # Índices según las consultas de los listados: el público filtra status="active"
+        # (más categoría, ciudad o estado) y ordena por fecha o precio; el admin lista todo por fecha
+        indexes = [
+            models.Index(fields=["status", "-created_at"], name="service_status_created_idx"),
+            models.Index(
+                fields=["status", "category", "-created_at"],
+                name="service_status_cat_created_idx",
+            ),
+            # Ciudad y estado se filtran sin distinguir mayúsculas (ServiceFilter): índices
+            # funcionales sobre LOWER(...), la misma expresión que arma el filtro
+            models.Index(
+                models.F("status"),
+                Lower("city"),
+                models.F("created_at").desc(),
+                name="service_status_city_lower_idx",
+            ),
+            models.Index(
+                models.F("status"),
+                Lower("state"),
+                models.F("created_at").desc(),
+                name="service_status_state_lower_idx",
+            ),
+            models.Index(fields=["status", "price"], name="service_status_price_idx"),
+            models.Index(fields=["-created_at"], name="service_created_idx"),
+            # Filtros y conteos por ubicación normalizada (servic/gazetteer.py)
+            models.Index(fields=["city_ref", "status", "-created_at"], name="service_city_status_idx"),
+            models.Index(fields=["state_ref", "status", "-created_at"], name="service_state_status_idx"),
+            models.Index(fields=["country_ref", "status"], name="service_country_status_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.provider.email}"
@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class RevokedToken(models.Model):
+    '''
+     Lista negra compacta de refresh tokens: solo guarda el jti (identificador único del token)
+    de los tokens ya rotados y hasta cuándo siguen siendo válidos por firma.
+     Una vez que expires_at pasa, el token ya no sirve de todas formas, así que la fila se
+    puede borrar (comando prune_revoked_tokens).
+    '''
+
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Token revocado"
+        verbose_name_plural = "Tokens revocados"
+
+    def __str__(self):
+        return self.jti
@@ -27,6 +27,9 @@ class User(AbstractUser):
     #  null=True permite valores nulos en la base de datos y blank=True permite dejar campo vacio en formularios
     user_type = models.CharField(max_length=10, choices=USER_TYPE_CHOICES, null=True, blank=True)
     is_profile_complete = models.BooleanField(default=False)
+    # Se incrementa cada vez que cambian los datos que viajan como claims en el JWT
+    # (user_type, is_staff, is_profile_complete, is_verified) para invalidar los tokens viejos
+    token_version = models.PositiveIntegerField(default=0)
     
     # AQUI LE DICES A DJANGO QUE EL EMAIL SERA EL IDENTIFICADOR PRINCIPAL PARA EL LOGIN Y AUTENTICACION
     USERNAME_FIELD = 'email'
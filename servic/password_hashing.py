@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .metrics import register_collector
+
+
+class HashPoolOverloaded(Exception):
+    """La cola de hashing está llena: la petición debe responder 503 de inmediato."""
+
+
+class PasswordHashPool:
+    """
+    Pool de hilos de tamaño fijo para hashear contraseñas (PBKDF2) fuera del event loop.
+    Admite como máximo `max_workers` hashes en curso más `max_queue` en espera; por encima
+    de eso rechaza en lugar de encolar, así una ráfaga de logins no deja sin atención al
+    resto de los endpoints ni termina en timeouts.
+    """
+
+    def __init__(self, max_workers, max_queue):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": min(self._pending, self.max_workers),
+                "queue_depth": max(0, self._pending - self.max_workers),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(
+                    self._wait_seconds / self._completed * 1000, 2
+                )
+                if self._completed
+                else 0.0,
+            }
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise HashPoolOverloaded()
+            self._pending += 1
+
+        enqueued_at = time.perf_counter()
+        waited = 0.0
+
+        def task():
+            nonlocal waited
+            waited = time.perf_counter() - enqueued_at
+            return func(*args)
+
+        try:
+            return await asyncio.wrap_future(self._executor.submit(task))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+                self._wait_seconds += waited
+
+
+password_hash_pool = PasswordHashPool(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE
+)
+register_collector("password_hashing", password_hash_pool.stats)
@@ -0,0 +1 @@
+# Herramientas de rendimiento: drivers de benchmark en proceso (WSGI/ASGI)
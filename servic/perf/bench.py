@@ -0,0 +1,166 @@
+import asyncio
+import io
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+
+
+def bench_host():
+    # El primer host concreto de ALLOWED_HOSTS; "localhost" se acepta con DEBUG=True y lista vacía
+    for host in settings.ALLOWED_HOSTS:
+        if host != "*" and not host.startswith("."):
+            return host
+    return "localhost"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(latencies, elapsed, errors):
+    """Resume una corrida: throughput y percentiles de latencia en milisegundos."""
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def _split_path(path):
+    path, _, query_string = path.partition("?")
+    return path, query_string
+
+
+def wsgi_environ(path, method="GET", body=b"", headers=None):
+    path, query_string = _split_path(path)
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": query_string,
+        "SERVER_NAME": bench_host(),
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": bench_host(),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": io.StringIO(),
+        "wsgi.url_scheme": "http",
+        "wsgi.version": (1, 0),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in (headers or {}).items():
+        key = name.upper().replace("-", "_")
+        if key != "CONTENT_TYPE":
+            key = f"HTTP_{key}"
+        environ[key] = value
+    return environ
+
+
+def wsgi_request(handler, path, client_delay=0.0, **kwargs):
+    """Ejecuta una petición por el handler WSGI. Devuelve (status, cuerpo, latencia)."""
+    result = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        result["status"] = int(status.split()[0])
+
+    start = time.perf_counter()
+    response = handler(wsgi_environ(path, **kwargs), start_response)
+    try:
+        body = b"".join(response)
+        if client_delay:
+            # Cliente lento: el hilo del worker queda ocupado mientras se envía la respuesta
+            time.sleep(client_delay)
+    finally:
+        response.close()  # Dispara request_finished (cierra conexiones, etc.)
+    return result["status"], body, time.perf_counter() - start
+
+
+async def asgi_request(handler, path, client_delay=0.0, method="GET", body=b"", headers=None):
+    """Ejecuta una petición por el handler ASGI. Devuelve (status, cuerpo, latencia)."""
+    path, query_string = _split_path(path)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string.encode(),
+        "headers": [(b"host", bench_host().encode())]
+        + [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        "client": ("127.0.0.1", 0),
+        "server": (bench_host(), 80),
+    }
+    finished = asyncio.Event()
+    request_sent = False
+    result = {"body": []}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Django escucha la desconexión mientras procesa: el cliente sigue conectado hasta el final
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            result["body"].append(message.get("body", b""))
+            if not message.get("more_body") and client_delay:
+                # Cliente lento: el event loop sigue atendiendo otras peticiones mientras espera
+                await asyncio.sleep(client_delay)
+
+    start = time.perf_counter()
+    await handler(scope, receive, send)
+    finished.set()
+    return result["status"], b"".join(result["body"]), time.perf_counter() - start
+
+
+def run_wsgi(path, total, threads, client_delay=0.0):
+    """Corre `total` peticiones con `threads` hilos, como un worker WSGI con hilos."""
+    handler = WSGIHandler()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(
+            pool.map(lambda _: wsgi_request(handler, path, client_delay), range(total))
+        )
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for status, _, _ in results if status >= 400)
+    return summarize([latency for _, _, latency in results], elapsed, errors)
+
+
+def run_asgi(path, total, concurrency, client_delay=0.0):
+    """Corre `total` peticiones con hasta `concurrency` en vuelo en un solo event loop."""
+    handler = ASGIHandler()
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                return await asgi_request(handler, path, client_delay)
+
+        return await asyncio.gather(*(one() for _ in range(total)))
+
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for status, _, _ in results if status >= 400)
+    return summarize([latency for _, _, latency in results], elapsed, errors)
@@ -0,0 +1,337 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+
+from ..gazetteer import place_index
+from ..read_models import rebuild_listings, reconcile_category_counts
+from ..models import (
+    ProviderRequest,
+    Service,
+    ServiceCategory,
+    ServiceImage,
+    ServiceProviderProfile,
+    User,
+    UserRoleChangeLog,
+)
+
+# Contraseña de todos los usuarios generados (el hash se calcula una sola vez)
+PERF_PASSWORD = "ClaveSegura123"
+
+# Fecha fija de referencia: con la misma semilla se generan exactamente las mismas filas
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+CATEGORY_NAMES = [
+    "Gasfitería", "Electricidad", "Carpintería", "Pintura", "Limpieza", "Jardinería",
+    "Mudanzas", "Cerrajería", "Albañilería", "Soldadura", "Tapicería", "Fumigación",
+    "Vidriería", "Reparación de electrodomésticos", "Computación", "Clases particulares",
+    "Cuidado de mascotas", "Peluquería", "Fotografía", "Mecánica",
+]
+
+CITIES = [
+    ("Lima", "Lima", "Perú"), ("Arequipa", "Arequipa", "Perú"), ("Trujillo", "La Libertad", "Perú"),
+    ("Cusco", "Cusco", "Perú"), ("Piura", "Piura", "Perú"), ("Chiclayo", "Lambayeque", "Perú"),
+    ("Bogotá", "Cundinamarca", "Colombia"), ("Quito", "Pichincha", "Ecuador"),
+    ("Santiago", "Metropolitana", "Chile"), ("La Paz", "La Paz", "Bolivia"),
+]
+# Lima concentra la mayor parte de la oferta
+CITY_WEIGHTS = [40, 10, 8, 6, 5, 5, 8, 6, 7, 5]
+
+DAYS = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Desactiva auto_now/auto_now_add mientras se insertan las filas para poder guardar
+    fechas repartidas en el tiempo (bulk_create las pisaría con la fecha actual).
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class DatasetGenerator:
+    """
+    Genera un dataset sintético y reproducible (misma semilla = mismas filas).
+    Los ids se asignan explícitamente a continuación del máximo existente, así las
+    relaciones se arman sin esperar a que la base devuelva los ids insertados.
+
+    Tamaños por unidad de `scale`: 1.000 usuarios (30% prestadores), de 0 a 10
+    servicios por prestador, de 0 a 4 imágenes por servicio y una solicitud de
+    prestador por cada usuario que la pidió.
+    """
+
+    USERS_PER_SCALE = 1000
+    PROVIDER_RATIO = 0.3
+
+    def __init__(self, scale=1, seed=42):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.password_hash = make_password(PERF_PASSWORD, salt=f"perfseed{seed}")
+        self.next_ids = {}
+
+    def _next_id(self, model):
+        if model not in self.next_ids:
+            self.next_ids[model] = (model.objects.aggregate(m=Max("pk"))["m"] or 0) + 1
+        value = self.next_ids[model]
+        self.next_ids[model] = value + 1
+        return value
+
+    def _timestamp(self, max_days=365):
+        return EPOCH + timedelta(seconds=self.rng.randrange(max_days * 86400))
+
+    def categories(self):
+        existing = dict(ServiceCategory.objects.values_list("name", "id"))
+        self.category_ids = list(existing.values())
+        rows = []
+        for name in CATEGORY_NAMES:
+            if name in existing:
+                continue
+            category = ServiceCategory(
+                id=self._next_id(ServiceCategory),
+                name=name,
+                description=f"Servicios de {name.lower()}",
+                created_at=EPOCH,
+                updated_at=EPOCH,
+            )
+            rows.append(category)
+            self.category_ids.append(category.id)
+        yield ServiceCategory, rows
+
+    def users(self):
+        """Usuarios y, para los prestadores, su perfil, servicios e imágenes."""
+        total = self.USERS_PER_SCALE * self.scale
+        prefix = f"perf{self.seed}"
+        for _ in range(total):
+            user_id = self._next_id(User)
+            joined = self._timestamp()
+            is_provider = self.rng.random() < self.PROVIDER_RATIO
+            user = User(
+                id=user_id,
+                email=f"{prefix}-{user_id}@perf.servic.test",
+                username=f"{prefix}-{user_id}",
+                first_name="Usuario",
+                last_name=str(user_id),
+                password=self.password_hash,
+                date_joined=joined,
+                user_type="provider" if is_provider else self.rng.choice([None, "common"]),
+                is_profile_complete=is_provider,
+            )
+            yield User, [user]
+            if is_provider:
+                yield from self._provider_rows(user)
+            else:
+                yield from self._request_rows(user)
+
+    def _provider_rows(self, user):
+        city, state, country = self.rng.choices(CITIES, weights=CITY_WEIGHTS)[0]
+        # bulk_create no pasa por save(): las referencias normalizadas se asignan aquí
+        country_ref_id, state_ref_id, city_ref_id = place_index().resolve(city, state, country)
+        places = {"country_ref_id": country_ref_id, "state_ref_id": state_ref_id, "city_ref_id": city_ref_id}
+        created = user.date_joined + timedelta(days=self.rng.randrange(1, 30))
+        yield ServiceProviderProfile, [
+            ServiceProviderProfile(
+                id=self._next_id(ServiceProviderProfile),
+                user_id=user.id,
+                identification_type=self.rng.choice(["dni", "ce", "passport"]),
+                identification_number=f"{self.rng.randrange(10**7, 10**8)}",
+                phone_number=f"9{self.rng.randrange(10**7, 10**8)}",
+                address=f"Av. Principal {self.rng.randrange(1, 2000)}",
+                city=city,
+                state=state,
+                country=country,
+                **places,
+                certification_file="certifications/perf.pdf",
+                certification_description="Certificado técnico",
+                years_of_experience=self.rng.randrange(0, 30),
+                is_verified=self.rng.random() < 0.8,
+                created_at=created,
+                updated_at=created,
+            )
+        ]
+        # La cantidad de servicios por prestador tiene cola larga: pocos publican muchos
+        count = min(10, int(self.rng.paretovariate(1.5)) - 1)
+        services, images = [], []
+        for _ in range(count):
+            service_id = self._next_id(Service)
+            published = created + timedelta(days=self.rng.randrange(0, 60))
+            start = self.rng.randrange(6, 12)
+            services.append(
+                Service(
+                    id=service_id,
+                    title=f"Servicio {service_id}",
+                    description="Servicio generado para pruebas de rendimiento",
+                    category_id=self.rng.choice(self.category_ids),
+                    provider_id=user.id,
+                    price=Decimal(self.rng.randrange(2000, 100000)) / 100,
+                    price_type=self.rng.choice(["hourly", "fixed", "negotiable"]),
+                    location=f"Distrito {self.rng.randrange(1, 40)}",
+                    city=city,
+                    state=state,
+                    country=country,
+                    **places,
+                    availability_start=time(start),
+                    availability_end=time(start + self.rng.randrange(4, 10)),
+                    available_days=",".join(sorted(self.rng.sample(DAYS, 5), key=DAYS.index)),
+                    status=self.rng.choices(["active", "pending", "inactive"], weights=[70, 20, 10])[0],
+                    created_at=published,
+                    updated_at=published,
+                )
+            )
+            for position in range(self.rng.randrange(0, 5)):
+                images.append(
+                    ServiceImage(
+                        id=self._next_id(ServiceImage),
+                        service_id=service_id,
+                        image=f"service_images/perf-{service_id}-{position}.jpg",
+                        is_primary=position == 0,
+                        created_at=published,
+                    )
+                )
+        yield Service, services
+        yield ServiceImage, images
+
+    def _request_rows(self, user):
+        if self.rng.random() >= 0.4:
+            return
+        status = self.rng.choices(["pending", "approved", "rejected"], weights=[50, 30, 20])[0]
+        created = user.date_joined + timedelta(days=self.rng.randrange(0, 30))
+        yield ProviderRequest, [
+            ProviderRequest(
+                id=self._next_id(ProviderRequest),
+                user_id=user.id,
+                status=status,
+                request_reason="Quiero ofrecer mis servicios en la plataforma",
+                admin_response=None if status == "pending" else "Revisado",
+                created_at=created,
+                updated_at=created,
+            )
+        ]
+        if status == "approved":
+            yield UserRoleChangeLog, [
+                UserRoleChangeLog(
+                    id=self._next_id(UserRoleChangeLog),
+                    user_id=user.id,
+                    previous_role="common",
+                    new_role="provider",
+                    reason="Solicitud aprobada",
+                    changed_at=created + timedelta(days=1),
+                )
+            ]
+
+    def rows(self):
+        """Todas las filas en orden de dependencias, como pares (modelo, instancias)."""
+        yield from self.categories()
+        yield from self.users()
+
+
+SEEDED_MODELS = (
+    ServiceCategory,
+    User,
+    ServiceProviderProfile,
+    Service,
+    ServiceImage,
+    ProviderRequest,
+    UserRoleChangeLog,
+)
+
+
+def reset_sequences(models=SEEDED_MODELS):
+    # Con ids explícitos, las secuencias de Postgres quedan atrás del máximo insertado
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class BulkCreateWriter:
+    """Inserta cada lote con bulk_create (cualquier base de datos)."""
+
+    name = "bulk_create"
+
+    def write(self, model, instances):
+        model.objects.bulk_create(instances, batch_size=len(instances))
+
+
+class CopyWriter:
+    """
+    Inserta cada lote con COPY ... FROM STDIN (solo Postgres con psycopg3): evita
+    armar y parsear un INSERT gigante y es varias veces más rápido que bulk_create.
+    """
+
+    name = "copy"
+
+    @staticmethod
+    def available():
+        if connection.vendor != "postgresql":
+            return False
+        connection.ensure_connection()
+        return hasattr(connection.connection.cursor(), "copy")
+
+    def write(self, model, instances):
+        quote = connection.ops.quote_name
+        fields = model._meta.concrete_fields
+        sql = "COPY {} ({}) FROM STDIN".format(
+            quote(model._meta.db_table), ", ".join(quote(field.column) for field in fields)
+        )
+        with connection.cursor() as cursor:
+            with cursor.cursor.copy(sql) as copy:
+                for instance in instances:
+                    copy.write_row(
+                        [
+                            field.get_db_prep_save(getattr(instance, field.attname), connection)
+                            for field in fields
+                        ]
+                    )
+
+
+def seed_dataset(scale=1, seed=42, batch_size=2000, writer=None, progress=None):
+    """
+    Inserta el dataset en lotes de `batch_size` filas por modelo, cada lote en su
+    propia transacción. `writer` es BulkCreateWriter (default) o CopyWriter y
+    `progress(model, rows)` se llama después de cada lote.
+    Devuelve la cantidad de filas insertadas por modelo (incluido ServiceListing).
+    """
+    writer = writer or BulkCreateWriter()
+    generator = DatasetGenerator(scale=scale, seed=seed)
+    pending = {model: [] for model in SEEDED_MODELS}
+    counts = {model.__name__: 0 for model in SEEDED_MODELS}
+
+    def flush(upto):
+        # Se insertan en orden de dependencias para respetar las claves foráneas
+        for model in SEEDED_MODELS[: SEEDED_MODELS.index(upto) + 1]:
+            if pending[model]:
+                with transaction.atomic():
+                    writer.write(model, pending[model])
+                counts[model.__name__] += len(pending[model])
+                if progress:
+                    progress(model, len(pending[model]))
+                pending[model] = []
+
+    with explicit_timestamps(*SEEDED_MODELS):
+        for model, instances in generator.rows():
+            pending[model].extend(instances)
+            if len(pending[model]) >= batch_size:
+                flush(model)
+        flush(SEEDED_MODELS[-1])
+    reset_sequences()
+    # Las filas se insertaron sin pasar por los serializers: el listado público y los
+    # contadores por categoría se arman al final
+    counts["ServiceListing"] = rebuild_listings(batch_size=batch_size)
+    reconcile_category_counts()
+    return counts
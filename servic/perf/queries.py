@@ -0,0 +1,103 @@
+import os
+import traceback
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.db import connections
+
+from ..sql import normalize_sql
+
+# Directorio de la app: los frames de este código son los que interesa reportar
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Frames de la propia instrumentación, que no aportan al diagnóstico
+_IGNORED_DIRS = (os.path.join(APP_DIR, "perf"), os.path.join(APP_DIR, "middleware"))
+
+
+def _origin(stack):
+    """
+    Frames de la app que originaron la consulta (sin los del test que hizo la petición)
+    más el frame más interno fuera del ORM, que suele ser el acceso que la disparó
+    (por ejemplo, un `source="category.name"` resuelto en rest_framework/fields.py).
+    """
+    frames = [
+        frame
+        for frame in stack
+        if frame.filename.startswith(APP_DIR)
+        and not frame.filename.startswith(_IGNORED_DIRS)
+        and not frame.filename.endswith("tests.py")
+    ][-3:]
+    innermost = [frame for frame in stack if "django/db" not in frame.filename][-1:]
+    if innermost and innermost[0] not in frames:
+        frames += innermost
+    return [f"{frame.filename}:{frame.lineno} in {frame.name}" for frame in frames]
+
+
+class QueryTracer:
+    """
+    Registra las consultas SQL ejecutadas en todas las conexiones dentro del bloque
+    `with`, agrupadas por forma (normalize_sql) y con el stack que las originó.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.shapes = defaultdict(list)
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        self.shapes[normalize_sql(sql)].append(_origin(traceback.extract_stack()[:-1]))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def repeated(self, threshold=2):
+        """Formas ejecutadas `threshold` o más veces: probable N+1."""
+        return {shape: origins for shape, origins in self.shapes.items() if len(origins) >= threshold}
+
+    def report(self, threshold=2):
+        lines = []
+        for shape, origins in self.repeated(threshold).items():
+            lines.append(f"  {len(origins)}x {shape[:300]}")
+            lines.extend(f"      {frame}" for frame in origins[0])
+        return "\n".join(lines)
+
+
+class QueryBudgetMixin:
+    """
+    Para TestCase: verifica que un endpoint respete su presupuesto de consultas y que
+    la cantidad no crezca con las filas devueltas (N+1).
+    """
+
+    def assertQueryBudget(self, name, fetch, grow, budget, sizes=(2, 6)):
+        """
+        `grow(n)` deja al menos n filas visibles para el endpoint; `fetch()` hace la
+        petición. Se mide con cada tamaño de `sizes` y falla si:
+          - se supera `budget`,
+          - la cantidad de consultas cambia entre tamaños, o
+          - una misma forma de consulta se repite dentro de la petición.
+        """
+        counts = []
+        for size in sizes:
+            grow(size)
+            with QueryTracer() as tracer:
+                response = fetch()
+            self.assertEqual(response.status_code, 200, f"{name}: {response.content[:300]}")
+
+            repeated = tracer.report()
+            if repeated:
+                self.fail(f"{name}: consultas repetidas con {size} filas (N+1?)\n{repeated}")
+            if tracer.count > budget:
+                self.fail(f"{name}: {tracer.count} consultas con {size} filas, presupuesto {budget}")
+            counts.append(tracer.count)
+
+        self.assertEqual(
+            len(set(counts)),
+            1,
+            f"{name}: las consultas crecen con las filas {dict(zip(sizes, counts))}",
+        )
@@ -0,0 +1,330 @@
+import io
+import json
+from itertools import count
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import get_resolver
+from PIL import Image
+
+from ..authentication import get_token_version
+from ..profiling import save_report
+from ..read_models import refresh_listings
+from ..models import (
+    ProviderRequest,
+    Service,
+    ServiceCategory,
+    ServiceImage,
+    ServiceProviderProfile,
+    User,
+)
+from ..serializers import CustomTokenObtainPairSerializer
+from .dataset import PERF_PASSWORD
+
+# Rutas que el benchmark no mide (ninguna por ahora): cualquier url_name nuevo de
+# servic/urls/ debe tener su escenario o figurar aquí, si no el benchmark falla
+EXCLUDED_ROUTES = set()
+
+
+class Scenario:
+    """
+    Una petición representativa de una ruta. `build(i)` arma la petición de la
+    iteración i (path, body, headers) y puede crear las filas que necesita: se
+    ejecuta fuera de la medición.
+    """
+
+    def __init__(self, url_name, method, build, expected=(200,)):
+        self.url_name = url_name
+        self.method = method
+        self.build = build
+        self.expected = expected
+
+
+def _png_bytes():
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _json(path, data, headers=None):
+    return {
+        "path": path,
+        "body": json.dumps(data).encode(),
+        "headers": {"Content-Type": "application/json", **(headers or {})},
+    }
+
+
+def _multipart(path, data, headers=None):
+    return {
+        "path": path,
+        "body": encode_multipart(BOUNDARY, data),
+        "headers": {"Content-Type": MULTIPART_CONTENT, **(headers or {})},
+    }
+
+
+def _get(path, headers=None):
+    return {"path": path, "body": b"", "headers": headers or {}}
+
+
+class BenchFixtures:
+    """Usuarios y filas conocidas sobre las que trabajan los escenarios."""
+
+    def __init__(self):
+        self.sequence = count(1)
+        self.admin = User.objects.create_superuser(
+            email="admin@bench.servic.test", username="bench-admin", password=PERF_PASSWORD
+        )
+        self.common = self.new_user("common")
+        self.provider = self.new_user("provider", is_profile_complete=True)
+        self.profile = ServiceProviderProfile.objects.create(
+            user=self.provider,
+            identification_type="dni",
+            identification_number="12345678",
+            phone_number="999999999",
+            address="Av. Benchmark 1",
+            city="Lima",
+            state="Lima",
+            country="Perú",
+            certification_file="certifications/bench.pdf",
+            certification_description="Certificado técnico",
+            years_of_experience=5,
+            is_verified=True,
+        )
+        self.category = ServiceCategory.objects.order_by("id").first()
+        self.service = Service.objects.create(
+            title="Servicio del benchmark",
+            description="Servicio sobre el que se miden detalle e imágenes",
+            category=self.category,
+            provider=self.provider,
+            price="50.00",
+            price_type="fixed",
+            location="Miraflores",
+            city="Lima",
+            state="Lima",
+            country="Perú",
+            availability_start="08:00",
+            availability_end="18:00",
+            available_days="Lunes,Martes",
+            status="active",
+        )
+        refresh_listings([self.service.id])
+        self.pending_request = ProviderRequest.objects.create(
+            user=self.new_user("common"), request_reason="Quiero ofrecer mis servicios"
+        )
+        self.png = _png_bytes()
+        self.profile_report_id = save_report({"mode": "cprofile", "path": "/api/services/"})
+
+    def new_user(self, user_type, **fields):
+        number = next(self.sequence)
+        return User.objects.create_user(
+            email=f"bench-{user_type}-{number}@bench.servic.test",
+            username=f"bench-{user_type}-{number}",
+            password=PERF_PASSWORD,
+            user_type=user_type,
+            **fields,
+        )
+
+    def auth(self, user):
+        token = CustomTokenObtainPairSerializer.get_token(user)
+        # Cache de token_version caliente, como en producción
+        get_token_version(user.id)
+        return {"Authorization": f"Bearer {token.access_token}"}
+
+    def image(self):
+        return SimpleUploadedFile("bench.png", self.png, content_type="image/png")
+
+    def service_payload(self):
+        return {
+            "title": "Servicio nuevo",
+            "description": "Creado por el benchmark",
+            "category": self.category.id,
+            "price": "80.00",
+            "price_type": "fixed",
+            "location": "Miraflores",
+            "city": "Lima",
+            "state": "Lima",
+            "country": "Perú",
+            "availability_start": "08:00",
+            "availability_end": "18:00",
+            "available_days": "Lunes,Martes",
+        }
+
+    def new_image(self):
+        return ServiceImage.objects.create(
+            service=self.service, image="service_images/bench.png"
+        )
+
+
+def build_scenarios(fixtures):
+    f = fixtures
+    admin = f.auth(f.admin)
+    common = f.auth(f.common)
+    provider = f.auth(f.provider)
+
+    def register(path):
+        def build(i):
+            email = f"bench-new-{next(f.sequence)}@bench.servic.test"
+            return _json(
+                path,
+                {
+                    "email": email,
+                    "first_name": "Nuevo",
+                    "last_name": "Usuario",
+                    "password": PERF_PASSWORD,
+                    "password2": PERF_PASSWORD,
+                },
+            )
+
+        return build
+
+    def login(path):
+        return lambda i: _json(path, {"email": f.common.email, "password": PERF_PASSWORD})
+
+    scenarios = [
+        # Autenticación
+        Scenario("register", "POST", register("/api/register/"), expected=(201,)),
+        Scenario("login", "POST", login("/api/login/")),
+        Scenario(
+            "token-refresh",
+            "POST",
+            # Cada refresh token sirve una sola vez (rotación): uno nuevo por iteración
+            lambda i: _json(
+                "/api/token/refresh/",
+                {"refresh": str(CustomTokenObtainPairSerializer.get_token(f.common))},
+            ),
+        ),
+        # Usuarios
+        Scenario("user-profile", "GET", lambda i: _get("/api/profile/", common)),
+        Scenario(
+            "change-user-role",
+            "PUT",
+            lambda i: _json(
+                f"/api/users/{f.new_user('common').id}/change-role/",
+                {"user_type": "provider", "reason": "Benchmark"},
+                admin,
+            ),
+        ),
+        # Prestadores
+        Scenario("provider-profile", "GET", lambda i: _get("/api/provider/profile/", provider)),
+        Scenario(
+            "create-provider-request",
+            "POST",
+            lambda i: _json(
+                "/api/provider/request/",
+                {"request_reason": "Quiero ofrecer mis servicios"},
+                f.auth(f.new_user("common")),
+            ),
+            expected=(201,),
+        ),
+        Scenario("list-provider-requests", "GET", lambda i: _get("/api/provider/requests/", admin)),
+        Scenario(
+            "claim-provider-requests",
+            "POST",
+            lambda i: _json("/api/provider/requests/claim/", {"limit": 10}, admin),
+        ),
+        Scenario(
+            "review-provider-request",
+            "GET",
+            lambda i: _get(f"/api/provider/requests/{f.pending_request.id}/", admin),
+        ),
+        # Catálogo
+        Scenario("service-category-list", "GET", lambda i: _get("/api/categories/")),
+        Scenario(
+            "service-category-detail",
+            "GET",
+            lambda i: _get(f"/api/categories/{f.category.id}/"),
+        ),
+        Scenario("service-list", "GET", lambda i: _get("/api/services/")),
+        Scenario("service-facets", "GET", lambda i: _get("/api/services/facets/")),
+        Scenario(
+            "service-create",
+            "POST",
+            lambda i: _multipart("/api/services/create/", f.service_payload(), provider),
+            expected=(201,),
+        ),
+        Scenario("service-detail", "GET", lambda i: _get(f"/api/services/{f.service.id}/")),
+        Scenario(
+            "service-image-upload",
+            "POST",
+            lambda i: _multipart(
+                f"/api/services/{f.service.id}/images/", {"image": f.image()}, provider
+            ),
+            expected=(201,),
+        ),
+        Scenario(
+            "service-image-delete",
+            "DELETE",
+            lambda i: _get(f"/api/services/images/{f.new_image().id}/", provider),
+            expected=(204,),
+        ),
+        Scenario(
+            "service-image-set-primary",
+            "PATCH",
+            lambda i: _json(
+                f"/api/services/images/{f.new_image().id}/set-primary/", {}, provider
+            ),
+        ),
+        # Administración
+        Scenario("admin-dashboard", "GET", lambda i: _get("/api/admin/dashboard/", admin)),
+        Scenario("admin-provider-list", "GET", lambda i: _get("/api/admin/providers/", admin)),
+        Scenario(
+            "admin-verify-provider",
+            "GET",
+            lambda i: _get(f"/api/admin/providers/{f.provider.id}/verify/", admin),
+        ),
+        Scenario("admin-service-list", "GET", lambda i: _get("/api/admin/services/", admin)),
+        Scenario(
+            "admin-approve-service",
+            "PUT",
+            lambda i: _json(
+                f"/api/admin/services/{f.service.id}/approve/", {"status": "active"}, admin
+            ),
+        ),
+        Scenario("admin-metrics", "GET", lambda i: _get("/api/admin/metrics/", admin)),
+        Scenario(
+            "admin-metrics-prometheus",
+            "GET",
+            lambda i: _get("/api/admin/metrics/prometheus/", admin),
+        ),
+        Scenario("admin-profile-list", "GET", lambda i: _get("/api/admin/profiles/", admin)),
+        Scenario(
+            "admin-profile-detail",
+            "GET",
+            lambda i: _get(f"/api/admin/profiles/{f.profile_report_id}/", admin),
+        ),
+        # Versiones async
+        Scenario("async-register", "POST", register("/api/async/register/"), expected=(201,)),
+        Scenario("async-login", "POST", login("/api/async/login/")),
+        Scenario(
+            "async-service-category-list", "GET", lambda i: _get("/api/async/categories/")
+        ),
+        Scenario("async-service-list", "GET", lambda i: _get("/api/async/services/")),
+        Scenario(
+            "async-service-detail",
+            "GET",
+            lambda i: _get(f"/api/async/services/{f.service.id}/"),
+        ),
+    ]
+    return scenarios
+
+
+def api_route_names():
+    """url_name de todas las rutas de servic/urls/ (montadas bajo /api/)."""
+    names = set()
+
+    def walk(patterns):
+        for pattern in patterns:
+            if hasattr(pattern, "url_patterns"):
+                walk(pattern.url_patterns)
+            elif pattern.name:
+                names.add(pattern.name)
+
+    for pattern in get_resolver().url_patterns:
+        if getattr(pattern, "urlconf_name", None) == "servic.urls":
+            walk(pattern.url_patterns)
+    return names
+
+
+def missing_scenarios(scenarios):
+    covered = {scenario.url_name for scenario in scenarios}
+    return sorted(api_route_names() - covered - EXCLUDED_ROUTES)
@@ -0,0 +1,105 @@
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+
+from ..middleware.metrics_middleware import QueryRecorder
+from .bench import asgi_request, percentile, wsgi_request
+
+
+class RouteRunner:
+    """Ejecuta los escenarios en proceso, por el handler WSGI o ASGI de Django."""
+
+    def __init__(self, server="wsgi"):
+        self.server = server
+        self.handler = WSGIHandler() if server == "wsgi" else ASGIHandler()
+
+    def request(self, method, path, body, headers):
+        if self.server == "wsgi":
+            return wsgi_request(self.handler, path, method=method, body=body, headers=headers)
+        return async_to_sync(asgi_request)(
+            self.handler, path, method=method, body=body, headers=headers
+        )
+
+    def run(self, scenario, iterations, warmup=2):
+        """
+        Mide `iterations` peticiones seguidas del escenario. Devuelve latencias
+        (p50/p95/p99), throughput, consultas SQL por petición (la mayor observada)
+        y el pico de memoria asignada durante una petición.
+        """
+        for i in range(warmup):
+            self._once(scenario, i)
+
+        latencies, queries, errors = [], 0, []
+        busy = 0.0
+        for i in range(iterations):
+            request = scenario.build(warmup + i)
+            recorder = QueryRecorder()
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(recorder))
+                status, body, latency = self.request(scenario.method, **request)
+            busy += latency
+            latencies.append(latency)
+            queries = max(queries, recorder.count)
+            if status not in scenario.expected:
+                errors.append((status, body[:200]))
+
+        # La memoria se mide aparte: tracemalloc hace más lenta cada petición
+        request = scenario.build(warmup + iterations)
+        tracemalloc.start()
+        try:
+            self.request(scenario.method, **request)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "requests": iterations,
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "throughput_rps": round(iterations / busy, 1) if busy else 0.0,
+            "queries": queries,
+            "peak_kb": round(peak / 1024, 1),
+        }
+
+    def _once(self, scenario, i):
+        self.request(scenario.method, **scenario.build(i))
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25, min_delta_ms=2.0):
+    """
+    Compara cada ruta con la línea base. Es regresión si:
+      - ejecuta más consultas SQL que antes (sin tolerancia: suele ser un N+1), o
+      - su p95 o su pico de memoria crecen más que `tolerance` (25% por defecto).
+    Para latencias muy chicas se ignoran diferencias menores a `min_delta_ms`.
+    Devuelve la lista de regresiones como textos.
+    """
+    regressions = []
+    for url_name, current in sorted(results.items()):
+        previous = baseline.get(url_name)
+        if previous is None:
+            continue
+        if current["queries"] > previous["queries"]:
+            regressions.append(
+                f"{url_name}: consultas SQL {previous['queries']} -> {current['queries']}"
+            )
+        if (
+            current["p95_ms"] > previous["p95_ms"] * (1 + tolerance)
+            and current["p95_ms"] - previous["p95_ms"] > min_delta_ms
+        ):
+            regressions.append(
+                f"{url_name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms"
+            )
+        if current["peak_kb"] > previous["peak_kb"] * (1 + tolerance):
+            regressions.append(
+                f"{url_name}: memoria pico {previous['peak_kb']}KB -> {current['peak_kb']}KB"
+            )
+    return regressions
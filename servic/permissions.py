@@ -1,7 +1,9 @@
 from rest_framework import permissions
-from rest_framework.exceptions import APIException
+from rest_framework.exceptions import NotFound, PermissionDenied
 from django.utils.translation import gettext_lazy as _
 
+from .provider_context import get_provider_context
+
 
 class IsProviderAndVerified(permissions.BasePermission):
     """
@@ -21,35 +23,30 @@ class IsProviderAndVerified(permissions.BasePermission):
             # Esto no debería ocurrir si IsAuthenticated está antes, pero como fallback.
             return False
 
-        if request.user.user_type != "provider":
-            raise APIException(
-                detail=_(
-                    "Solo los prestadores de servicios pueden acceder a esta funcionalidad."
-                ),
-                code=403,
+        # Estado de prestador compartido por toda la petición (se calcula una sola vez)
+        context = get_provider_context(request)
+
+        if not context.is_provider:
+            raise PermissionDenied(
+                _("Solo los prestadores de servicios pueden acceder a esta funcionalidad.")
             )
 
-        if not hasattr(request.user, "provider_profile"):
-            raise APIException(
-                detail=_(
-                    "No se encontró un perfil de prestador asociado a este usuario."
-                ),
-                code=404,
+        if not context.has_profile:
+            raise NotFound(
+                _("No se encontró un perfil de prestador asociado a este usuario.")
             )
 
-        if not request.user.provider_profile.is_verified:
-            raise APIException(
-                detail=_("Su perfil de prestador está pendiente de verificación."),
-                code=403,
+        if not context.is_verified:
+            raise PermissionDenied(
+                _("Su perfil de prestador está pendiente de verificación.")
             )
 
         # Si tiene un perfil y no está completo
-        if not request.user.is_profile_complete:
-            raise APIException(
-                detail=_(
+        if not context.is_profile_complete:
+            raise PermissionDenied(
+                _(
                     "Debe completar su perfil de prestador antes de acceder a esta funcionalidad."
-                ),
-                code=403,
+                )
             )
 
         return True
@@ -0,0 +1,182 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+# Reportes guardados en la cache compartida: así cualquier proceso puede devolverlos
+_REPORT_KEY = "profile-report:{}"
+_INDEX_KEY = "profile-report-index"
+
+
+class StackSampler:
+    """
+    Profiler estadístico: un hilo aparte toma el stack del hilo de la petición cada
+    `interval` segundos. Cuesta mucho menos que cProfile y sus conteos sirven para
+    armar un flame graph (formato "collapsed": `frame;frame;frame cantidad`).
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def _allocations(snapshot, top):
+    stats = snapshot.statistics("lineno")[:top]
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+        }
+        for stat in stats
+    ]
+
+
+# cProfile no admite dos perfiles activos a la vez (3.12+ lo rechaza; antes, el segundo
+# reemplaza al primero): con ASGI varias peticiones comparten el hilo del event loop
+_cprofile_lock = threading.Lock()
+
+
+@contextmanager
+def profiling(mode="cprofile"):
+    """
+    Perfila el bloque con el profiler indicado ("cprofile" o "sampler") y tracemalloc.
+    Entrega un dict que se completa con el reporte al salir del bloque. Si ya hay un
+    cProfile activo en el proceso, se usa el sampler.
+    """
+    top = settings.PROFILING_TOP_N
+    use_cprofile = mode != "sampler" and _cprofile_lock.acquire(blocking=False)
+    report = {}
+    # Si tracemalloc ya estaba activo (por ejemplo, otro profiler) no se toca
+    trace_memory = not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        if use_cprofile:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield report
+            finally:
+                profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(top)
+            report.update(mode="cprofile", profile=output.getvalue())
+        else:
+            with StackSampler(settings.PROFILING_SAMPLER_INTERVAL) as sampler:
+                yield report
+            report.update(
+                mode="sampler",
+                samples=sum(sampler.stacks.values()),
+                stacks=sampler.collapsed().splitlines()[:top],
+            )
+        report["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        if trace_memory:
+            report["allocations"] = _allocations(tracemalloc.take_snapshot(), top)
+            report["peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        if use_cprofile:
+            _cprofile_lock.release()
+
+
+def save_report(report):
+    report_id = uuid.uuid4().hex
+    report = {"id": report_id, "created_at": timezone.now().isoformat(), **report}
+    timeout = settings.PROFILING_REPORT_TTL
+    cache.set(_REPORT_KEY.format(report_id), report, timeout)
+    # Índice acotado de los últimos reportes para poder listarlos
+    index = [report_id] + (cache.get(_INDEX_KEY) or [])
+    cache.set(_INDEX_KEY, index[: settings.PROFILING_MAX_REPORTS], timeout)
+    return report_id
+
+
+def get_report(report_id):
+    return cache.get(_REPORT_KEY.format(report_id))
+
+
+def list_reports():
+    """Resumen de los últimos reportes que siguen en la cache."""
+    index = cache.get(_INDEX_KEY) or []
+    reports = cache.get_many([_REPORT_KEY.format(report_id) for report_id in index])
+    summary = []
+    for report_id in index:
+        report = reports.get(_REPORT_KEY.format(report_id))
+        if report:
+            summary.append(
+                {
+                    key: report.get(key)
+                    for key in ("id", "created_at", "method", "path", "url_name", "status", "mode", "duration_ms")
+                }
+            )
+    return summary
+
+
+def write_flamegraph(url_name, collapsed):
+    """
+    Guarda los stacks en formato collapsed (flamegraph.pl, speedscope, ...) y borra los
+    archivos más viejos por encima de PROFILING_FLAMEGRAPH_MAX_FILES.
+    """
+    directory = settings.PROFILING_FLAMEGRAPH_DIR
+    os.makedirs(directory, exist_ok=True)
+    filename = f"{url_name or 'unmatched'}-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.folded"
+    path = os.path.join(directory, filename)
+    with open(path, "w") as file:
+        file.write(collapsed + "\n")
+    _prune_flamegraphs(directory, settings.PROFILING_FLAMEGRAPH_MAX_FILES)
+    return path
+
+
+def _prune_flamegraphs(directory, max_files):
+    files = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".folded"):
+            try:
+                files.append((entry.stat().st_mtime, entry.name, entry.path))
+            except FileNotFoundError:
+                pass
+    files.sort()
+    for _mtime, _name, path in files[: max(0, len(files) - max_files)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Otro proceso lo borró al mismo tiempo
+            pass
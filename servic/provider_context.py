@@ -0,0 +1,84 @@
+from .authentication import ClaimsUser
+from .models import User
+
+
+class ProviderContext:
+    """
+    Estado de prestador del usuario de la petición (tipo, perfil completo, verificación).
+    Se calcula una sola vez por petición y lo comparten middleware, permisos, serializers y views.
+    """
+
+    def __init__(self, user_id, user_type, is_profile_complete, has_profile, is_verified):
+        self.user_id = user_id
+        self.user_type = user_type
+        self.is_profile_complete = is_profile_complete
+        self.has_profile = has_profile
+        self.is_verified = is_verified
+
+    @property
+    def is_provider(self):
+        return self.user_type == "provider"
+
+    @property
+    def is_verified_provider(self):
+        return (
+            self.is_provider
+            and self.has_profile
+            and self.is_verified
+            and self.is_profile_complete
+        )
+
+    @classmethod
+    def from_claims(cls, user):
+        # Con ClaimsUser todo viene en el token: no hace falta ninguna consulta
+        return cls(
+            user_id=user.id,
+            user_type=user.user_type,
+            is_profile_complete=user.is_profile_complete,
+            has_profile=user.is_verified is not None,
+            is_verified=bool(user.is_verified),
+        )
+
+    @classmethod
+    def from_database(cls, user_id):
+        # Una sola consulta con LEFT JOIN al perfil de prestador
+        row = (
+            User.objects.filter(pk=user_id)
+            .values_list(
+                "user_type",
+                "is_profile_complete",
+                "provider_profile__id",
+                "provider_profile__is_verified",
+            )
+            .first()
+        )
+        if row is None:
+            return cls(user_id, None, False, False, False)
+        user_type, is_profile_complete, profile_id, is_verified = row
+        return cls(
+            user_id=user_id,
+            user_type=user_type,
+            is_profile_complete=is_profile_complete,
+            has_profile=profile_id is not None,
+            is_verified=bool(is_verified),
+        )
+
+
+def get_provider_context(request):
+    """
+    Devuelve el ProviderContext del usuario autenticado, cacheado en la petición.
+    Acepta tanto el HttpRequest de Django como el Request de DRF (que envuelve al primero).
+    Devuelve None si el usuario no está autenticado.
+    """
+    django_request = getattr(request, "_request", request)
+    context = getattr(django_request, "provider_context", None)
+    if context is None:
+        user = request.user
+        if not user.is_authenticated:
+            return None
+        if isinstance(user, ClaimsUser):
+            context = ProviderContext.from_claims(user)
+        else:
+            context = ProviderContext.from_database(user.pk)
+        django_request.provider_context = context
+    return context
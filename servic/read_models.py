@@ -0,0 +1,223 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from . import models as app_models
+from .cache import SERVICE_FRAGMENT_CACHE, invalidate_namespace, service_detail_cache
+
+# Columnas del modelo de lectura que se copian tal cual de Service
+COPIED_FIELDS = (
+    "title",
+    "description",
+    "category_id",
+    "provider_id",
+    "price",
+    "price_type",
+    "location",
+    "city",
+    "state",
+    "country",
+    "available_days",
+    "status",
+    "created_at",
+    "country_ref_id",
+    "state_ref_id",
+    "city_ref_id",
+)
+UPDATED_FIELDS = [name.removesuffix("_id") for name in COPIED_FIELDS] + [
+    "category_name",
+    "provider_name",
+    "primary_image",
+]
+
+
+def _primary_images(service_ids):
+    # Mismo criterio que ServiceListSerializer: la primera imagen principal según el
+    # orden del modelo (-is_primary, -created_at)
+    images = {}
+    rows = app_models.ServiceImage.objects.filter(
+        service_id__in=service_ids, is_primary=True
+    ).order_by("-is_primary", "-created_at")
+    for image in rows:
+        images.setdefault(image.service_id, image.image.url if image.image else None)
+    return images
+
+
+def _build_listings(services):
+    """Filas del modelo de lectura para servicios ya cargados con categoría y prestador."""
+    images = _primary_images([service.id for service in services])
+    return [
+        app_models.ServiceListing(
+            service_id=service.id,
+            category_name=service.category.name,
+            provider_name=f"{service.provider.first_name} {service.provider.last_name}",
+            primary_image=images.get(service.id),
+            **{name: getattr(service, name) for name in COPIED_FIELDS},
+        )
+        for service in services
+    ]
+
+
+def refresh_listings(service_ids):
+    """
+    Vuelve a calcular las filas de los servicios indicados: los activos se insertan o
+    actualizan (un solo INSERT ... ON CONFLICT) y el resto se borra del listado.
+    Se llama dentro de la transacción que modificó el servicio, así el listado nunca
+    muestra un estado que no se confirmó.
+    """
+    Service, ServiceListing = app_models.Service, app_models.ServiceListing
+    service_ids = list(service_ids)
+    if not service_ids:
+        return
+    # Sin savepoint: quien llama ya abrió la transacción de su escritura
+    with transaction.atomic(using=ServiceListing.objects.db, savepoint=False):
+        # FOR UPDATE: dos escrituras simultáneas del mismo servicio no cuentan dos veces
+        # el cambio en active_service_count. La categoría con la que estaba publicado
+        # viene en la misma consulta (LEFT JOIN con el listado).
+        services = list(
+            Service.objects.filter(id__in=service_ids)
+            .select_related("category", "provider")
+            .select_for_update(of=("self",))
+            .annotate(listed_category_id=F("listing__category_id"))
+        )
+        active = [service for service in services if service.status == "active"]
+        ServiceListing.objects.filter(service_id__in=service_ids).exclude(
+            service_id__in=[service.id for service in active]
+        ).delete()
+        ServiceListing.objects.bulk_create(
+            _build_listings(active),
+            update_conflicts=True,
+            unique_fields=["service"],
+            update_fields=UPDATED_FIELDS,
+        )
+
+        # Un servicio que entra, sale o cambia de categoría mueve los contadores
+        deltas = Counter()
+        for service in services:
+            if service.listed_category_id is not None:
+                deltas[service.listed_category_id] -= 1
+            if service.status == "active":
+                deltas[service.category_id] += 1
+        _apply_count_deltas(deltas)
+        # Todas las escrituras de servicios pasan por acá: también vence su detalle cacheado
+        service_detail_cache.invalidate(service_ids)
+
+
+def images_changed(service_ids):
+    """
+    Las imágenes son parte del servicio: se actualiza su updated_at (que versiona los
+    fragmentos cacheados de ServiceListSerializer) y su fila del listado.
+    """
+    service_ids = set(service_ids)
+    app_models.Service.objects.filter(id__in=service_ids).update(updated_at=timezone.now())
+    refresh_listings(service_ids)
+
+
+def delete_services(queryset):
+    """
+    Borra servicios. El borrado se propaga a ServiceListing (CASCADE) y cada servicio
+    borrado descuenta su categoría y vence su detalle (ver _on_service_deleted).
+    """
+    with transaction.atomic(using=queryset.db):
+        # Se bloquean las filas: un cambio de estado simultáneo no puede colarse entre
+        # la lectura del estado (la hace delete()) y el borrado
+        list(queryset.select_for_update().values_list("id", flat=True))
+        queryset.delete()
+
+
+def _on_service_deleted(sender, instance, **kwargs):
+    # post_delete llega también en los borrados en cascada (al eliminar el prestador o la
+    # categoría), que no pasan por delete_services
+    if instance.status == "active":
+        _apply_count_deltas({instance.category_id: -1})
+    service_detail_cache.invalidate([instance.id])
+
+
+def install():
+    post_delete.connect(_on_service_deleted, sender=app_models.Service, dispatch_uid="servic-read-models")
+
+
+def _apply_count_deltas(deltas):
+    # UPDATE ... SET active_service_count = active_service_count + n: la suma la hace la
+    # base de datos, sin leer el valor. En orden de id para no generar deadlocks.
+    for category_id, delta in sorted(deltas.items()):
+        if delta:
+            app_models.ServiceCategory.objects.filter(id=category_id).update(
+                active_service_count=F("active_service_count") + delta
+            )
+
+
+def reconcile_category_counts():
+    """
+    Recalcula active_service_count desde Service en un solo UPDATE y devuelve las
+    categorías que estaban desfasadas (ej: cambios hechos con SQL directo o servicios
+    activos creados sin pasar por refresh_listings).
+    """
+    Service, ServiceCategory = app_models.Service, app_models.ServiceCategory
+    actual = Coalesce(
+        Subquery(
+            Service.objects.filter(category_id=OuterRef("id"), status="active")
+            .order_by()
+            .values("category_id")
+            .annotate(total=Count("id"))
+            .values("total")
+        ),
+        0,
+    )
+    with transaction.atomic(using=ServiceCategory.objects.db):
+        stale = list(
+            ServiceCategory.objects.annotate(actual=actual)
+            .filter(~Q(active_service_count=F("actual")))
+            .values_list("name", "active_service_count", "actual")
+        )
+        if stale:
+            ServiceCategory.objects.update(active_service_count=actual)
+    return stale
+
+
+def rebuild_listings(batch_size=1000):
+    """
+    Reconstruye el listado completo desde Service (ej: después de una carga masiva o
+    si se sospecha que quedó desincronizado). Devuelve la cantidad de filas.
+    """
+    Service, ServiceListing = app_models.Service, app_models.ServiceListing
+    total = 0
+    with transaction.atomic(using=ServiceListing.objects.db):
+        ServiceListing.objects.all().delete()
+        active = (
+            Service.objects.filter(status="active")
+            .select_related("category", "provider")
+            .order_by("id")
+        )
+        last_id = 0
+        while True:
+            # Paginación por clave: cada lote es una consulta por índice, sin OFFSET
+            services = list(active.filter(id__gt=last_id)[:batch_size])
+            if not services:
+                break
+            ServiceListing.objects.bulk_create(_build_listings(services))
+            total += len(services)
+            last_id = services[-1].id
+    return total
+
+
+def rename_category(category):
+    """Propaga el nombre de una categoría al listado, al detalle y a los fragmentos cacheados."""
+    app_models.ServiceListing.objects.filter(category_id=category.id).update(category_name=category.name)
+    service_detail_cache.invalidate(
+        app_models.Service.objects.filter(category_id=category.id).values_list("id", flat=True)
+    )
+    # Los fragmentos de ServiceListSerializer incluyen el nombre y no cambió su updated_at
+    invalidate_namespace(SERVICE_FRAGMENT_CACHE)
+
+
+def rename_provider(user):
+    """Propaga el nombre de un prestador a sus filas del listado y a los fragmentos cacheados."""
+    app_models.ServiceListing.objects.filter(provider_id=user.id).update(
+        provider_name=f"{user.first_name} {user.last_name}"
+    )
+    invalidate_namespace(SERVICE_FRAGMENT_CACHE)
+
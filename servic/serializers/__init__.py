@@ -1,6 +1,7 @@
 from .user_serializers import (
     UserRegisterSerializer,
     CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
     UserProfileSerializer,
     UserRoleChangeSerializer,
 )
@@ -8,6 +9,7 @@ from .provider_serializers import (
     ServiceProviderProfileSerializer,
     ProviderRequestSerializer,
     ProviderRequestCreateSerializer,
+    ProviderRequestClaimSerializer,
     ProviderRequestReviewSerializer,
 )
 
@@ -15,20 +17,24 @@ from .service_serializers import (
     ServiceCategorySerializer,
     ServiceSerializer,
     ServiceListSerializer,
+    ServiceListingSerializer,
     ServiceImageSerializer,
 )
 
 __all__ = [
     "UserRegisterSerializer",
     "CustomTokenObtainPairSerializer",
+    "CustomTokenRefreshSerializer",
     "UserProfileSerializer",
     "UserRoleChangeSerializer",
     "ServiceProviderProfileSerializer",
     "ProviderRequestSerializer",
     "ProviderRequestCreateSerializer",
+    "ProviderRequestClaimSerializer",
     "ProviderRequestReviewSerializer",
     "ServiceCategorySerializer",
     "ServiceSerializer",
     "ServiceListSerializer",
+    "ServiceListingSerializer",
     "ServiceImageSerializer",
 ]
@@ -1,5 +1,8 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from ..models import ServiceProviderProfile, ProviderRequest
+from ..provider_context import get_provider_context
 
 # Serializer para la creación del perfil de provider(endpoint updateProfileRequest)
 class ServiceProviderProfileSerializer(serializers.ModelSerializer):
@@ -85,9 +88,16 @@ class ProviderRequestSerializer(serializers.ModelSerializer):
             "admin_response",    # Respuesta del admin (si la hay)
             "created_at",        # Fecha de creación
             "updated_at",        # Fecha de última actualización
+            "lease_expires_at",  # Hasta cuándo está reservada para un admin (si lo está)
         ]
         # Estos campos solo pueden ser leídos, no modificados por el usuario
-        read_only_fields = ["status", "admin_response", "created_at", "updated_at"]
+        read_only_fields = [
+            "status",
+            "admin_response",
+            "created_at",
+            "updated_at",
+            "lease_expires_at",
+        ]
 
     # Método para obtener el nombre completo del usuario
     def get_user_name(self, obj):
@@ -100,17 +110,55 @@ class ProviderRequestCreateSerializer(serializers.ModelSerializer):
         fields = ["request_reason"] #  es el nombre del campo que espera la API
 
     def validate(self, attrs):
-        user = self.context["request"].user # ["request"] es una clave del diccionario context que Django REST Framework (DRF) pasa automáticamente al serializer cuando lo usas desde una vista.
+        request = self.context["request"] # ["request"] es una clave del diccionario context que Django REST Framework (DRF) pasa automáticamente al serializer cuando lo usas desde una vista.
         # Es basicamente el usuario que esta haciendo la peticion para ser trabajor
-        # Se valida si el usuario ya es provider o si tiene una solicitud pendiente
-        if user.user_type == "provider":
+        user = get_provider_context(request)
+        # Se valida si el usuario ya es provider. La solicitud pendiente duplicada la rechaza
+        # la base de datos al insertar (ver create)
+        if user.is_provider:
             raise serializers.ValidationError("Ya eres un prestador de servicios")
-
-        if ProviderRequest.objects.filter(user=user, status="pending").exists():
-            raise serializers.ValidationError("Ya tienes una solicitud pendiente")
         # Se devuelve un diccionario con los datos que el usuario envió y que pasaron la validación de tipos y formato.
         return attrs
 
+    # Restricción de ProviderRequest.Meta que rechaza la segunda solicitud pendiente
+    PENDING_CONSTRAINT = "provreq_one_pending_per_user"
+
+    def create(self, validated_data):
+        # La restricción única parcial (una solicitud "pending" por usuario) evita duplicados
+        # aun con dos envíos simultáneos, y ahorra la consulta previa de exists()
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError as exc:
+            # Cualquier otra violación (ej: una FK) es un error real y se propaga
+            if not self.is_pending_duplicate(exc, validated_data["user_id"]):
+                raise
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["Ya tienes una solicitud pendiente"]}
+            )
+
+    def is_pending_duplicate(self, exc, user_id):
+        # Postgres (psycopg 2 y 3) informa qué restricción se violó
+        diag = getattr(exc.__cause__, "diag", None)
+        constraint = getattr(diag, "constraint_name", None)
+        if constraint is not None:
+            return constraint == self.PENDING_CONSTRAINT
+        # Sin ese dato (ej: SQLite) se confirma buscando la solicitud pendiente
+        return ProviderRequest.objects.filter(user_id=user_id, status="pending").exists()
+
+
+# Serializer para que un admin reclame las siguientes N solicitudes pendientes de la cola
+class ProviderRequestClaimSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        default=10,
+        min_value=1,
+        max_value=50,
+        error_messages={
+            "min_value": "Debe reclamar al menos una solicitud",
+            "max_value": "No puede reclamar más de 50 solicitudes a la vez",
+        },
+    )
+
 
 # Serializer para que el admin revise (apruebe o rechace) una solicitud de provider
 class ProviderRequestReviewSerializer(serializers.ModelSerializer):
@@ -1,14 +1,29 @@
 from rest_framework import serializers
-from ..models import ServiceCategory, Service, ServiceImage
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from ..models import ServiceCategory, Service, ServiceImage, ServiceListing
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from ..cache import SERVICE_FRAGMENT_CACHE, count_event, namespace_key
+from ..provider_context import get_provider_context
+from ..read_models import refresh_listings
 
 
 class ServiceCategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = ServiceCategory
-        fields = ["id", "name", "description", "icon", "created_at", "updated_at"]
-        read_only_fields = ["created_at", "updated_at"]
+        fields = [
+            "id",
+            "name",
+            "description",
+            "icon",
+            "active_service_count",
+            "created_at",
+            "updated_at",
+        ]
+        # active_service_count es un contador de la fila: no cuesta una consulta extra
+        read_only_fields = ["active_service_count", "created_at", "updated_at"]
 
 
 class ServiceImageSerializer(serializers.ModelSerializer):
@@ -70,9 +85,9 @@ class ServiceSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "provider", "created_at", "updated_at"]
 
     def validate(self, attrs):
-        # Validar que el prestador esté verificado
-        provider = self.context["request"].user
-        if not provider.provider_profile.is_verified:
+        # Validar que el prestador esté verificado (estado compartido por toda la petición)
+        provider = get_provider_context(self.context["request"])
+        if provider is None or not provider.is_verified:
             raise serializers.ValidationError(
                 "Debe tener un perfil de prestador verificado para publicar servicios"
             )
@@ -108,6 +123,7 @@ class ServiceSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("El precio debe ser mayor a 0")
         return value
 
+    @transaction.atomic
     def create(self, validated_data):
         images_data = validated_data.pop("images", [])
         service = Service.objects.create(**validated_data)
@@ -116,8 +132,13 @@ class ServiceSerializer(serializers.ModelSerializer):
         for image_data in images_data:
             ServiceImage.objects.create(service=service, **image_data)
 
+        # El listado público (ServiceListing) se actualiza en la misma transacción.
+        # Los servicios nuevos suelen quedar pendientes de aprobación: no hay nada que publicar
+        if service.status == "active":
+            refresh_listings([service.id])
         return service
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         images_data = validated_data.pop("images", None)
 
@@ -134,16 +155,57 @@ class ServiceSerializer(serializers.ModelSerializer):
             for image_data in images_data:
                 ServiceImage.objects.create(service=instance, **image_data)
 
+        refresh_listings([instance.id])
         return instance
 
 
+class FragmentCacheListSerializer(serializers.ListSerializer):
+    """
+    Lista que cachea la representación de cada fila bajo (versión del serializer, id,
+    updated_at). Las filas de la página se buscan con un solo get_many y solo se
+    serializan las que faltan. Una fila que cambia tiene otro updated_at, así que nunca
+    se sirve un fragmento viejo; los que quedan sin uso vencen solos.
+
+    El serializer hijo define `fragment_version`: cambiarla al modificar sus campos
+    descarta todos los fragmentos anteriores.
+    """
+
+    def to_representation(self, data):
+        items = data.all() if hasattr(data, "all") else data
+        timeout = settings.SERVICE_FRAGMENT_CACHE_TIMEOUT
+        if timeout <= 0:
+            return super().to_representation(items)
+
+        items = list(items)
+        prefix = namespace_key(
+            SERVICE_FRAGMENT_CACHE, type(self.child).__name__, self.child.fragment_version
+        )
+        keys = [f"{prefix}:{item.pk}:{item.updated_at.isoformat()}" for item in items]
+        fragments = caches["fragments"]
+        cached = fragments.get_many(keys)
+        rendered = {
+            key: self.child.to_representation(item)
+            for key, item in zip(keys, items)
+            if key not in cached
+        }
+        if rendered:
+            fragments.set_many(rendered, timeout)
+        count_event("fragment_hits", len(cached))
+        count_event("fragment_misses", len(rendered))
+        return [cached.get(key) or rendered[key] for key in keys]
+
+
 class ServiceListSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source="category.name")
     provider_name = serializers.SerializerMethodField()
     primary_image = serializers.SerializerMethodField()
 
+    # Versión de la representación cacheada por fila (FragmentCacheListSerializer)
+    fragment_version = 1
+
     class Meta:
         model = Service
+        list_serializer_class = FragmentCacheListSerializer
         fields = [
             "id",
             "title",
@@ -161,7 +223,26 @@ class ServiceListSerializer(serializers.ModelSerializer):
         return f"{obj.provider.first_name} {obj.provider.last_name}"
 
     def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
+        if "images" in getattr(obj, "_prefetched_objects_cache", {}):
+            # Imágenes precargadas con prefetch_related: se elige sin consultar la base de datos
+            primary_image = next(
+                (image for image in obj.images.all() if image.is_primary), None
+            )
+        else:
+            primary_image = obj.images.filter(is_primary=True).first()
         if primary_image:
             return primary_image.image.url
         return None
+
+
+class ServiceListingSerializer(serializers.ModelSerializer):
+    """
+    Misma salida que ServiceListSerializer, leída del modelo de lectura ServiceListing:
+    los nombres y la imagen principal ya están en la fila, no hay JOIN ni prefetch.
+    """
+
+    id = serializers.IntegerField(source="service_id")
+
+    class Meta:
+        model = ServiceListing
+        fields = ServiceListSerializer.Meta.fields
@@ -14,7 +14,13 @@ from django.contrib.auth.password_validation import validate_password
  Importa el serializer de SimpleJWT para obtener tokens de acceso y refresh (login con JWT).
  Permite personalizar la respuesta del login y agregar datos extra al token si lo necesitas.
 '''
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from rest_framework.exceptions import AuthenticationFailed
 
 '''
  La función get_user_model() siempre retorna el modelo de usuario principal que está configurado
@@ -23,7 +29,8 @@ Django usa este valor para saber cuál es el modelo de usuario principal.
 Cuando llamas a get_user_model(), Django busca ese modelo y lo retorna.
 '''
 
-from ..models import User
+from ..models import User, ServiceProviderProfile
+from ..token_blacklist import revoked_tokens
 
 
 '''
@@ -142,6 +149,16 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         validated_data.pop('password2')
         if 'username' not in validated_data:
             validated_data['username'] = validated_data['email'].split('@')[0] # sino se ingresa un usuario, split separa el email en dos, con @ como intermediario y 0 seria la parte antes del @
+        # El registro async hashea la contraseña en un pool de hilos y la pasa con serializer.save(password_hash=...)
+        password_hash = validated_data.pop('password_hash', None)
+        if password_hash:
+            validated_data.pop('password')
+            user = User(**validated_data)
+            user.username = User.normalize_username(user.username)
+            user.email = User.objects.normalize_email(user.email)
+            user.password = password_hash # ya viene hasheada, no se vuelve a hashear
+            user.save()
+            return user
         # Aqui usando ** delante del diccionario, desempaquetamos el mismo y le pasamos cada clave valor
         # create_user es el método estándar para crear usuarios y viene con el modelo que obtienes usando get_user_model().
         user = User.objects.create_user(**validated_data) # esto crea el objeto y lo guarda en la base de datos
@@ -153,11 +170,24 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     '''
     El método get_token es un @classmethod que SimpleJWT usa internamente para crear el token JWT cuando un usuario hace login.
     Cuando haces login desde una view usando SimpleJWT, el framework llama a get_token para construir el token JWT.
+    Aqui agregamos al token los datos que usan los permisos (claims). Así la autenticación
+    (ClaimsJWTAuthentication) no necesita buscar el usuario ni su perfil en cada petición.
+    token_version permite invalidar el token cuando esos datos cambian.
     '''
-    
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
+        try:
+            # None si todavía no tiene perfil de prestador
+            is_verified = user.provider_profile.is_verified
+        except ServiceProviderProfile.DoesNotExist:
+            is_verified = None
+        token["user_type"] = user.user_type
+        token["is_staff"] = user.is_staff
+        token["is_profile_complete"] = user.is_profile_complete
+        token["is_verified"] = is_verified
+        token["token_version"] = user.token_version
         return token
     '''
     aqui llamamos al metodo validate de la clase padre TokenObtainPairSerializer 
@@ -170,14 +200,54 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         # Un token refresh
         # Un token access
         # Aqui le agregamos otro diccionario con el valor de user que contienen los datos publicos del usuario autenticado
-        data["user"] = {
-            "id": self.user.id,
-            "email": self.user.email,
-            "username": self.user.username,
-            "user_type": self.user.user_type,
-        }
+        data["user"] = self.get_user_data(self.user)
         return data
 
+    @staticmethod
+    def get_user_data(user):
+        return {
+            "id": user.id,
+            "email": user.email,
+            "username": user.username,
+            "user_type": user.user_type,
+        }
+
+# Serializador para renovar los tokens sin volver a enviar la contraseña
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    '''
+    Recibe un refresh token y devuelve un par nuevo (access + refresh), con rotación:
+    el refresh usado se revoca y no puede volver a usarse.
+    Los claims se arman de nuevo desde la base de datos, así un token desactualizado
+    (token_version vieja) se renueva con los permisos actuales sin hashear la contraseña.
+    '''
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])  # Valida firma, tipo y expiración
+        jti = refresh[api_settings.JTI_CLAIM]
+
+        # El filtro de Bloom evita la consulta en el caso común (token nunca usado);
+        # revoke() inserta el jti y falla si otro proceso ya lo había usado
+        if revoked_tokens.is_revoked(jti) or not revoked_tokens.revoke(
+            jti, datetime_from_epoch(refresh["exp"])
+        ):
+            raise AuthenticationFailed(
+                "Este refresh token ya fue utilizado", code="token_revoked"
+            )
+
+        user = (
+            User.objects.select_related("provider_profile")
+            .filter(pk=refresh[api_settings.USER_ID_CLAIM], is_active=True)
+            .first()
+        )
+        if user is None:
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], code="no_active_account"
+            )
+
+        new_refresh = CustomTokenObtainPairSerializer.get_token(user)
+        return {"access": str(new_refresh.access_token), "refresh": str(new_refresh)}
+
 #Serializador para mostrar y actualizar el perfil
 #Aqui definimos los campos que queremos mostrar y actualizar en el perfil
 #El email no se puede cambiar desde aquí
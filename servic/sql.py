@@ -0,0 +1,18 @@
+import re
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """
+    Forma de la consulta sin sus valores: literales y listas IN de largo variable se
+    reemplazan por "?" para que dos consultas iguales con distintos parámetros coincidan.
+    """
+    shape = _STRING.sub("?", sql)
+    shape = _NUMBER.sub("?", shape)
+    shape = shape.replace("%s", "?")
+    shape = _PLACEHOLDER_LIST.sub("(...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
@@ -1,3 +1,1397 @@
-from django.test import TestCase
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, IntegrityError, OperationalError, connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .authentication import get_token_version, update_user_claims
+from .cache import TwoTierCache, cache_stats, cached_value, service_detail_cache
+from .middleware.query_guard_middleware import QueryGuard
+from .middleware.replica_middleware import PRIMARY_PIN_COOKIE
+from .models import (
+    User,
+    ServiceCategory,
+    ServiceProviderProfile,
+    Service,
+    ServiceImage,
+    ServiceListing,
+    ProviderRequest,
+    RevokedToken,
+    UserRoleChangeLog,
+)
+from .filters import ServiceFilter
+from .metrics import endpoint_metrics, render_prometheus
+from .password_hashing import HashPoolOverloaded, PasswordHashPool, password_hash_pool
+from .perf.dataset import DatasetGenerator
+from .perf.queries import QueryBudgetMixin
+from .perf.routes import BenchFixtures, build_scenarios, missing_scenarios
+from .profiling import profiling, write_flamegraph
+from .read_models import (
+    images_changed,
+    rebuild_listings,
+    reconcile_category_counts,
+    refresh_listings,
+    rename_category,
+)
+from .serializers import CustomTokenObtainPairSerializer, ServiceListSerializer
+from .token_blacklist import BloomFilter, revoked_tokens
+
+
+def create_provider(email="prestador@mail.com", is_verified=True):
+    user = User.objects.create_user(
+        email=email,
+        username=email.split("@")[0],
+        password="ClaveSegura123",
+        user_type="provider",
+        is_profile_complete=True,
+    )
+    ServiceProviderProfile.objects.create(
+        user=user,
+        identification_type="dni",
+        identification_number=email,
+        phone_number="999999999",
+        address="Av. Siempre Viva 123",
+        city="Lima",
+        state="Lima",
+        country="Perú",
+        certification_file="certifications/certificado.pdf",
+        certification_description="Certificado técnico",
+        years_of_experience=3,
+        is_verified=is_verified,
+    )
+    return user
+
+
+def authenticated_client(user):
+    client = APIClient()
+    token = CustomTokenObtainPairSerializer.get_token(user)
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.access_token}")
+    # Deja la token_version en cache para que el conteo de consultas sea estable
+    get_token_version(user.id)
+    return client
+
+
+class ServiceCreateQueryCountTests(TestCase):
+    """El estado de prestador se resuelve una sola vez por petición (ProviderContext)."""
+
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(
+            name="Gasfitería", description="Reparaciones de agua y desagüe"
+        )
+        self.payload = {
+            "title": "Reparación de cañerías",
+            "description": "Reparo fugas y cambio tuberías",
+            "category": self.category.id,
+            "price": "80.00",
+            "price_type": "fixed",
+            "location": "Miraflores",
+            "city": "Lima",
+            "state": "Lima",
+            "country": "Perú",
+            "availability_start": "08:00",
+            "availability_end": "18:00",
+            "available_days": "Lunes,Martes",
+        }
+
+    def test_service_create_runs_fixed_number_of_queries(self):
+        client = authenticated_client(create_provider())
+
+        # categoría, INSERT del servicio, email del prestador e imágenes de la respuesta.
+        # Un servicio nuevo queda pendiente: todavía no hay nada que publicar en el listado
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(
+                "/api/services/create/", self.payload, format="multipart"
+            )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        statements = [q["sql"] for q in queries if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(len(statements), 4, statements)
+
+    def test_unverified_provider_is_rejected_without_queries(self):
+        client = authenticated_client(create_provider(is_verified=False))
+
+        with self.assertNumQueries(0):
+            response = client.post(
+                "/api/services/create/", self.payload, format="multipart"
+            )
+
+        self.assertEqual(response.status_code, 403)
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        # token_version queda en cache por id de usuario y los ids se reusan entre tests
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email="admin@mail.com", username="admin", password="ClaveSegura123", is_staff=True
+        )
+        self.user = User.objects.create_user(
+            email="comun@mail.com", username="comun", password="ClaveSegura123"
+        )
+
+    def test_requests_are_served_without_loading_the_user(self):
+        client = authenticated_client(self.admin)
+
+        # Solo la consulta del listado: ni el User ni su perfil se cargan para autenticar
+        with self.assertNumQueries(1):
+            response = client.get("/api/provider/requests/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_change_invalidates_issued_tokens(self):
+        client = authenticated_client(self.user)
+        refresh = str(CustomTokenObtainPairSerializer.get_token(self.user))
+        self.assertEqual(client.get("/api/profile/").status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = authenticated_client(self.admin).put(
+                f"/api/users/{self.user.id}/change-role/",
+                {"user_type": "provider", "reason": "Ofrece servicios"},
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+
+        response = client.get("/api/profile/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["detail"].code, "token_outdated")
+
+        # El refresh entrega claims nuevos con el rol actual
+        response = APIClient().post("/api/token/refresh/", {"refresh": refresh})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(AccessToken(response.data["access"])["user_type"], "provider")
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(client.get("/api/profile/").status_code, 200)
+
+    def test_deactivated_user_tokens_stop_working(self):
+        client = authenticated_client(self.user)
+        refresh = str(CustomTokenObtainPairSerializer.get_token(self.user))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            update_user_claims(self.user.id, is_active=False)
+
+        self.assertEqual(client.get("/api/profile/").status_code, 401)
+        response = APIClient().post("/api/token/refresh/", {"refresh": refresh})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["detail"].code, "no_active_account")
+
+
+class TokenRefreshTests(TestCase):
+    url = "/api/token/refresh/"
+
+    def setUp(self):
+        User.objects.create_user(email="comun@mail.com", username="comun", password="ClaveSegura123")
+        # El filtro es por proceso: se reconstruye desde la base de cada test
+        revoked_tokens._bloom = None
+
+    def login(self):
+        response = APIClient().post(
+            "/api/login/", {"email": "comun@mail.com", "password": "ClaveSegura123"}
+        )
+        return response.data["refresh"]
+
+    def test_refresh_rotates_tokens(self):
+        refresh = self.login()
+
+        response = APIClient().post(self.url, {"refresh": refresh})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertNotEqual(response.data["refresh"], refresh)
+        self.assertTrue(RevokedToken.objects.filter(jti=RefreshToken(refresh)["jti"]).exists())
+
+        # El refresh nuevo sirve y el access nuevo autentica
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(client.get("/api/profile/").status_code, 200)
+        response = APIClient().post(self.url, {"refresh": response.data["refresh"]})
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_reused_refresh_is_rejected(self):
+        refresh = self.login()
+        self.assertEqual(APIClient().post(self.url, {"refresh": refresh}).status_code, 200)
+
+        response = APIClient().post(self.url, {"refresh": refresh})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["detail"].code, "token_revoked")
+
+        # Otro proceso con el filtro vacío lo rechaza igual: el jti es único en la base
+        with mock.patch.object(BloomFilter, "__contains__", return_value=False):
+            response = APIClient().post(self.url, {"refresh": refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_bloom_filter_skips_the_database_for_unused_tokens(self):
+        jti = RefreshToken(self.login())["jti"]
+        revoked_tokens.is_revoked(jti)  # construye el filtro
+
+        with self.assertNumQueries(0):
+            self.assertFalse(revoked_tokens.is_revoked(jti))
+
+    def test_bloom_false_positive_falls_through_to_the_database(self):
+        jti = RefreshToken(self.login())["jti"]
+        revoked_tokens.is_revoked(jti)
+
+        with mock.patch.object(BloomFilter, "__contains__", return_value=True):
+            with self.assertNumQueries(1):
+                self.assertFalse(revoked_tokens.is_revoked(jti))
+            response = APIClient().post(self.url, {"refresh": str(RefreshToken(self.login()))})
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_prune_revoked_tokens(self):
+        now = timezone.now()
+        for number in range(3):
+            RevokedToken.objects.create(jti=f"vencido-{number}", expires_at=now - timedelta(minutes=1))
+        RevokedToken.objects.create(jti="vigente", expires_at=now + timedelta(hours=1))
+
+        call_command("prune_revoked_tokens", "--batch-size", "2", stdout=StringIO())
+
+        self.assertEqual(list(RevokedToken.objects.values_list("jti", flat=True)), ["vigente"])
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "Requiere DB_REPLICA_HOSTS configurado")
+@override_settings(CATEGORY_LIST_CACHE_TIMEOUT=0)  # cada lectura tiene que llegar a la base
+class ReadReplicaRoutingTests(TransactionTestCase):
+    """
+    Las réplicas son MIRROR de "default" en los tests: misma base, conexión distinta.
+    TransactionTestCase confirma los datos para que la otra conexión los vea.
+    """
+
+    databases = "__all__"
+
+    def setUp(self):
+        ServiceCategory.objects.create(name="Electricidad", description="Instalaciones")
+        self.replica = connections[settings.DATABASE_REPLICAS[0]]
+        self.primary = connections["default"]
+
+    def get_categories(self, client):
+        with CaptureQueriesContext(self.primary) as primary, CaptureQueriesContext(
+            self.replica
+        ) as replica:
+            response = client.get("/api/categories/")
+        self.assertEqual(response.status_code, 200)
+        return len(primary), len(replica)
+
+    def test_reads_go_to_replica_until_client_writes(self):
+        client = APIClient()
+        primary_queries, replica_queries = self.get_categories(client)
+        self.assertEqual(primary_queries, 0)
+        self.assertGreater(replica_queries, 0)
+
+        response = client.post(
+            "/api/register/",
+            {
+                "email": "nuevo@mail.com",
+                "username": "nuevo",
+                "first_name": "Nuevo",
+                "last_name": "Usuario",
+                "password": "ClaveSegura123",
+                "password2": "ClaveSegura123",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+        # Con la cookie, el mismo cliente vuelve a leer de la principal
+        primary_queries, replica_queries = self.get_categories(client)
+        self.assertGreater(primary_queries, 0)
+        self.assertEqual(replica_queries, 0)
+
+
+class BenchmarkCoverageTests(TestCase):
+    """Cada ruta de servic/urls/ tiene su escenario en el benchmark (manage.py bench_api)."""
+
+    def test_every_api_route_has_a_benchmark_scenario(self):
+        ServiceCategory.objects.create(name="Pintura", description="Interiores y exteriores")
+        scenarios = build_scenarios(BenchFixtures())
+        self.assertEqual(missing_scenarios(scenarios), [])
+
+
+class AsyncMiddlewareTests(TestCase):
+    """Con ASGI la cadena de middlewares no pasa a modo síncrono en los del proyecto."""
+
+    @override_settings(DEBUG=True)
+    def test_asgi_handler_does_not_adapt_project_middleware(self):
+        # Con DEBUG, Django avisa en django.request cada middleware que tuvo que adaptar
+        with self.assertNoLogs("django.request", level="DEBUG"):
+            handler = ASGIHandler()
+        self.assertTrue(iscoroutinefunction(handler._middleware_chain))
+
+    def test_missing_service_404_matches_the_sync_view(self):
+        sync_response = APIClient().get("/api/services/999999/")
+        async_response = self.client.get("/api/async/services/999999/")
+
+        self.assertEqual(async_response.status_code, 404)
+        self.assertEqual(async_response.json(), sync_response.json())
+
+
+class PasswordHashPoolTests(TestCase):
+    def test_async_login(self):
+        User.objects.create_user(email="comun@mail.com", username="comun", password="ClaveSegura123")
+        completed = password_hash_pool.stats()["completed"]
+
+        response = self.client.post(
+            "/api/async/login/",
+            {"email": "comun@mail.com", "password": "ClaveSegura123"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"]["email"], "comun@mail.com")
+
+        response = self.client.post(
+            "/api/async/login/",
+            {"email": "comun@mail.com", "password": "OtraClave123"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 401)
+        # Los dos hashes pasaron por el pool
+        self.assertEqual(password_hash_pool.stats()["completed"], completed + 2)
+
+    async def test_full_pool_rejects_instead_of_queueing(self):
+        pool = PasswordHashPool(max_workers=1, max_queue=1)
+        release = threading.Event()
+        # Uno en curso y uno en espera ocupan todo el pool
+        running = [asyncio.ensure_future(pool.run(release.wait, 10)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with self.assertRaises(HashPoolOverloaded):
+            await pool.run(release.wait, 10)
+        self.assertEqual(pool.stats()["queue_depth"], 1)
+
+        release.set()
+        await asyncio.gather(*running)
+        self.assertEqual((pool.stats()["completed"], pool.stats()["rejected"]), (2, 1))
+        pool._executor.shutdown()
+
+    def test_overloaded_login_responds_503(self):
+        with mock.patch.object(password_hash_pool, "run", side_effect=HashPoolOverloaded):
+            response = self.client.post(
+                "/api/async/login/",
+                {"email": "comun@mail.com", "password": "ClaveSegura123"},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], str(settings.PASSWORD_HASH_RETRY_AFTER))
+
+
+class DatabaseConnectionStatsTests(TestCase):
+    def setUp(self):
+        self.admin_client = authenticated_client(
+            User.objects.create_user(
+                email="admin@mail.com", username="admin", password="ClaveSegura123", is_staff=True
+            )
+        )
+
+    def database_stats(self):
+        response = self.admin_client.get("/api/admin/metrics/")
+        self.assertEqual(response.status_code, 200)
+        return response.data["database_connections"]
+
+    def test_persistent_connections_count_opened_against_requests(self):
+        with mock.patch.dict(connections.settings["default"], CONN_MAX_AGE=60):
+            before = self.database_stats()
+            connection_created.send(sender=type(connection), connection=connection)
+            after = self.database_stats()
+
+        self.assertEqual(after["requests_started"], before["requests_started"] + 1)
+        default = after["databases"]["default"]
+        self.assertEqual((default["mode"], default["conn_max_age"]), ("persistent", 60))
+        self.assertEqual(
+            default["connections_opened"],
+            before["databases"]["default"]["connections_opened"] + 1,
+        )
+
+    def test_pool_reports_its_own_stats(self):
+        pool = mock.Mock(**{"get_stats.return_value": {"pool_size": 4, "requests_waiting": 0}})
+        options = {**connections.settings["default"].get("OPTIONS", {}), "pool": {"max_size": 4}}
+        with mock.patch.dict(connections.settings["default"], OPTIONS=options), mock.patch(
+            "servic.db_pool._pool_for", return_value=pool
+        ):
+            stats = self.database_stats()
+            text = self.admin_client.get("/api/admin/metrics/prometheus/").content.decode()
+
+        self.assertEqual(
+            stats["databases"]["default"], {"mode": "pool", "pool_size": 4, "requests_waiting": 0}
+        )
+        self.assertIn("servic_database_connections_databases_default_pool_size 4\n", text)
+
+
+@override_settings(REQUEST_METRICS_SAMPLE_RATE=1.0, CATEGORY_LIST_CACHE_TIMEOUT=0)
+class RequestMetricsTests(TestCase):
+    key = ("service-category-list", "GET", 200)
+
+    def test_requests_are_recorded_per_endpoint(self):
+        ServiceCategory.objects.create(name="Gasfitería", description="Tuberías")
+        before = endpoint_metrics.snapshot().get(self.key)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/categories/")
+        self.assertEqual(response.status_code, 200)
+
+        buckets, _latency_sum, requests, sql_queries, _sql_seconds, response_bytes = (
+            endpoint_metrics.snapshot()[self.key]
+        )
+        previous = before or ([0] * len(buckets), 0.0, 0, 0, 0.0, 0)
+        self.assertEqual(requests - previous[2], 1)
+        self.assertEqual(sum(buckets) - sum(previous[0]), 1)
+        self.assertEqual(sql_queries - previous[3], len(queries))
+        self.assertEqual(response_bytes - previous[5], len(response.content))
+
+    def test_unsampled_requests_are_not_recorded(self):
+        before = endpoint_metrics.snapshot().get(self.key, (None, None, 0))[2]
+        with override_settings(REQUEST_METRICS_SAMPLE_RATE=0):
+            self.client.get("/api/categories/")
+        self.assertEqual(endpoint_metrics.snapshot().get(self.key, (None, None, 0))[2], before)
+
+    def test_prometheus_text(self):
+        self.client.get("/api/categories/")
+        text = render_prometheus()
+
+        labels = 'url_name="service-category-list",method="GET",status="200"'
+        values = dict(line.rsplit(" ", 1) for line in text.splitlines() if labels in line)
+        self.assertIn("# TYPE servic_request_duration_seconds histogram", text)
+        # Los buckets son acumulados: +Inf coincide con el total de peticiones
+        self.assertEqual(
+            values[f'servic_request_duration_seconds_bucket{{{labels},le="+Inf"}}'],
+            values[f"servic_request_duration_seconds_count{{{labels}}}"],
+        )
+        self.assertIn(f"servic_request_sql_queries_total{{{labels}}}", values)
+
+
+# Un lote chico: la forma del dataset es la misma que con --scale 1
+@mock.patch.object(DatasetGenerator, "USERS_PER_SCALE", 60)
+class SeedPerfTests(TestCase):
+    @staticmethod
+    def generated_rows(seed):
+        return [
+            (model.__name__, [
+                {name: value for name, value in vars(row).items() if name != "_state"}
+                for row in rows
+            ])
+            for model, rows in DatasetGenerator(scale=1, seed=seed).rows()
+        ]
+
+    def test_same_seed_generates_the_same_rows(self):
+        self.assertEqual(self.generated_rows(7), self.generated_rows(7))
+        self.assertNotEqual(self.generated_rows(7), self.generated_rows(8))
+
+    def test_command_seeds_consistent_data(self):
+        out = StringIO()
+        call_command("seed_perf", "--scale", "1", "--batch-size", "25", "--noinput", stdout=out)
+
+        self.assertIn("Generando con bulk_create", out.getvalue())
+        self.assertEqual(User.objects.count(), 60)
+        providers = User.objects.filter(user_type="provider")
+        self.assertEqual(ServiceProviderProfile.objects.count(), providers.count())
+        # Listado público y contadores armados al final, como si pasaran por la API
+        active = Service.objects.filter(status="active")
+        self.assertGreater(active.count(), 0)
+        self.assertEqual(ServiceListing.objects.count(), active.count())
+        for category in ServiceCategory.objects.all():
+            self.assertEqual(
+                category.active_service_count,
+                active.filter(category=category).count(),
+                category.name,
+            )
+        # Los ids explícitos no dejan atrás la secuencia: un alta normal sigue funcionando
+        create_provider(email="nuevo@mail.com")
+
+    def test_interactive_run_can_be_cancelled(self):
+        with mock.patch("builtins.input", return_value="no"), self.assertRaises(CommandError):
+            call_command("seed_perf", "--scale", "1", stdout=StringIO())
+        self.assertFalse(User.objects.exists())
+
+
+# Se mide la petición que calcula la respuesta, sin la cache de agregados
+@override_settings(CATEGORY_LIST_CACHE_TIMEOUT=0, ADMIN_DASHBOARD_CACHE_TIMEOUT=0)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Presupuesto de consultas por endpoint de listado. Se mide con dos cantidades de
+    filas: si el número de consultas crece con las filas hay un N+1.
+    """
+
+    QUERY_BUDGETS = {
+        "service-list": 1,  # una sola tabla: ServiceListing
+        "async-service-list": 1,
+        "admin-service-list": 2,
+        "admin-provider-list": 1,  # perfiles con su usuario
+        "list-provider-requests": 1,  # solicitudes con su usuario
+        "service-category-list": 1,
+        "service-facets": 3,  # un GROUP BY por país, estado y ciudad
+        "admin-dashboard": 4,  # un conteo agregado por tabla
+    }
+
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(
+            name="Gasfitería", description="Reparaciones de agua y desagüe"
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@mail.com", username="admin", password="ClaveSegura123"
+        )
+        self.admin_client = authenticated_client(self.admin)
+        self.client = APIClient()
+
+    def grow_services(self, size):
+        while Service.objects.count() < size:
+            number = Service.objects.count() + 1
+            provider = create_provider(email=f"prestador{number}@mail.com")
+            service = Service.objects.create(
+                title=f"Servicio {number}",
+                description="Descripción",
+                category=self.category,
+                provider=provider,
+                price="50.00",
+                price_type="fixed",
+                location="Miraflores",
+                city="Lima",
+                state="Lima",
+                country="Perú",
+                availability_start="08:00",
+                availability_end="18:00",
+                available_days="Lunes",
+                status="active",
+            )
+            ServiceImage.objects.create(service=service, image="a.jpg", is_primary=True)
+            ServiceImage.objects.create(service=service, image="b.jpg")
+            refresh_listings([service.id])
+
+    def grow_requests(self, size):
+        while ProviderRequest.objects.count() < size:
+            number = ProviderRequest.objects.count() + 1
+            user = User.objects.create_user(
+                email=f"comun{number}@mail.com", username=f"comun{number}", password="x"
+            )
+            ProviderRequest.objects.create(user=user, request_reason="Quiero trabajar")
+
+    def grow_categories(self, size):
+        while ServiceCategory.objects.count() < size:
+            number = ServiceCategory.objects.count() + 1
+            ServiceCategory.objects.create(name=f"Categoría {number}", description="-")
+
+    def assertEndpointBudget(self, url_name, path, grow, client):
+        self.assertQueryBudget(
+            url_name, lambda: client.get(path), grow, self.QUERY_BUDGETS[url_name]
+        )
+
+    def test_service_list(self):
+        self.assertEndpointBudget("service-list", "/api/services/", self.grow_services, self.client)
+
+    def test_service_facets(self):
+        self.assertEndpointBudget("service-facets", "/api/services/facets/", self.grow_services, self.client)
+
+    def test_async_service_list(self):
+        self.assertEndpointBudget(
+            "async-service-list", "/api/async/services/", self.grow_services, self.client
+        )
+
+    def test_admin_service_list(self):
+        self.assertEndpointBudget(
+            "admin-service-list", "/api/admin/services/", self.grow_services, self.admin_client
+        )
+
+    def test_admin_provider_list(self):
+        self.assertEndpointBudget(
+            "admin-provider-list", "/api/admin/providers/", self.grow_services, self.admin_client
+        )
+
+    def test_provider_request_list(self):
+        self.assertEndpointBudget(
+            "list-provider-requests",
+            "/api/provider/requests/",
+            self.grow_requests,
+            self.admin_client,
+        )
+
+    def test_category_list(self):
+        self.assertEndpointBudget(
+            "service-category-list", "/api/categories/", self.grow_categories, self.client
+        )
+
+    def test_admin_dashboard(self):
+        self.assertEndpointBudget(
+            "admin-dashboard", "/api/admin/dashboard/", self.grow_services, self.admin_client
+        )
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email="admin@mail.com", username="admin", password="ClaveSegura123", is_staff=True
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_staff_request_with_header_is_profiled(self):
+        client = authenticated_client(self.admin)
+        response = client.get("/api/categories/", HTTP_X_PROFILE="cprofile")
+        self.assertEqual(response.status_code, 200)
+
+        report = client.get(f"/api/admin/profiles/{response['X-Profile-Id']}/").data
+        self.assertEqual((report["mode"], report["url_name"]), ("cprofile", "service-category-list"))
+        self.assertIn("function calls", report["profile"])
+        self.assertIn("allocations", report)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_header_is_ignored_for_other_users(self):
+        user = User.objects.create_user(email="comun@mail.com", username="comun", password="ClaveSegura123")
+        for client in (APIClient(), authenticated_client(user)):
+            response = client.get("/api/categories/", HTTP_X_PROFILE="cprofile")
+            self.assertNotIn("X-Profile-Id", response)
+
+    def test_running_tracemalloc_is_left_alone(self):
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+
+        with profiling("sampler") as report:
+            ServiceCategory.objects.count()
+
+        self.assertTrue(tracemalloc.is_tracing())
+        self.assertEqual(report["mode"], "sampler")
+        self.assertNotIn("allocations", report)
+
+    def test_sampled_requests_write_flamegraphs(self):
+        with self.settings(PROFILING_SAMPLE_EVERY=2, PROFILING_FLAMEGRAPH_DIR=self.directory):
+            client = APIClient()
+            for _ in range(4):
+                client.get("/api/categories/")
+
+        files = os.listdir(self.directory)
+        self.assertEqual(len(files), 2)
+        self.assertTrue(all(name.startswith("service-category-list-") for name in files))
+
+    def test_flamegraph_directory_keeps_the_newest_files(self):
+        with self.settings(PROFILING_FLAMEGRAPH_MAX_FILES=3, PROFILING_FLAMEGRAPH_DIR=self.directory):
+            paths = []
+            for number in range(5):
+                paths.append(write_flamegraph("service-list", f"main (views.py:1) {number}"))
+                # Fechas explícitas: en un loop rápido dos archivos pueden tener el mismo mtime
+                os.utime(paths[-1], (number, number))
+
+        kept = sorted(os.path.basename(path) for path in paths[2:])
+        self.assertEqual(sorted(os.listdir(self.directory)), kept)
+
+
+class StatementTimeoutTests(TestCase):
+    def canceled_query(self, **codes):
+        # Simula el error que lanza el driver: psycopg3 usa sqlstate, psycopg2 pgcode
+        cause = type("DriverError", (Exception,), codes)()
+
+        def fail(*args, **kwargs):
+            raise OperationalError("canceling statement due to statement timeout") from cause
+
+        with mock.patch("servic.views.service_views.ServiceCategoryListView.list", side_effect=fail):
+            return APIClient().get("/api/categories/")
+
+    def test_canceled_query_returns_503(self):
+        for codes in ({"sqlstate": "57014"}, {"pgcode": "57014"}):
+            response = self.canceled_query(**codes)
+            self.assertEqual(response.status_code, 503, codes)
+            self.assertEqual(response["Retry-After"], str(settings.STATEMENT_TIMEOUT_RETRY_AFTER))
+
+    def test_other_database_errors_are_not_mapped(self):
+        with self.assertRaises(OperationalError):
+            self.canceled_query(sqlstate="40P01")
+
+    @override_settings(STATEMENT_TIMEOUTS={}, DEFAULT_STATEMENT_TIMEOUT_MS=500)
+    def test_timeout_is_reapplied_after_rollback(self):
+        request = RequestFactory().get("/api/categories/")
+        request.resolver_match = resolve("/api/categories/")
+        guard = QueryGuard(request)
+        statements = []
+
+        def run_internal(self, connection, sql, params=None):
+            statements.append(sql)
+
+        # El SET solo se emite en Postgres: se simula el vendor y se registran los SET
+        with mock.patch.object(connection, "vendor", "postgresql"), mock.patch.object(
+            QueryGuard, "run_internal", run_internal
+        ):
+            with self.assertRaises(ValueError), transaction.atomic():
+                # Instalado después del SAVEPOINT: el SET queda dentro de lo que se revierte
+                with connection.execute_wrapper(guard):
+                    ServiceCategory.objects.count()
+                    ServiceCategory.objects.count()
+                raise ValueError
+            # El ROLLBACK TO SAVEPOINT deshizo el SET: se vuelve a emitir una vez
+            with connection.execute_wrapper(guard):
+                ServiceCategory.objects.count()
+                ServiceCategory.objects.count()
+
+        self.assertEqual(statements, ["SET statement_timeout = %s"] * 2)
+
+
+class AdminChangeListTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email="admin@mail.com", username="admin", password="ClaveSegura123"
+        )
+        self.client.force_login(self.admin)
+        provider = create_provider()
+        category = ServiceCategory.objects.create(name="Gasfitería", description="Tuberías")
+        service = Service.objects.create(
+            title="Reparación de tuberías",
+            description="Descripción",
+            category=category,
+            provider=provider,
+            price="50.00",
+            price_type="fixed",
+            location="Miraflores",
+            city="Lima",
+            state="Lima",
+            country="Perú",
+            availability_start="08:00",
+            availability_end="18:00",
+            available_days="Lunes",
+        )
+        ServiceImage.objects.create(service=service, image="service_images/a.jpg", is_primary=True)
+        ProviderRequest.objects.create(user=self.admin, request_reason="Quiero ofrecer servicios")
+
+    def test_changelists_search_by_prefix(self):
+        for model in ("user", "serviceproviderprofile", "providerrequest", "userrolechangelog",
+                      "servicecategory", "service", "serviceimage", "country", "state", "city"):
+            for query in ("", "?q=PRESTADOR", "?q=1"):
+                response = self.client.get(f"/admin/servic/{model}/{query}")
+                self.assertEqual(response.status_code, 200, f"{model}{query}")
+
+        response = self.client.get("/admin/servic/user/?q=presta")
+        self.assertContains(response, "prestador@mail.com")
+        self.assertNotContains(response, "admin@mail.com</a>")
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN con el planner de Postgres")
+class IndexUsageTests(TestCase):
+    """
+    EXPLAIN de las consultas de los listados: cada una debe usar su índice.
+    Se desactiva el seq scan porque con tablas de prueba tan chicas el planner
+    preferiría recorrer la tabla igual.
+    """
+
+    def test_queries_use_their_indexes(self):
+        category = ServiceCategory.objects.create(name="Gasfitería", description="Tuberías")
+        provider = create_provider()
+        active = Service.objects.filter(status="active")
+        pending = ProviderRequest.objects.filter(status="pending")
+        cases = [
+            (active.order_by("-created_at"), "service_status_created_idx"),
+            (active.filter(category=category).order_by("-created_at"), "service_status_cat_created_idx"),
+            (active.order_by("price"), "service_status_price_idx"),
+            (Service.objects.order_by("-created_at"), "service_created_idx"),
+            (pending.order_by("created_at"), "provreq_status_created_idx"),
+            (pending.filter(user=provider), "provreq_one_pending_per_user"),
+            (ProviderRequest.objects.filter(status="rejected").order_by("-created_at"), "provreq_status_created_idx"),
+            (ServiceProviderProfile.objects.filter(identification_number="123"), "profile_ident_number_idx"),
+            (ServiceProviderProfile.objects.filter(is_verified=False).order_by("-created_at"), "profile_verified_created_idx"),
+        ]
+        # Combinaciones de ServiceFilter sobre el queryset del listado público
+        filter_cases = [
+            ({"city": "LIMA "}, "service_city_status_idx"),
+            ({"state": "lima"}, "service_state_status_idx"),
+            ({"country": "peru"}, "service_country_status_idx"),
+            # Nombres fuera del gazetteer: comparación por texto
+            ({"city": "Springfield"}, "service_status_city_lower_idx"),
+            ({"state": "Springfield"}, "service_status_state_lower_idx"),
+            ({"category__in": f"{category.id},{category.id + 1}"}, "service_status_cat_created_idx"),
+            ({"min_price": "10", "max_price": "50"}, "service_status_price_idx"),
+            ({"price_type__in": "fixed,hourly"}, "service_status_created_idx"),
+        ]
+        for params, index_name in filter_cases:
+            filterset = ServiceFilter(params, queryset=active.order_by("-created_at"))
+            self.assertTrue(filterset.is_valid(), filterset.errors)
+            cases.append((filterset.qs, index_name))
+
+        for queryset, index_name in cases:
+            with self.subTest(index=index_name), transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                plan = queryset.explain()
+                self.assertIn(index_name, plan)
+
+
+class ProviderRequestCreateTests(TestCase):
+    def test_single_pending_request_per_user(self):
+        user = User.objects.create_user(
+            email="comun@mail.com", username="comun", password="ClaveSegura123"
+        )
+        client = authenticated_client(user)
+        url = "/api/provider/request/"
+
+        # Sin consulta previa de exists(): solo el INSERT
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(url, {"request_reason": "Quiero ofrecer servicios"})
+        self.assertEqual(response.status_code, 201)
+        statements = [q["sql"] for q in queries if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(len(statements), 1, statements)
+
+        response = client.post(url, {"request_reason": "Otra vez"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["non_field_errors"], ["Ya tienes una solicitud pendiente"])
+        self.assertEqual(ProviderRequest.objects.filter(user=user, status="pending").count(), 1)
+
+    def test_other_integrity_errors_are_not_reported_as_duplicates(self):
+        user = User.objects.create_user(
+            email="comun@mail.com", username="comun", password="ClaveSegura123"
+        )
+        error = IntegrityError("NOT NULL constraint failed: servic_providerrequest.request_reason")
+        with mock.patch("rest_framework.serializers.ModelSerializer.create", side_effect=error):
+            with self.assertRaises(IntegrityError):
+                authenticated_client(user).post("/api/provider/request/", {"request_reason": "Hola"})
+
+
+class ProviderRequestQueueTests(TestCase):
+    claim_url = "/api/provider/requests/claim/"
+
+    def setUp(self):
+        cache.clear()
+        self.admins = [
+            User.objects.create_user(
+                email=f"admin{number}@mail.com",
+                username=f"admin{number}",
+                password="ClaveSegura123",
+                is_staff=True,
+            )
+            for number in range(2)
+        ]
+        self.clients = [authenticated_client(admin) for admin in self.admins]
+        self.requests = [
+            ProviderRequest.objects.create(
+                user=User.objects.create_user(
+                    email=f"comun{number}@mail.com",
+                    username=f"comun{number}",
+                    password="ClaveSegura123",
+                ),
+                request_reason="Quiero ofrecer servicios",
+            )
+            for number in range(3)
+        ]
+
+    def claim(self, client, limit):
+        response = client.post(self.claim_url, {"limit": limit})
+        self.assertEqual(response.status_code, 200, response.data)
+        return {row["id"] for row in response.data["requests"]}
+
+    def review(self, client, request_id, decision="approved"):
+        data = {"status": decision, "admin_response": "Revisada"}
+        return client.put(f"/api/provider/requests/{request_id}/", data)
+
+    def test_admins_claim_disjoint_batches(self):
+        first = self.claim(self.clients[0], 2)
+        second = self.claim(self.clients[1], 5)
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse(first & second)
+        leased = ProviderRequest.objects.filter(leased_by=self.admins[0], lease_expires_at__gt=timezone.now())
+        self.assertEqual(set(leased.values_list("id", flat=True)), first)
+        # Volver a reclamar devuelve las propias y renueva la reserva
+        self.assertEqual(self.claim(self.clients[0], 2), first)
+
+    def test_request_claimed_by_another_admin_conflicts(self):
+        request_id = self.claim(self.clients[0], 1).pop()
+
+        response = self.review(self.clients[1], request_id)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(ProviderRequest.objects.get(pk=request_id).status, "pending")
+
+    def test_expired_lease_passes_to_the_next_admin(self):
+        request_id = self.claim(self.clients[0], 1).pop()
+        ProviderRequest.objects.filter(pk=request_id).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertIn(request_id, self.claim(self.clients[1], 3))
+        response = self.review(self.clients[0], request_id)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.review(self.clients[1], request_id).status_code, 200)
+
+    def test_reviewed_request_conflicts(self):
+        request_id = self.claim(self.clients[0], 1).pop()
+        self.assertEqual(self.review(self.clients[0], request_id, "rejected").status_code, 200)
+
+        response = self.review(self.clients[0], request_id)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(ProviderRequest.objects.get(pk=request_id).status, "rejected")
+
+    def test_approval_updates_request_role_and_log_together(self):
+        request = self.requests[0]
+        self.claim(self.clients[0], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.review(self.clients[0], request.id)
+        self.assertEqual(response.status_code, 200, response.data)
+
+        request.refresh_from_db()
+        self.assertEqual(
+            (request.status, request.reviewed_by_id, request.leased_by_id, request.lease_expires_at),
+            ("approved", self.admins[0].id, None, None),
+        )
+        self.assertEqual(User.objects.get(pk=request.user_id).user_type, "provider")
+        log = UserRoleChangeLog.objects.get(user_id=request.user_id)
+        self.assertEqual(
+            (log.previous_role, log.new_role, log.reason, log.changed_by_id),
+            ("common", "provider", "Revisada", self.admins[0].id),
+        )
+
+    def test_failed_approval_changes_nothing(self):
+        request = self.requests[0]
+        self.claim(self.clients[0], 3)
+
+        with mock.patch.object(
+            UserRoleChangeLog.objects, "create", side_effect=DatabaseError("sin espacio")
+        ):
+            with self.assertRaises(DatabaseError):
+                self.review(self.clients[0], request.id)
+
+        request.refresh_from_db()
+        self.assertEqual((request.status, request.leased_by_id), ("pending", self.admins[0].id))
+        self.assertIsNone(User.objects.get(pk=request.user_id).user_type)
+        self.assertFalse(UserRoleChangeLog.objects.exists())
+
+
+@skipUnless(connection.features.has_select_for_update_skip_locked, "Requiere SKIP LOCKED")
+class ProviderRequestSkipLockedTests(TransactionTestCase):
+    def test_claim_skips_rows_locked_by_another_transaction(self):
+        admin = User.objects.create_user(
+            email="admin@mail.com", username="admin", password="ClaveSegura123", is_staff=True
+        )
+        requests = [
+            ProviderRequest.objects.create(
+                user=User.objects.create_user(
+                    email=f"comun{number}@mail.com",
+                    username=f"comun{number}",
+                    password="ClaveSegura123",
+                ),
+                request_reason="Quiero ofrecer servicios",
+            )
+            for number in range(2)
+        ]
+        locked, released = threading.Event(), threading.Event()
+
+        def hold_lock():
+            # Otro admin a mitad de su reclamo: la fila queda bloqueada en su transacción
+            try:
+                with transaction.atomic():
+                    ProviderRequest.objects.select_for_update().get(pk=requests[0].pk)
+                    locked.set()
+                    released.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            response = authenticated_client(admin).post(
+                "/api/provider/requests/claim/", {"limit": 2}
+            )
+        finally:
+            released.set()
+            thread.join()
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([row["id"] for row in response.data["requests"]], [requests[1].id])
+
+
+class ServiceFilterTests(TestCase):
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(name="Gasfitería", description="Tuberías")
+        self.provider = create_provider()
+        for city, price_type, price in [("Lima", "fixed", "40.00"), ("LIMA", "hourly", "90.00"), ("Cusco", "fixed", "60.00")]:
+            self.create_service(city, city, "Perú", price_type=price_type, price=price)
+        rebuild_listings()
+
+    def create_service(self, city, state, country, price_type="fixed", price="50.00"):
+        return Service.objects.create(
+            title=f"Servicio en {city}",
+            description="Descripción",
+            category=self.category,
+            provider=self.provider,
+            price=price,
+            price_type=price_type,
+            location="Centro",
+            city=city,
+            state=state,
+            country=country,
+            availability_start="08:00",
+            availability_end="18:00",
+            available_days="Lunes",
+            status="active",
+        )
+
+    def get(self, params):
+        return APIClient().get("/api/services/", params)
+
+    def test_filters(self):
+        self.assertEqual(len(self.get({"city": "LIMA"}).data), 2)
+        self.assertEqual(len(self.get({"city": "lima", "price_type__in": "fixed"}).data), 1)
+        self.assertEqual(len(self.get({"price_type__in": "fixed,hourly", "max_price": "70"}).data), 2)
+
+    def test_facets_by_place(self):
+        response = self.get_facets({"price_type": "fixed"})
+        self.assertEqual(response.status_code, 200)
+        cities = {facet["name"]: facet["total"] for facet in response.data["cities"]}
+        self.assertEqual(cities, {"Lima": 1, "Cusco": 1})
+        self.assertEqual(response.data["countries"][0]["code"], "PE")
+        self.assertEqual(response.data["countries"][0]["total"], 2)
+
+        response = self.get({"city_id": response.data["cities"][0]["id"]})
+        self.assertEqual(len(response.data), 1)
+
+    def get_facets(self, params):
+        return APIClient().get("/api/services/facets/", params)
+
+    def test_unknown_country_leaves_places_unresolved(self):
+        service = self.create_service("Cuenca", "Castilla-La Mancha", "España")
+        self.assertEqual((service.country_ref_id, service.state_ref_id, service.city_ref_id), (None, None, None))
+
+        service = self.create_service("Cuenca", "Castilla", "Ecuador")
+        self.assertIsNotNone(service.country_ref_id)
+        self.assertEqual((service.state_ref_id, service.city_ref_id), (None, None))
+
+        rebuild_listings()
+        self.assertEqual(len(self.get({"country": "ecuador"}).data), 1)
+
+    def test_unresolved_rows_match_by_text(self):
+        # "Lima" en Chile no está en el gazetteer: city_ref queda en NULL
+        service = self.create_service("Lima", "Lima", "Chile")
+        self.assertIsNone(service.city_ref_id)
+        rebuild_listings()
+        self.assertEqual(len(self.get({"city": "lima"}).data), 3)
+        self.assertEqual(len(self.get({"city": "lima", "country": "chile"}).data), 1)
+
+    def test_invalid_values_return_400(self):
+        for params in ({"min_price": "barato"}, {"category__in": "1,x"}, {"price_type__in": "gratis"}):
+            self.assertEqual(self.get(params).status_code, 400, params)
+
+
+class ServiceListingTests(TestCase):
+    """El listado público se lee de ServiceListing y se mantiene en cada escritura."""
+
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(name="Gasfitería", description="Tuberías")
+        self.provider = create_provider()
+        self.service = Service.objects.create(
+            title="Reparación de tuberías",
+            description="Descripción",
+            category=self.category,
+            provider=self.provider,
+            price="40.00",
+            price_type="fixed",
+            location="Centro",
+            city="Lima",
+            state="Lima",
+            country="Perú",
+            availability_start="08:00",
+            availability_end="18:00",
+            available_days="Lunes",
+        )
+        ServiceImage.objects.create(service=self.service, image="a.jpg", is_primary=True)
+        self.admin = User.objects.create_superuser(email="admin@mail.com", username="admin", password="x")
+        self.admin_client = authenticated_client(self.admin)
+
+    def approve(self, new_status):
+        response = self.admin_client.put(
+            f"/api/admin/services/{self.service.id}/approve/", {"status": new_status}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_listing_follows_writes(self):
+        self.assertFalse(ServiceListing.objects.exists())
+
+        self.approve("active")
+        response = APIClient().get("/api/services/")
+        self.service.refresh_from_db()
+        # Misma salida que el serializer sobre Service
+        self.assertEqual(response.json(), [ServiceListSerializer(self.service).data])
+
+        self.admin_client.patch(f"/api/categories/{self.category.id}/", {"name": "Gasfitería y agua"})
+        self.assertEqual(APIClient().get("/api/services/").data[0]["category_name"], "Gasfitería y agua")
+
+        self.approve("inactive")
+        self.assertEqual(APIClient().get("/api/services/").data, [])
+
+    def test_admin_rename_updates_listing(self):
+        self.approve("active")
+        self.assertEqual(APIClient().get("/api/services/").data[0]["provider_name"], " ")
+
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/admin/servic/user/{self.provider.id}/change/",
+                {
+                    "email": self.provider.email,
+                    "first_name": "Ana",
+                    "last_name": "Pérez",
+                    "user_type": "provider",
+                    "is_active": "on",
+                    "date_joined_0": "2026-01-01",
+                    "date_joined_1": "08:00:00",
+                },
+            )
+        self.assertEqual(response.status_code, 302)
+        # El fragmento cacheado de la fila tampoco conserva el nombre anterior
+        self.assertEqual(APIClient().get("/api/services/").data[0]["provider_name"], "Ana Pérez")
+
+    def test_profile_edit_renames_only_when_the_name_changes(self):
+        self.approve("active")
+        client = authenticated_client(self.provider)
+
+        def listing_writes(data, client=client):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.patch("/api/profile/", data)
+            self.assertEqual(response.status_code, 200, response.data)
+            return [q["sql"] for q in queries if "servic_servicelisting" in q["sql"]]
+
+        self.assertEqual(listing_writes({}), [])
+        self.assertEqual(listing_writes({"last_name": self.provider.last_name}), [])
+        self.assertEqual(len(listing_writes({"first_name": "Ana"})), 1)
+        self.assertEqual(APIClient().get("/api/services/").data[0]["provider_name"], "Ana ")
+
+        # Un usuario que no es prestador no tiene filas en el listado
+        user = User.objects.create_user(email="comun@mail.com", username="comun", password="x")
+        self.assertEqual(listing_writes({"first_name": "Luis"}, authenticated_client(user)), [])
+
+    def test_deleting_primary_image_promotes_one_of_the_same_service(self):
+        other = Service.objects.get(pk=self.service.pk)
+        other.pk = None
+        other.save()
+        other_image = ServiceImage.objects.create(service=other, image="b.jpg")
+        client = authenticated_client(self.provider)
+        primary = ServiceImage.objects.get(service=self.service)
+
+        self.assertEqual(client.delete(f"/api/services/images/{primary.id}/").status_code, 204)
+        other_image.refresh_from_db()
+        self.assertFalse(other_image.is_primary)
+
+        second = ServiceImage.objects.create(service=self.service, image="c.jpg")
+        third = ServiceImage.objects.create(service=self.service, image="d.jpg", is_primary=True)
+        self.assertEqual(client.delete(f"/api/services/images/{third.id}/").status_code, 204)
+        second.refresh_from_db()
+        self.assertTrue(second.is_primary)
+
+    def test_rebuild(self):
+        Service.objects.filter(id=self.service.id).update(status="active")
+        self.assertEqual(rebuild_listings(batch_size=1), 1)
+        listing = ServiceListing.objects.get()
+        self.assertEqual(listing.primary_image, "/media/a.jpg")
+        self.assertEqual(listing.city_ref_id, self.service.city_ref_id)
+
+    @override_settings(CATEGORY_LIST_CACHE_TIMEOUT=0)
+    def test_active_service_count(self):
+        def counts():
+            return dict(ServiceCategory.objects.values_list("name", "active_service_count"))
+
+        other = ServiceCategory.objects.create(name="Electricidad", description="Cables")
+        self.approve("active")
+        self.approve("active")  # sin cambio de estado no se vuelve a sumar
+        self.assertEqual(counts(), {"Gasfitería": 1, "Electricidad": 0})
+
+        Service.objects.filter(id=self.service.id).update(category=other)
+        refresh_listings([self.service.id])
+        self.assertEqual(counts(), {"Gasfitería": 0, "Electricidad": 1})
+
+        with self.assertNumQueries(1):
+            data = APIClient().get("/api/categories/").data
+        self.assertEqual({c["name"]: c["active_service_count"] for c in data}, counts())
+
+        response = authenticated_client(self.provider).delete(f"/api/services/{self.service.id}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(counts(), {"Gasfitería": 0, "Electricidad": 0})
+
+        # Borrados en cascada: al eliminar el prestador se van sus servicios
+        for category in (self.category, other, other):
+            service = Service.objects.create(
+                title="Instalación",
+                description="Descripción",
+                category=category,
+                provider=self.provider,
+                price="30.00",
+                price_type="fixed",
+                location="Centro",
+                city="Lima",
+                state="Lima",
+                country="Perú",
+                availability_start="08:00",
+                availability_end="18:00",
+                available_days="Lunes",
+                status="active",
+            )
+            refresh_listings([service.id])
+        self.assertEqual(counts(), {"Gasfitería": 1, "Electricidad": 2})
+        self.provider.delete()
+        self.assertEqual(counts(), {"Gasfitería": 0, "Electricidad": 0})
+
+        ServiceCategory.objects.filter(id=other.id).update(active_service_count=5)
+        self.assertEqual(reconcile_category_counts(), [("Electricidad", 5, 0)])
+        self.assertEqual(reconcile_category_counts(), [])
+
+
+class CachedValueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_single_process_recomputes(self):
+        compute = mock.Mock(return_value="nuevo")
+        # Valor vencido y el lock tomado por otro proceso: se sirve el valor anterior
+        cache.set("clave", ("anterior", time.time() - 1, 0.01), 60)
+        cache.add("lock:clave", "otro-proceso", 5)
+        self.assertEqual(cached_value("clave", compute, 60), "anterior")
+        compute.assert_not_called()
+
+        cache.delete("lock:clave")
+        self.assertEqual(cached_value("clave", compute, 60), "nuevo")
+        self.assertEqual(cached_value("clave", compute, 60), "nuevo")
+        compute.assert_called_once()
+
+    def test_category_list_is_cached(self):
+        ServiceCategory.objects.create(name="Gasfitería", description="Tuberías")
+        self.assertEqual(len(APIClient().get("/api/categories/").data), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(APIClient().get("/api/categories/").data), 1)
+
+        client = authenticated_client(create_provider())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post("/api/categories/", {"name": "Electricidad", "description": "Cables"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(APIClient().get("/api/categories/").data), 2)
+
+    def test_category_list_key_ignores_unrelated_params(self):
+        ServiceCategory.objects.create(name="Gasfitería", description="Tuberías")
+        ServiceCategory.objects.create(name="Electricidad", description="Cables")
+        self.assertEqual(len(APIClient().get("/api/categories/?search=gas").data), 1)
+        self.assertEqual(len(APIClient().get("/api/categories/").data), 2)
+
+        with self.assertNumQueries(0):
+            for url in ("/api/categories/?search=GAS&x=1", "/api/categories/?search=gas&x=2"):
+                self.assertEqual(len(APIClient().get(url).data), 1)
+            self.assertEqual(len(APIClient().get("/api/categories/?x=3").data), 2)
+
+
+class ServiceDetailCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        service_detail_cache.clear()
+        self.provider = create_provider()
+        self.service = Service.objects.create(
+            title="Reparación de tuberías",
+            description="Descripción",
+            category=ServiceCategory.objects.create(name="Gasfitería", description="Tuberías"),
+            provider=self.provider,
+            price="40.00",
+            price_type="fixed",
+            location="Centro",
+            city="Lima",
+            state="Lima",
+            country="Perú",
+            availability_start="08:00",
+            availability_end="18:00",
+            available_days="Lunes",
+        )
+        ServiceImage.objects.create(service=self.service, image="a.jpg", is_primary=True)
+
+    def test_detail_is_cached_and_invalidated(self):
+        url = f"/api/services/{self.service.id}/"
+        self.assertEqual(APIClient().get(url).data["images"][0]["image"], "http://testserver/media/a.jpg")
+        with self.assertNumQueries(0):
+            self.assertEqual(APIClient().get(url).data["status"], "pending")
+
+        admin = User.objects.create_superuser(email="admin@mail.com", username="admin", password="x")
+        with self.captureOnCommitCallbacks(execute=True):
+            authenticated_client(admin).put(
+                f"/api/admin/services/{self.service.id}/approve/", {"status": "active"}
+            )
+        self.assertEqual(APIClient().get(url).data["status"], "active")
+        self.assertEqual(APIClient().get("/api/services/999999/").status_code, 404)
+
+    def test_invalidation_reaches_other_processes(self):
+        other_node = TwoTierCache("service-detail", maxsize=10, l1_timeout=60, l2_timeout=60, sync_interval=0)
+        other_node.get(self.service.id, lambda: "v1")  # registra el log visto y llena L1
+        self.assertEqual(other_node.get(self.service.id, lambda: "v2"), "v1")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            service_detail_cache.invalidate([self.service.id])
+        self.assertEqual(other_node.get(self.service.id, lambda: "v2"), "v2")
+        self.assertEqual(other_node.stats()["invalidations"], 1)
+
+    def test_invalidation_during_compute_is_not_cached(self):
+        tiers = TwoTierCache("service-detail", maxsize=10, l1_timeout=60, l2_timeout=60, sync_interval=0)
+
+        def compute_and_change():
+            # Otro proceso actualiza el servicio mientras este todavía arma el detalle
+            with self.captureOnCommitCallbacks(execute=True):
+                service_detail_cache.invalidate([self.service.id])
+            return "v1"
+
+        self.assertEqual(tiers.get(self.service.id, compute_and_change), "v1")
+        self.assertEqual(tiers.get(self.service.id, lambda: "v2"), "v2")
+        self.assertEqual(tiers.stats()["refused"], 1)
+
+        # Un valor escrito con una generación anterior tampoco se sirve
+        cache.set(f"service-detail:{self.service.id}", (None, "v0"))
+        tiers.clear()
+        self.assertEqual(tiers.get(self.service.id, lambda: "v3"), "v3")
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        caches["fragments"].clear()
+        self.category = ServiceCategory.objects.create(name="Gasfitería", description="Tuberías")
+        provider = create_provider()
+        for number in range(3):
+            Service.objects.create(
+                title=f"Servicio {number}",
+                description="Descripción",
+                category=self.category,
+                provider=provider,
+                price="40.00",
+                price_type="fixed",
+                location="Centro",
+                city="Lima",
+                state="Lima",
+                country="Perú",
+                availability_start="08:00",
+                availability_end="18:00",
+                available_days="Lunes",
+            )
+
+    def render(self):
+        before = cache_stats()
+        data = ServiceListSerializer(Service.objects.select_related("category", "provider"), many=True).data
+        after = cache_stats()
+        misses = after.get("fragment_misses", 0) - before.get("fragment_misses", 0)
+        return data, misses
+
+    def test_only_changed_rows_are_serialized(self):
+        data, misses = self.render()
+        self.assertEqual(misses, 3)
+        self.assertEqual(self.render(), (data, 0))
+
+        service = Service.objects.first()
+        ServiceImage.objects.create(service=service, image="a.jpg", is_primary=True)
+        images_changed([service.id])
+        data, misses = self.render()
+        self.assertEqual(misses, 1)
+        self.assertEqual(next(row for row in data if row["id"] == service.id)["primary_image"], "/media/a.jpg")
+
+        # El nombre de la categoría no cambia el updated_at de los servicios
+        self.category.name = "Gasfitería y agua"
+        self.category.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            rename_category(self.category)
+        data, misses = self.render()
+        self.assertEqual(misses, 3)
+        self.assertEqual({row["category_name"] for row in data}, {"Gasfitería y agua"})
@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import RevokedToken
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom: responde "seguro que no está" o "puede que esté" usando muy poca
+    memoria. Nunca da falsos negativos, así que un "no está" evita ir a la base de datos.
+    """
+
+    def __init__(self, size_bits, num_hashes):
+        self.size_bits = size_bits
+        self.num_hashes = num_hashes
+        self.bits = bytearray((size_bits + 7) // 8)
+
+    def _positions(self, value):
+        # Doble hashing: con dos hashes de 64 bits se derivan todas las posiciones
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.size_bits
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class RevokedTokenStore:
+    """
+    Acceso a la lista negra de refresh tokens con un filtro de Bloom por proceso delante.
+
+    El filtro se reconstruye desde la base de datos cada TOKEN_BLACKLIST_BLOOM_REBUILD_SECONDS
+    (así incorpora lo revocado por otros procesos y descarta lo expirado). Aun si un proceso
+    tiene el filtro desactualizado, revoke() es la verificación definitiva: el jti es único
+    y un token reutilizado falla al insertarse.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._built_at = 0.0
+
+    def _get_bloom(self):
+        max_age = settings.TOKEN_BLACKLIST_BLOOM_REBUILD_SECONDS
+        if self._bloom is None or time.monotonic() - self._built_at > max_age:
+            with self._lock:
+                if self._bloom is None or time.monotonic() - self._built_at > max_age:
+                    bloom = BloomFilter(
+                        settings.TOKEN_BLACKLIST_BLOOM_BITS,
+                        settings.TOKEN_BLACKLIST_BLOOM_HASHES,
+                    )
+                    jtis = RevokedToken.objects.filter(
+                        expires_at__gt=timezone.now()
+                    ).values_list("jti", flat=True)
+                    for jti in jtis.iterator(chunk_size=5000):
+                        bloom.add(jti)
+                    self._bloom = bloom
+                    self._built_at = time.monotonic()
+        return self._bloom
+
+    def is_revoked(self, jti):
+        # Caso común: el filtro dice que no está y no se consulta la base de datos
+        if jti not in self._get_bloom():
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti, expires_at):
+        """Revoca el jti. Devuelve False si ya estaba revocado (token reutilizado)."""
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+        except IntegrityError:
+            return False
+        self._get_bloom().add(jti)
+        return True
+
+
+revoked_tokens = RevokedTokenStore()
@@ -6,4 +6,5 @@ urlpatterns = [
     path("", include("servic.urls.provider_urls")),
     path("", include("servic.urls.service_urls")),
     path("", include("servic.urls.admin_urls")),
+    path("", include("servic.urls.async_urls")),
 ]
@@ -5,6 +5,10 @@ from ..views import (
     AdminServiceApprovalView,
     AdminServiceListView,
     AdminDashboardView,
+    AdminMetricsView,
+    AdminPrometheusMetricsView,
+    AdminProfileReportListView,
+    AdminProfileReportDetailView,
 )
 
 urlpatterns = [
@@ -38,4 +42,27 @@ urlpatterns = [
         AdminServiceApprovalView.as_view(),
         name="admin-approve-service",
     ),
+    # Métricas internas del proceso (pool de hashing de contraseñas, etc.)
+    path(
+        "admin/metrics/",
+        AdminMetricsView.as_view(),
+        name="admin-metrics",
+    ),
+    # Las mismas métricas más latencia/consultas por endpoint, para Prometheus
+    path(
+        "admin/metrics/prometheus/",
+        AdminPrometheusMetricsView.as_view(),
+        name="admin-metrics-prometheus",
+    ),
+    # Reportes de profiling generados con el header X-Profile
+    path(
+        "admin/profiles/",
+        AdminProfileReportListView.as_view(),
+        name="admin-profile-list",
+    ),
+    path(
+        "admin/profiles/<str:report_id>/",
+        AdminProfileReportDetailView.as_view(),
+        name="admin-profile-detail",
+    ),
 ]
@@ -0,0 +1,34 @@
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+from ..views import (
+    AsyncServiceListView,
+    AsyncServiceDetailView,
+    AsyncServiceCategoryListView,
+    AsyncLoginView,
+    AsyncRegisterView,
+)
+
+# Versiones async de los endpoints públicos (lecturas, login y registro), pensadas para servirse con ASGI
+urlpatterns = [
+    # Registro y login async: el hash de la contraseña corre en un pool de hilos acotado.
+    # La API se autentica con JWT, por eso (igual que las vistas DRF) no usan CSRF
+    path(
+        "async/register/",
+        csrf_exempt(AsyncRegisterView.as_view()),
+        name="async-register",
+    ),
+    path("async/login/", csrf_exempt(AsyncLoginView.as_view()), name="async-login"),
+    path(
+        "async/categories/",
+        AsyncServiceCategoryListView.as_view(),
+        name="async-service-category-list",
+    ),  # listar todas las categorias que existen
+    path(
+        "async/services/", AsyncServiceListView.as_view(), name="async-service-list"
+    ),  # listar todos los servicios
+    path(
+        "async/services/<int:pk>/",
+        AsyncServiceDetailView.as_view(),
+        name="async-service-detail",
+    ),  # obtener un servicio en especifico
+]
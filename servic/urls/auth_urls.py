@@ -1,9 +1,11 @@
 from django.urls import path
-from ..views import RegisterView, CustomTokenObtainPairView
+from ..views import RegisterView, CustomTokenObtainPairView, CustomTokenRefreshView
 
 urlpatterns = [
     # Permite registrar el usuario
     path("register/", RegisterView.as_view(), name="register"),
     # Permite loguear al usuario
     path("login/", CustomTokenObtainPairView.as_view(), name="login"),
+    # Permite renovar los tokens con el refresh token (rotación: cada refresh sirve una sola vez)
+    path("token/refresh/", CustomTokenRefreshView.as_view(), name="token-refresh"),
 ]
@@ -3,6 +3,7 @@ from ..views import (
     ServiceProviderProfileView,
     ProviderRequestView,
     ProviderRequestListView,
+    ProviderRequestClaimView,
     ProviderRequestDetailView,
 )
 
@@ -25,6 +26,12 @@ urlpatterns = [
         ProviderRequestListView.as_view(),
         name="list-provider-requests",
     ),
+    # Permite al admin reclamar (reservar) las siguientes N solicitudes pendientes para revisarlas
+    path(
+        "provider/requests/claim/",
+        ProviderRequestClaimView.as_view(),
+        name="claim-provider-requests",
+    ),
     # Permite al admin revisar, aprobar o rechazar una solicitud específica de provider
     path(
         "provider/requests/<int:pk>/",
@@ -4,6 +4,7 @@ from ..views import (
     ServiceCategoryDetailView,
     ServiceCreateView,
     ServiceListView,
+    ServiceFacetsView,
     ServiceDetailView,
     ServiceImageUploadView,
     ServiceImageDeleteView,
@@ -24,6 +25,9 @@ urlpatterns = [
     path(
         "services/", ServiceListView.as_view(), name="service-list"
     ),  # listar todos los servicios
+    path(
+        "services/facets/", ServiceFacetsView.as_view(), name="service-facets"
+    ),  # cantidad de servicios por país, estado y ciudad
     path(
         "services/create/", ServiceCreateView.as_view(), name="service-create"
     ),  # crear un servicio
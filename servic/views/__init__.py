@@ -1,9 +1,10 @@
-from .auth_views import RegisterView, CustomTokenObtainPairView
+from .auth_views import RegisterView, CustomTokenObtainPairView, CustomTokenRefreshView
 from .user_views import UserProfileView, UserRoleChangeView
 from .provider_views import (
     ServiceProviderProfileView,
     ProviderRequestView,
     ProviderRequestListView,
+    ProviderRequestClaimView,
     ProviderRequestDetailView,
 )
 from .service_views import (
@@ -11,11 +12,19 @@ from .service_views import (
     ServiceCategoryDetailView,
     ServiceCreateView,
     ServiceListView,
+    ServiceFacetsView,
     ServiceDetailView,
     ServiceImageUploadView,
     ServiceImageDeleteView,
     ServiceImageSetPrimaryView,
 )
+from .async_views import (
+    AsyncServiceListView,
+    AsyncServiceDetailView,
+    AsyncServiceCategoryListView,
+    AsyncLoginView,
+    AsyncRegisterView,
+)
 
 from .admin_views import (
     AdminDashboardView,
@@ -23,29 +32,45 @@ from .admin_views import (
     AdminProviderVerificationView,
     AdminServiceListView,
     AdminServiceApprovalView,
+    AdminMetricsView,
+    AdminPrometheusMetricsView,
+    AdminProfileReportListView,
+    AdminProfileReportDetailView,
 )
 
 __all__ = [
     "RegisterView",
     "CustomTokenObtainPairView",
+    "CustomTokenRefreshView",
     "UserProfileView",
     "UserRoleChangeView",
     "ServiceProviderProfileView",
     "ProviderRequestView",
     "ProviderRequestListView",
+    "ProviderRequestClaimView",
     "ProviderRequestDetailView",
     "ServiceCategoryListView",
     "ServiceCategoryDetailView",
     "ServiceCreateView",
     "ServiceListView",
+    "ServiceFacetsView",
     "ServiceDetailView",
     "ServiceImageUploadView",
     "ServiceImageDeleteView",
     "ServiceImageSetPrimaryView",
+    "AsyncServiceListView",
+    "AsyncServiceDetailView",
+    "AsyncServiceCategoryListView",
+    "AsyncLoginView",
+    "AsyncRegisterView",
     # Nuevas vistas admin
     "AdminDashboardView",
     "AdminProviderListView",
     "AdminProviderVerificationView",
     "AdminServiceListView",
     "AdminServiceApprovalView",
+    "AdminMetricsView",
+    "AdminPrometheusMetricsView",
+    "AdminProfileReportListView",
+    "AdminProfileReportDetailView",
 ]
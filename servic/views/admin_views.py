@@ -1,10 +1,19 @@
 from rest_framework.views import APIView
 from rest_framework import permissions, status, generics
 from rest_framework.response import Response
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
+from ..authentication import update_user_claims
+from ..cache import cached_value
+from ..metrics import collect_all, render_prometheus
+from ..profiling import get_report, list_reports
+from ..read_models import refresh_listings
 from ..models import ServiceProviderProfile, Service, ProviderRequest
+from .service_views import with_list_relations
 from ..serializers import (
     ServiceProviderProfileSerializer,
     ServiceSerializer,
@@ -20,19 +29,33 @@ class AdminDashboardView(APIView):
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request):
+        # Varios admins con el dashboard abierto: un solo proceso recalcula cuando vence
+        stats = cached_value(
+            "admin-dashboard", self.compute_stats, settings.ADMIN_DASHBOARD_CACHE_TIMEOUT
+        )
+        return Response(stats)
+
+    def compute_stats(self):
+        # Un solo recorrido por tabla: los conteos de una misma tabla van en un aggregate
+        users = User.objects.aggregate(
+            total_users=Count("id"),
+            total_providers=Count("id", filter=Q(user_type="provider")),
+        )
+        services = Service.objects.aggregate(
+            pending_services=Count("id", filter=Q(status="pending")),
+            active_services=Count("id", filter=Q(status="active")),
+        )
         stats = {
-            "total_users": User.objects.count(),
-            "total_providers": User.objects.filter(user_type="provider").count(),
+            **users,
             "pending_provider_requests": ProviderRequest.objects.filter(
                 status="pending"
             ).count(),
             "unverified_providers": ServiceProviderProfile.objects.filter(
                 is_verified=False
             ).count(),
-            "pending_services": Service.objects.filter(status="pending").count(),
-            "active_services": Service.objects.filter(status="active").count(),
+            **services,
         }
-        return Response(stats)
+        return stats
 
 
 class AdminProviderListView(generics.ListAPIView):
@@ -42,7 +65,8 @@ class AdminProviderListView(generics.ListAPIView):
     serializer_class = ServiceProviderProfileSerializer
 
     def get_queryset(self):
-        queryset = ServiceProviderProfile.objects.all()
+        # El usuario se trae en el mismo JOIN (user_info lo usa en cada fila)
+        queryset = ServiceProviderProfile.objects.select_related("user")
 
         # Filtros opcionales
         is_verified = self.request.query_params.get("is_verified")
@@ -75,7 +99,12 @@ class AdminProviderVerificationView(APIView):
 
     def get(self, request, user_id):
         """Ver información completa del prestador"""
-        user = get_object_or_404(User, id=user_id, user_type="provider")
+        # El perfil se trae en la misma consulta (JOIN) que el usuario
+        user = get_object_or_404(
+            User.objects.select_related("provider_profile"),
+            id=user_id,
+            user_type="provider",
+        )
 
         try:
             profile = user.provider_profile
@@ -101,7 +130,11 @@ class AdminProviderVerificationView(APIView):
 
     def put(self, request, user_id):
         """Verificar/desverificar prestador"""
-        user = get_object_or_404(User, id=user_id, user_type="provider")
+        user = get_object_or_404(
+            User.objects.select_related("provider_profile"),
+            id=user_id,
+            user_type="provider",
+        )
 
         try:
             profile = user.provider_profile
@@ -113,7 +146,6 @@ class AdminProviderVerificationView(APIView):
 
         # Validar datos recibidos
         is_verified = request.data.get("is_verified")
-        admin_notes = request.data.get("admin_notes", "")
 
         if is_verified is None:
             return Response(
@@ -123,17 +155,12 @@ class AdminProviderVerificationView(APIView):
 
         # Actualizar verificación
         profile.is_verified = bool(is_verified)
-        if hasattr(profile, "admin_notes"):
-            profile.admin_notes = admin_notes
-        if hasattr(profile, "verified_by"):
-            profile.verified_by = request.user if is_verified else None
-        if hasattr(profile, "verified_at"):
-            profile.verified_at = timezone.now() if is_verified else None
-        profile.save()
-
-        # Marcar perfil como completo
-        user.is_profile_complete = True
-        user.save()
+        with transaction.atomic():
+            profile.save()
+
+            # Marcar perfil como completo (invalida los tokens emitidos con el estado anterior)
+            user.is_profile_complete = True
+            update_user_claims(user.id, is_profile_complete=True)
 
         serializer = ServiceProviderProfileSerializer(profile)
 
@@ -150,7 +177,7 @@ class AdminServiceListView(generics.ListAPIView):
     serializer_class = ServiceListSerializer
 
     def get_queryset(self):
-        queryset = Service.objects.all()
+        queryset = with_list_relations(Service.objects.all())
 
         # Filtros
         status_filter = self.request.query_params.get("status")
@@ -177,8 +204,11 @@ class AdminServiceApprovalView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        service.status = new_status
-        service.save()
+        with transaction.atomic():
+            service.status = new_status
+            service.save()
+            # Aprobar publica el servicio en el listado; desactivarlo lo quita
+            refresh_listings([service.id])
 
         serializer = ServiceSerializer(service)
 
@@ -188,3 +218,47 @@ class AdminServiceApprovalView(APIView):
                 "service": serializer.data,
             }
         )
+
+
+class AdminMetricsView(APIView):
+    """Métricas internas del proceso (pool de hashing, etc.)"""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(collect_all())
+
+
+class AdminPrometheusMetricsView(APIView):
+    """Métricas por endpoint y del proceso en formato de texto de Prometheus"""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(
+            render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+
+class AdminProfileReportListView(APIView):
+    """Últimos reportes de profiling (peticiones enviadas con el header X-Profile)"""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(list_reports())
+
+
+class AdminProfileReportDetailView(APIView):
+    """Reporte completo: ranking de cProfile o stacks del sampler y asignaciones de memoria"""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, report_id):
+        report = get_report(report_id)
+        if report is None:
+            return Response(
+                {"detail": "El reporte no existe o ya expiró"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(report)
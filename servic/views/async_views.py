@@ -0,0 +1,203 @@
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import IntegrityError
+from django.http import Http404, JsonResponse
+from django.shortcuts import aget_object_or_404
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from ..models import Service, User
+from ..password_hashing import HashPoolOverloaded, password_hash_pool
+from ..serializers import (
+    UserRegisterSerializer,
+    CustomTokenObtainPairSerializer,
+    ServiceCategorySerializer,
+    ServiceSerializer,
+    ServiceListingSerializer,
+)
+from .service_views import ServiceCategoryListView, ServiceListView
+
+# Versiones async de los endpoints públicos de lectura.
+# Bajo ASGI no ocupan un hilo mientras esperan a la base de datos o a un cliente lento,
+# así un solo worker atiende muchas lecturas concurrentes. Solo exponen GET.
+
+
+def _filtered_queryset(view_class, request, **kwargs):
+    """
+    Arma el queryset aplicando los mismos filtros, búsqueda y orden que la vista DRF
+    equivalente, para que ambas versiones respondan igual.
+    """
+    view = view_class(request=Request(request), format_kwarg=None, args=(), kwargs=kwargs)
+    return view.filter_queryset(view.get_queryset())
+
+
+class AsyncServiceListView(View):
+    async def get(self, request):
+        try:
+            # Validar los filtros puede consultar la base de datos (ej: que exista la categoría)
+            queryset = await sync_to_async(_filtered_queryset)(ServiceListView, request)
+        except ValidationError as exc:
+            return JsonResponse(exc.detail, status=status.HTTP_400_BAD_REQUEST, safe=False)
+
+        headers = {}
+        limit = request.GET.get("limit")
+        if limit:
+            # Paginación opcional: el total se informa en el header X-Total-Count
+            try:
+                limit = int(limit)
+                offset = int(request.GET.get("offset", 0))
+            except ValueError:
+                return JsonResponse(
+                    {"detail": "limit y offset deben ser números enteros"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            headers["X-Total-Count"] = str(await queryset.acount())
+            queryset = queryset[offset : offset + limit]
+
+        services = [service async for service in queryset.aiterator(chunk_size=500)]
+        data = ServiceListingSerializer(services, many=True).data
+        return JsonResponse(data, safe=False, headers=headers)
+
+
+class AsyncServiceDetailView(View):
+    async def get(self, request, pk):
+        try:
+            service = await aget_object_or_404(
+                Service.objects.select_related("category", "provider").prefetch_related("images"),
+                pk=pk,
+            )
+        except Http404 as exc:
+            # Mismo cuerpo que el 404 de ServiceDetailView (DRF convierte el Http404 en NotFound)
+            return JsonResponse({"detail": str(exc)}, status=status.HTTP_404_NOT_FOUND)
+        data = ServiceSerializer(service, context={"request": request}).data
+        return JsonResponse(data)
+
+
+class AsyncServiceCategoryListView(View):
+    async def get(self, request):
+        queryset = await sync_to_async(_filtered_queryset)(
+            ServiceCategoryListView, request
+        )
+        categories = [category async for category in queryset.aiterator()]
+        data = ServiceCategorySerializer(
+            categories, many=True, context={"request": request}
+        ).data
+        return JsonResponse(data, safe=False)
+
+
+# ---------------------------
+# LOGIN Y REGISTRO ASYNC
+# ---------------------------
+# El hash de la contraseña (PBKDF2) tarda decenas de milisegundos de CPU. Aquí se ejecuta en
+# un pool de hilos acotado (password_hash_pool) y el event loop sigue atendiendo otras
+# peticiones. Si el pool está saturado se responde 503 con Retry-After en lugar de esperar.
+
+
+def _overloaded_response():
+    return JsonResponse(
+        {"detail": "El servidor está ocupado procesando otros inicios de sesión. Intente nuevamente."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER)},
+    )
+
+
+def _json_body(request):
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+class AsyncLoginView(View):
+    async def post(self, request):
+        payload = _json_body(request)
+        if payload is None:
+            return JsonResponse(
+                {"detail": "El cuerpo debe ser un JSON válido"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        email = payload.get("email")
+        password = payload.get("password")
+        if not email or not password:
+            return JsonResponse(
+                {"detail": "Debe enviar email y password"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # El perfil viene en el mismo JOIN: armar los claims del token no vuelve a consultar
+        user = await (
+            User.objects.select_related("provider_profile").filter(email=email).afirst()
+        )
+
+        try:
+            if user is None:
+                # Se hashea igual para no revelar por el tiempo de respuesta si el email existe
+                await password_hash_pool.run(make_password, password)
+                valid = False
+            else:
+                valid = await password_hash_pool.run(
+                    check_password, password, user.password
+                )
+        except HashPoolOverloaded:
+            return _overloaded_response()
+
+        if not valid or not user.is_active:
+            return JsonResponse(
+                {"detail": CustomTokenObtainPairSerializer.default_error_messages["no_active_account"]},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
+        return JsonResponse(
+            {
+                "refresh": str(refresh),
+                "access": str(refresh.access_token),
+                "user": CustomTokenObtainPairSerializer.get_user_data(user),
+            }
+        )
+
+
+class AsyncRegisterView(View):
+    async def post(self, request):
+        payload = _json_body(request)
+        if payload is None:
+            return JsonResponse(
+                {"detail": "El cuerpo debe ser un JSON válido"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = UserRegisterSerializer(data=payload)
+        # La validación consulta la base de datos (email único)
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            password_hash = await password_hash_pool.run(
+                make_password, serializer.validated_data["password"]
+            )
+        except HashPoolOverloaded:
+            return _overloaded_response()
+
+        try:
+            user = await sync_to_async(serializer.save)(password_hash=password_hash)
+        except IntegrityError:
+            # Si el email ya existe, retorna un error personalizado
+            return JsonResponse(
+                {"email": ["El email ya está registrado."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        refresh = await sync_to_async(CustomTokenObtainPairSerializer.get_token)(user)
+        return JsonResponse(
+            {
+                "user": serializer.data,
+                "refresh": str(refresh),
+                "access": str(refresh.access_token),
+                "message": "Usuario registrado exitosamente",
+            },
+            status=status.HTTP_201_CREATED,
+        )
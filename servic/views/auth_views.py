@@ -1,10 +1,13 @@
 from django.shortcuts import render
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.db import IntegrityError
-from ..serializers import UserRegisterSerializer, CustomTokenObtainPairSerializer
+from ..serializers import (
+    UserRegisterSerializer,
+    CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
+)
 
 
 # Aqui definimos la logica de la API similar al archivo "usersController.js"
@@ -29,8 +32,8 @@ class RegisterView(generics.CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Genera los tokens JWT para el usuario recién creado
-        refresh = RefreshToken.for_user(user)
+        # Genera los tokens JWT (con los claims de permisos) para el usuario recién creado
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
 
         # Retorna la respuesta con los datos del usuario y los tokens
         return Response(
@@ -67,4 +70,17 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 # 2. La vista usa el serializer CustomTokenObtainPairSerializer.
 # 3. Al llamar a serializer.is_valid(), se ejecuta el método validate del serializer padre (TokenObtainPairSerializer).
 #    - Aquí se valida que el usuario exista y la contraseña sea correcta.
-# 4. Si todo es válido, se generan los tokens JWT y se retorna la respuesta con los tokens y los datos públicos del usuario.
\ No newline at end of file
+# 4. Si todo es válido, se generan los tokens JWT y se retorna la respuesta con los tokens y los datos públicos del usuario.
+
+# ---------------------------
+# RENOVACIÓN DE TOKENS
+# ---------------------------
+
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer  # Rota el refresh token y revoca el anterior
+
+# FLUJO DE LA RENOVACIÓN
+# ---------------------------
+# 1. Cuando el access token expira (o responde token_outdated), el cliente envía su refresh token.
+# 2. El serializer valida el token y revoca su jti (un refresh token sirve una sola vez).
+# 3. Se arman claims nuevos con los datos actuales del usuario y se retorna un par access + refresh nuevo.
@@ -1,13 +1,21 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import generics
-from ..models import ServiceProviderProfile, ProviderRequest
+from ..authentication import update_user_claims
+from ..models import ServiceProviderProfile, ProviderRequest, UserRoleChangeLog
+from ..provider_context import get_provider_context
 from ..serializers import (
     ServiceProviderProfileSerializer,
     ProviderRequestSerializer,
     ProviderRequestCreateSerializer,
+    ProviderRequestClaimSerializer,
     ProviderRequestReviewSerializer,
 )
 
@@ -22,7 +30,7 @@ class ServiceProviderProfileView(APIView):
     def get(self, request, *args, **kwargs):
         try:
             # Busca el perfil de provider asociado al usuario autenticado
-            profile = request.user.provider_profile
+            profile = ServiceProviderProfile.objects.get(user_id=request.user.id)
         except ServiceProviderProfile.DoesNotExist:
             # Si no existe, retorna error 404
             return Response(
@@ -35,17 +43,16 @@ class ServiceProviderProfileView(APIView):
 
     # Crear un nuevo perfil de provider (POST) (endpoint updateProfileRequest)
     def post(self, request, *args, **kwargs):
-        # Prints de depuración para ver archivos y datos recibidos
-        print("FILES:", request.FILES) # Muestra los archivos enviados en la petición (por ejemplo, imágenes, PDFs, etc.).
-        print("DATA:", request.data) # Muestra el diccionario con los datos enviados en el body de la petición (campos del formulario o JSON).
+        # Estado de prestador del usuario, compartido con el middleware (no vuelve a consultar)
+        provider = get_provider_context(request)
         # Solo los usuarios con user_type "provider" pueden crear perfil
-        if request.user.user_type != "provider":
+        if not provider.is_provider:
             return Response(
                 {"detail": "Solo los prestadores de servicios pueden crear un perfil"},
                 status=status.HTTP_403_FORBIDDEN,
             )
         # No permitir que un usuario cree más de un perfil
-        if hasattr(request.user, "provider_profile"):
+        if provider.has_profile:
             return Response(
                 {"detail": "Ya existe un perfil de prestador de servicios"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -59,11 +66,11 @@ class ServiceProviderProfileView(APIView):
         # Crea el serializer con los datos recibidos (request.data es un diccionario con los datos del formulario/JSON)
         serializer = ServiceProviderProfileSerializer(data=request.data)
         if serializer.is_valid():
-            # Guarda el perfil y lo asocia al usuario autenticado
-            serializer.save(user=request.user)
-            # Marca el perfil del usuario como completo
-            request.user.is_profile_complete = True
-            request.user.save()
+            with transaction.atomic():
+                # Guarda el perfil y lo asocia al usuario autenticado
+                serializer.save(user_id=request.user.id)
+                # Marca el perfil del usuario como completo (el token actual queda desactualizado)
+                update_user_claims(request.user.id, is_profile_complete=True)
             return Response(
                 {"message": "Perfil creado exitosamente", "data": serializer.data},
                 status=status.HTTP_201_CREATED,
@@ -75,7 +82,7 @@ class ServiceProviderProfileView(APIView):
     def put(self, request, *args, **kwargs):
         try:
             # Busca el perfil de provider asociado al usuario autenticado
-            profile = request.user.provider_profile
+            profile = ServiceProviderProfile.objects.get(user_id=request.user.id)
         except ServiceProviderProfile.DoesNotExist:
             # Si no existe, retorna error 404
             return Response(
@@ -119,7 +126,7 @@ class ProviderRequestView(generics.CreateAPIView):
     Cuando llamas a serializer.save(...), DRF sabe que debe crear un objeto del modelo que está en Meta.model del serializer.
     '''
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
 
 # Permite mostrar las solicitudes pendientes al admin
 class ProviderRequestListView(generics.ListAPIView):
@@ -130,8 +137,9 @@ class ProviderRequestListView(generics.ListAPIView):
     def get_queryset(self):
         # Obtiene el parámetro 'status' de la URL si fue enviado (por ejemplo, ?status=pending)
         status_filter = self.request.query_params.get("status", None)
-        # Obtiene todas las solicitudes de provider de la base de datos
-        queryset = ProviderRequest.objects.all()
+        # Obtiene todas las solicitudes de provider de la base de datos, con su usuario
+        # en el mismo JOIN (el serializer muestra su email y nombre en cada fila)
+        queryset = ProviderRequest.objects.select_related("user")
 
         # Si se envió un filtro de estado, filtra el queryset por ese estado
         if status_filter:
@@ -141,10 +149,63 @@ class ProviderRequestListView(generics.ListAPIView):
         return queryset
 
 
+# Permite a un admin reclamar (reservar) las siguientes N solicitudes pendientes de la cola
+class ProviderRequestClaimView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = ProviderRequestClaimSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        limit = serializer.validated_data["limit"]
+
+        now = timezone.now()
+        lease_expires_at = now + timedelta(
+            minutes=settings.PROVIDER_REQUEST_LEASE_MINUTES
+        )
+
+        with transaction.atomic():
+            # SELECT ... FOR UPDATE SKIP LOCKED: si otro admin está reclamando al mismo tiempo,
+            # las filas que él tiene bloqueadas se saltan en lugar de esperar, así cada admin
+            # se lleva un lote distinto de solicitudes.
+            claimable_ids = list(
+                ProviderRequest.objects.select_for_update(skip_locked=True)
+                .filter(status="pending")
+                .filter(
+                    Q(lease_expires_at__isnull=True)
+                    | Q(lease_expires_at__lte=now)
+                    | Q(leased_by_id=request.user.id)
+                )
+                .order_by("created_at")  # La cola se atiende en orden de llegada
+                .values_list("id", flat=True)[:limit]
+            )
+            ProviderRequest.objects.filter(id__in=claimable_ids).update(
+                leased_by_id=request.user.id, lease_expires_at=lease_expires_at
+            )
+
+        claimed = (
+            ProviderRequest.objects.filter(id__in=claimable_ids)
+            .select_related("user")
+            .order_by("created_at")
+        )
+        return Response(
+            {
+                "lease_expires_at": lease_expires_at,
+                "requests": ProviderRequestSerializer(claimed, many=True).data,
+            }
+        )
+
+
 class ProviderRequestDetailView(generics.RetrieveUpdateAPIView):
     serializer_class = ProviderRequestReviewSerializer  # Usa este serializer para revisar/aprobar/rechazar solicitudes
     permission_classes = [permissions.IsAdminUser]      # Solo los usuarios admin pueden acceder a esta vista
-    queryset = ProviderRequest.objects.all()            # Trabaja sobre todas las solicitudes de provider
+
+    def get_queryset(self):
+        # Trabaja sobre todas las solicitudes de provider
+        queryset = ProviderRequest.objects.select_related("user")
+        if self.request.method in ("PUT", "PATCH"):
+            # Bloquea la fila de la solicitud mientras se revisa para que dos admins no se pisen
+            queryset = queryset.select_for_update(of=("self",))
+        return queryset
 
     def update(self, request, *args, **kwargs):
         '''
@@ -155,19 +216,53 @@ class ProviderRequestDetailView(generics.RetrieveUpdateAPIView):
         PUT /api/provider/requests/5/
         self.get_object() obtiene la solicitud de provider con id=5
         user = instance.user
+
+        Todo ocurre dentro de una sola transacción: la solicitud, el user_type del usuario y el
+        registro en UserRoleChangeLog se guardan juntos o no se guarda nada.
         '''
-        instance = self.get_object()  # Obtiene la solicitud específica a actualizar según el <pk> de la URL
-        serializer = self.get_serializer(instance, data=request.data, partial=True)  # Crea el serializer con los datos recibidos y la instancia existente
-        serializer.is_valid(raise_exception=True)  # Valida los datos; si hay error, lanza excepción y retorna 400
-
-        # Si la solicitud es aprobada, cambiar el rol del usuario
-        if serializer.validated_data.get("status") == "approved":
-            user = instance.user  # Obtiene el usuario que hizo la solicitud
-            user.user_type = "provider"  # Cambia su tipo a provider
-            user.save()  # Guarda el cambio en la base de datos
-
-        # Guardar la respuesta del administrador (y el estado actualizado)
-        serializer.save(reviewed_by=request.user)  # Guarda los cambios y registra qué admin revisó la solicitud
+        with transaction.atomic():
+            instance = self.get_object()  # Obtiene (y bloquea) la solicitud específica según el <pk> de la URL
+
+            # Una solicitud ya revisada no se vuelve a revisar (evita sobrescribir la revisión de otro admin)
+            if instance.status != "pending":
+                return Response(
+                    {"detail": "Esta solicitud ya fue revisada"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+            # Si otro admin la tiene reservada y su reserva sigue vigente, no se puede revisar
+            lease_active = (
+                instance.lease_expires_at is not None
+                and instance.lease_expires_at > timezone.now()
+            )
+            if lease_active and instance.leased_by_id != request.user.id:
+                return Response(
+                    {"detail": "Esta solicitud está reservada por otro administrador"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+            serializer = self.get_serializer(instance, data=request.data, partial=True)  # Crea el serializer con los datos recibidos y la instancia existente
+            serializer.is_valid(raise_exception=True)  # Valida los datos; si hay error, lanza excepción y retorna 400
+
+            # Si la solicitud es aprobada, cambiar el rol del usuario y registrar el cambio
+            if serializer.validated_data.get("status") == "approved":
+                user = instance.user  # Obtiene el usuario que hizo la solicitud
+                previous_role = user.user_type or "common"
+                # Cambia su tipo a provider (invalida los tokens emitidos con el rol anterior)
+                update_user_claims(user.id, user_type="provider")
+                UserRoleChangeLog.objects.create(
+                    user=user,
+                    previous_role=previous_role,
+                    new_role="provider",
+                    reason=serializer.validated_data.get("admin_response")
+                    or "Solicitud de prestador aprobada",
+                    changed_by_id=request.user.id,
+                )
+
+            # Guardar la respuesta del administrador (y el estado actualizado) y liberar la reserva
+            serializer.save(
+                reviewed_by_id=request.user.id, leased_by=None, lease_expires_at=None
+            )  # Guarda los cambios y registra qué admin revisó la solicitud
 
         return Response(
             {
@@ -2,15 +2,28 @@ from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Prefetch
 from django.shortcuts import get_object_or_404
-from ..models import ServiceCategory, Service, ServiceImage
+from ..cache import (
+    CATEGORY_LIST_CACHE,
+    cached_value,
+    invalidate_namespace,
+    namespace_key,
+    service_detail_cache,
+)
+from ..filters import ServiceListingFilter
+from ..gazetteer import place_index
+from ..models import ServiceCategory, Service, ServiceImage, ServiceListing
 from ..serializers import (
     ServiceCategorySerializer,
     ServiceSerializer,
-    ServiceListSerializer,
+    ServiceListingSerializer,
     ServiceImageSerializer,
 )
 from ..permissions import IsProviderAndVerified
+from ..read_models import delete_services, images_changed, rename_category
 
 
 class ServiceCategoryListView(generics.ListCreateAPIView):
@@ -20,12 +33,44 @@ class ServiceCategoryListView(generics.ListCreateAPIView):
     filter_backends = [filters.SearchFilter]
     search_fields = ["name", "description"]
 
+    def list(self, request, *args, **kwargs):
+        # La pide cada pantalla de inicio y cambia poco: se cachea por host (las URLs de
+        # los íconos son absolutas) y por búsqueda. Los contadores pueden atrasarse hasta
+        # CATEGORY_LIST_CACHE_TIMEOUT segundos.
+        # La clave solo usa los términos de búsqueda normalizados (la búsqueda no distingue
+        # mayúsculas): otros parámetros no cambian la respuesta ni crean entradas nuevas
+        terms = self.filter_backends[0]().get_search_terms(request)
+        key = namespace_key(
+            CATEGORY_LIST_CACHE, request.get_host(), " ".join(term.lower() for term in terms)
+        )
+        data = cached_value(
+            key,
+            lambda: list(super(ServiceCategoryListView, self).list(request, *args, **kwargs).data),
+            settings.CATEGORY_LIST_CACHE_TIMEOUT,
+        )
+        return Response(data)
+
+    def perform_create(self, serializer):
+        serializer.save()
+        invalidate_namespace(CATEGORY_LIST_CACHE)
+
 
 class ServiceCategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = ServiceCategory.objects.all()
     serializer_class = ServiceCategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        category = serializer.save()
+        # El nombre de la categoría está copiado en el listado público
+        rename_category(category)
+        invalidate_namespace(CATEGORY_LIST_CACHE)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate_namespace(CATEGORY_LIST_CACHE)
+
 
 class ServiceCreateView(generics.CreateAPIView):
     serializer_class = ServiceSerializer
@@ -33,39 +78,75 @@ class ServiceCreateView(generics.CreateAPIView):
     parser_classes = (MultiPartParser, FormParser)
 
     def perform_create(self, serializer):
-        serializer.save(provider=self.request.user)
+        serializer.save(provider_id=self.request.user.id)
+
+
+def with_list_relations(queryset):
+    """Relaciones que usa ServiceListSerializer: 1 consulta con JOIN + 1 para imágenes."""
+    return queryset.select_related("category", "provider").prefetch_related(
+        Prefetch("images", queryset=ServiceImage.objects.filter(is_primary=True))
+    )
 
 
 class ServiceListView(generics.ListAPIView):
-    serializer_class = ServiceListSerializer
+    """
+    Listado público. Se lee de ServiceListing, el modelo de lectura con los servicios
+    activos ya unidos a su categoría, prestador e imagen principal: una sola tabla,
+    una sola consulta por página (ver servic/read_models.py).
+    """
+
+    serializer_class = ServiceListingSerializer
     permission_classes = [permissions.AllowAny]
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
         filters.OrderingFilter,
     ]
-    filterset_fields = ["category", "status", "price_type", "city", "state", "country"]
+    # Precio, categoría, tipo de precio, ubicación y día (ver servic/filters.py)
+    filterset_class = ServiceListingFilter
     search_fields = ["title", "description", "location"]
     ordering_fields = ["price", "created_at"]
     ordering = ["-created_at"]
 
     def get_queryset(self):
-        queryset = Service.objects.filter(status="active")
+        # Solo contiene servicios activos
+        return ServiceListing.objects.all()
 
-        # Filtrar por rango de precio
-        min_price = self.request.query_params.get("min_price")
-        max_price = self.request.query_params.get("max_price")
-        if min_price:
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(price__lte=max_price)
 
-        # Filtrar por disponibilidad
-        available_day = self.request.query_params.get("available_day")
-        if available_day:
-            queryset = queryset.filter(available_days__icontains=available_day)
+class ServiceFacetsView(generics.GenericAPIView):
+    """
+    Cantidad de servicios activos por país, estado y ciudad, con los mismos filtros del
+    listado (ej: /api/services/facets/?category=3). Se agrupa por las columnas *_ref
+    (enteros chicos, con índice) y los nombres y coordenadas salen del índice en memoria
+    de servic/gazetteer.py, sin JOIN. Se cuenta sobre ServiceListing, igual que el listado.
+    """
 
-        return queryset
+    permission_classes = [permissions.AllowAny]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ServiceListingFilter
+
+    def get_queryset(self):
+        return ServiceListing.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        places = place_index().places
+        facets = {}
+        for level, key in (("country", "countries"), ("state", "states"), ("city", "cities")):
+            rows = (
+                queryset.filter(**{f"{level}_ref__isnull": False})
+                .values_list(f"{level}_ref_id")
+                .annotate(total=Count("pk"))
+            )
+            facets[key] = sorted(
+                (
+                    {**places[level][place_id], "total": total}
+                    for place_id, total in rows
+                    if place_id in places[level]
+                ),
+                key=lambda facet: (-facet["total"], facet["name"]),
+            )
+        return Response(facets)
 
 
 class ServiceDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -83,13 +164,39 @@ class ServiceDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def check_object_permissions(self, request, obj):
         if request.method in ["PUT", "PATCH", "DELETE"]:
-            if obj.provider != request.user and not request.user.is_staff:
+            if obj.provider_id != request.user.id and not request.user.is_staff:
                 self.permission_denied(
                     request,
                     message="Solo el propietario del servicio puede modificarlo",
                 )
         return super().check_object_permissions(request, obj)
 
+    def perform_destroy(self, instance):
+        # Descuenta el servicio de active_service_count de su categoría
+        delete_services(Service.objects.filter(id=instance.id))
+
+    def retrieve(self, request, *args, **kwargs):
+        # Detalle cacheado en dos niveles (L1 del proceso y cache compartida)
+        payload = service_detail_cache.get(int(kwargs["pk"]), self.serialize_object)
+        return Response(with_absolute_image_urls(payload, request))
+
+    def serialize_object(self):
+        # Sin request en el contexto las URLs de las imágenes quedan relativas: el mismo
+        # payload sirve para cualquier host
+        data = ServiceSerializer(self.get_object()).data
+        return {**data, "images": [dict(image) for image in data["images"]]}
+
+
+def with_absolute_image_urls(payload, request):
+    """Copia del payload cacheado con las URLs de imágenes absolutas, como las arma DRF."""
+    return {
+        **payload,
+        "images": [
+            {**image, "image": request.build_absolute_uri(image["image"]) if image["image"] else None}
+            for image in payload["images"]
+        ],
+    }
+
 
 class ServiceImageUploadView(generics.CreateAPIView):
     serializer_class = ServiceImageSerializer
@@ -97,17 +204,22 @@ class ServiceImageUploadView(generics.CreateAPIView):
     parser_classes = (MultiPartParser, FormParser)
 
     def get_queryset(self):
-        return ServiceImage.objects.filter(service__provider=self.request.user)
+        return ServiceImage.objects.filter(service__provider_id=self.request.user.id)
 
+    @transaction.atomic
     def perform_create(self, serializer):
         service_id = self.kwargs.get("service_id")
-        service = get_object_or_404(Service, id=service_id, provider=self.request.user)
+        service = get_object_or_404(
+            Service, id=service_id, provider_id=self.request.user.id
+        )
 
         # Si es la primera imagen, marcarla como principal
         if not service.images.exists():
             serializer.save(service=service, is_primary=True)
         else:
             serializer.save(service=service)
+        # La imagen principal se muestra en el listado público
+        images_changed([service.id])
 
 
 class ServiceImageDeleteView(generics.DestroyAPIView):
@@ -115,16 +227,23 @@ class ServiceImageDeleteView(generics.DestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return ServiceImage.objects.filter(service__provider=self.request.user)
+        return ServiceImage.objects.filter(service__provider_id=self.request.user.id)
 
+    @transaction.atomic
     def perform_destroy(self, instance):
-        # Si es la imagen principal, marcar otra como principal
+        # Si es la imagen principal, marcar otra del mismo servicio como principal
         if instance.is_primary:
-            next_image = self.get_queryset().exclude(id=instance.id).first()
+            next_image = (
+                self.get_queryset()
+                .filter(service_id=instance.service_id)
+                .exclude(id=instance.id)
+                .first()
+            )
             if next_image:
                 next_image.is_primary = True
                 next_image.save()
         instance.delete()
+        images_changed([instance.service_id])
 
 
 class ServiceImageSetPrimaryView(generics.UpdateAPIView):
@@ -132,8 +251,9 @@ class ServiceImageSetPrimaryView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return ServiceImage.objects.filter(service__provider=self.request.user)
+        return ServiceImage.objects.filter(service__provider_id=self.request.user.id)
 
+    @transaction.atomic
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
 
@@ -143,5 +263,6 @@ class ServiceImageSetPrimaryView(generics.UpdateAPIView):
         # Marcar la imagen seleccionada como principal
         instance.is_primary = True
         instance.save()
+        images_changed([instance.service_id])
 
         return Response(self.get_serializer(instance).data)
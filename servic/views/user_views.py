@@ -1,7 +1,10 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from ..authentication import update_user_claims
 from ..models import User, UserRoleChangeLog
+from ..read_models import rename_provider
 from ..serializers import UserProfileSerializer, UserRoleChangeSerializer
 
 
@@ -16,9 +19,18 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 
     # El objeto sobre el que se opera es siempre el usuario autenticado
     def get_object(self):
-        # Retorna el usuario que hizo la petición (request.user)
+        # request.user se arma con los claims del token, así que buscamos el usuario real por su id
         # Así, cada usuario solo puede ver y modificar su propio perfil
-        return self.request.user
+        return get_object_or_404(User, pk=self.request.user.id)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_name = (serializer.instance.first_name, serializer.instance.last_name)
+        user = serializer.save()
+        # Nombre y apellido se muestran como prestador en el listado público de servicios.
+        # Solo se propagan si cambiaron: rename_provider invalida todos los fragmentos
+        if user.user_type == "provider" and (user.first_name, user.last_name) != previous_name:
+            rename_provider(user)
 
 
 class UserRoleChangeView(generics.UpdateAPIView):
@@ -38,18 +50,17 @@ class UserRoleChangeView(generics.UpdateAPIView):
         # Guardar el rol anterior
         previous_role = user.user_type
 
-        # Realizar el cambio de rol
+        # Realizar el cambio de rol (invalida los tokens emitidos con el rol anterior) y registrarlo
         user.user_type = serializer.validated_data["user_type"]
-        user.save()
-
-        # Registrar el cambio
-        UserRoleChangeLog.objects.create(
-            user=user,
-            previous_role=previous_role,
-            new_role=user.user_type,
-            reason=serializer.validated_data["reason"],
-            changed_by=request.user,
-        )
+        with transaction.atomic():
+            update_user_claims(user.id, user_type=user.user_type)
+            UserRoleChangeLog.objects.create(
+                user=user,
+                previous_role=previous_role or "common",
+                new_role=user.user_type,
+                reason=serializer.validated_data["reason"],
+                changed_by_id=request.user.id,
+            )
 
         return Response(
             {
@@ -51,11 +51,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero, para medir la latencia completa de cada petición
+    "servic.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "servic.middleware.ProfilingMiddleware",
+    "servic.middleware.ServiceProviderMiddleware",
+    "servic.middleware.ReadReplicaMiddleware",
+    "servic.middleware.QueryGuardMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -94,6 +100,44 @@ DATABASES = {
     }
 }
 
+# Reutilización de conexiones, configurable por entorno:
+#   DB_POOL=true -> pool de psycopg3 (psycopg[pool]) compartido por los hilos del proceso.
+#                   Dimensionar DB_POOL_MAX_SIZE según los hilos/workers que atienden peticiones.
+#   sin DB_POOL  -> conexiones persistentes por hilo durante DB_CONN_MAX_AGE segundos,
+#                   verificadas antes de reutilizarse (CONN_HEALTH_CHECKS).
+if os.environ.get("DB_POOL", "false").lower() == "true":
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            # Segundos que una petición espera una conexión libre antes de fallar
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Réplicas de lectura (opcional): hosts separados por coma con las mismas credenciales.
+# Cada una queda como alias "replica_1", "replica_2", ...; en los tests apuntan a la
+# base de pruebas de "default" (MIRROR).
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")), start=1
+):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["servic.db_router.PrimaryReplicaRouter"]
+
+# Segundos que las lecturas de un cliente van a la base principal después de que escribe
+READ_YOUR_WRITES_SECONDS = int(os.environ.get("READ_YOUR_WRITES_SECONDS", 5))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -138,8 +182,9 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # REST Framework settings
 REST_FRAMEWORK = {
+    # Autenticación JWT sin consulta a la base de datos: el usuario se arma con los claims del token
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "servic.authentication.ClaimsJWTAuthentication",
     ),
 }
 
@@ -149,8 +194,138 @@ from datetime import timedelta
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+    "ROTATE_REFRESH_TOKENS": True,
+    "TOKEN_USER_CLASS": "servic.authentication.ClaimsUser",
+}
+
+# Lista negra de refresh tokens: filtro de Bloom por proceso (2^20 bits = 128KB) que se
+# reconstruye desde la base de datos cada cierto tiempo
+TOKEN_BLACKLIST_BLOOM_BITS = 1 << 20
+TOKEN_BLACKLIST_BLOOM_HASHES = 7
+TOKEN_BLACKLIST_BLOOM_REBUILD_SECONDS = 300
+
+# Hashing de contraseñas en el login/registro async: hilos dedicados y máximo de
+# peticiones en espera antes de responder 503
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 4))
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get("PASSWORD_HASH_MAX_QUEUE", 32))
+PASSWORD_HASH_RETRY_AFTER = 1  # segundos
+
+# Fracción de peticiones medidas por RequestMetricsMiddleware (1.0 = todas, 0 = ninguna)
+REQUEST_METRICS_SAMPLE_RATE = float(os.environ.get("REQUEST_METRICS_SAMPLE_RATE", 1.0))
+
+# Profiling a pedido (header X-Profile, solo staff): filas de cada ranking, segundos que
+# se guardan los reportes y cuántos se listan
+PROFILING_TOP_N = 30
+PROFILING_REPORT_TTL = 60 * 60
+PROFILING_MAX_REPORTS = 50
+PROFILING_SAMPLER_INTERVAL = 0.001  # segundos entre muestras del sampler estadístico
+# Muestreo continuo: 1 de cada N peticiones guarda sus stacks para flame graphs (0 = apagado)
+PROFILING_SAMPLE_EVERY = int(os.environ.get("PROFILING_SAMPLE_EVERY", 0))
+PROFILING_FLAMEGRAPH_DIR = os.environ.get(
+    "PROFILING_FLAMEGRAPH_DIR", os.path.join(BASE_DIR, "profiles")
+)
+# Archivos que se conservan en ese directorio: al pasarse, se borran los más viejos
+PROFILING_FLAMEGRAPH_MAX_FILES = int(os.environ.get("PROFILING_FLAMEGRAPH_MAX_FILES", 500))
+
+# Tiempo máximo (ms) de cada consulta SQL según el endpoint (url_name). Al vencer,
+# Postgres cancela la consulta y se responde 503 con Retry-After.
+# Los endpoints que no figuran usan DEFAULT_STATEMENT_TIMEOUT_MS (0 = sin límite).
+STATEMENT_TIMEOUTS = {
+    "service-list": 2000,
+    "service-facets": 2000,
+    "async-service-list": 2000,
+    "service-category-list": 1000,
+    "async-service-category-list": 1000,
+    "service-detail": 1000,
+    "async-service-detail": 1000,
+    "admin-service-list": 5000,
+    "admin-provider-list": 5000,
+    "list-provider-requests": 5000,
+    "admin-dashboard": 5000,
+}
+DEFAULT_STATEMENT_TIMEOUT_MS = int(os.environ.get("DEFAULT_STATEMENT_TIMEOUT_MS", 0))
+STATEMENT_TIMEOUT_RETRY_AFTER = 2  # segundos
+
+# Consultas más lentas que este umbral (ms) van al logger "servic.slow_queries";
+# a una fracción de ellas se les adjunta el EXPLAIN
+SLOW_QUERY_THRESHOLD_MS = int(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 500))
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = 0.1
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "servic.slow_queries": {"handlers": ["console"], "level": "WARNING"},
+    },
 }
 
+# Changelists del admin: desde esta cantidad de filas (según pg_class.reltuples) se
+# muestra el total estimado en lugar de hacer COUNT(*) sobre toda la tabla
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100_000
+
+# Cache compartida entre procesos (Redis en producción, requiere el paquete redis).
+# Sin REDIS_URL se usa la cache local en memoria de cada proceso.
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        },
+        "fragments": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "fragments",
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        # Fragmentos de filas de listados: muchas claves chicas. Van aparte para que una
+        # página grande no desaloje de la cache local claves como las token_version
+        "fragments": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "fragments",
+            "OPTIONS": {"MAX_ENTRIES": 20000},
+        },
+    }
+
+# Agregados cacheados con protección contra estampidas (servic/cache.py). Vencido el
+# timeout, durante CACHE_STALE_GRACE segundos se sigue sirviendo el valor anterior mientras
+# un solo proceso lo recalcula; CACHE_LOCK_TIMEOUT es lo máximo que dura ese lock.
+# Un timeout de 0 desactiva la cache del endpoint.
+CATEGORY_LIST_CACHE_TIMEOUT = int(os.environ.get("CATEGORY_LIST_CACHE_TIMEOUT", 60))
+ADMIN_DASHBOARD_CACHE_TIMEOUT = int(os.environ.get("ADMIN_DASHBOARD_CACHE_TIMEOUT", 30))
+CACHE_STALE_GRACE = int(os.environ.get("CACHE_STALE_GRACE", 30))
+CACHE_LOCK_TIMEOUT = int(os.environ.get("CACHE_LOCK_TIMEOUT", 5))
+
+# Detalle de servicios en dos niveles (servic/cache.py, TwoTierCache): L1 en memoria de
+# cada proceso (entradas y segundos) delante de la cache compartida (L2). Cada proceso
+# revisa cada SERVICE_DETAIL_L1_SYNC_INTERVAL segundos las invalidaciones de los demás.
+SERVICE_DETAIL_CACHE_TIMEOUT = int(os.environ.get("SERVICE_DETAIL_CACHE_TIMEOUT", 300))
+SERVICE_DETAIL_L1_SIZE = int(os.environ.get("SERVICE_DETAIL_L1_SIZE", 1000))
+SERVICE_DETAIL_L1_TIMEOUT = int(os.environ.get("SERVICE_DETAIL_L1_TIMEOUT", 30))
+SERVICE_DETAIL_L1_SYNC_INTERVAL = float(os.environ.get("SERVICE_DETAIL_L1_SYNC_INTERVAL", 1))
+
+# Representación cacheada de cada fila de ServiceListSerializer, versionada por updated_at
+# (las filas que cambian no se reusan: el timeout solo limita la memoria). 0 la desactiva.
+SERVICE_FRAGMENT_CACHE_TIMEOUT = int(os.environ.get("SERVICE_FRAGMENT_CACHE_TIMEOUT", 3600))
+
+# Segundos que se cachea la token_version de cada usuario. Con cache local en memoria
+# es también el tiempo máximo que otro proceso puede seguir aceptando un token viejo.
+TOKEN_VERSION_CACHE_TIMEOUT = int(os.environ.get("TOKEN_VERSION_CACHE_TIMEOUT", 60))
+
+# Revisión de solicitudes de prestador: minutos que dura la reserva (lease) de una
+# solicitud reclamada por un admin antes de volver a la cola
+PROVIDER_REQUEST_LEASE_MINUTES = int(
+    os.environ.get("PROVIDER_REQUEST_LEASE_MINUTES", 15)
+)
+
 # Custom user model
 AUTH_USER_MODEL = "servic.User"
 